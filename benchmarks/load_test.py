@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Load test and latency benchmark for the WeedDB web API.
+
+Starts web/app.py under uvicorn against a seeded database and drives a
+mixed read workload with concurrent clients. Reports throughput and
+p50/p95/p99 latency per endpoint, first read-only and then while a
+simulated scraper writes prices, so every performance change can be
+measured before and after.
+
+Workload (weights):
+- /api/stats (10%)
+- /api/products with random filters, sorts and cursor pages (40%)
+- /api/products/{id} (35%)
+- /api/analytics/prices (15%)
+
+Features:
+- Seeds a synthetic database (benchmarks/seed_database.py) or reuses --db
+- Uvicorn with N workers, waits for /health before measuring
+- Scraper phase: a writer thread records prices (price_store.record_price)
+  and commits per product, like update_prices.py
+- JSON output for comparing runs (--json / --output)
+
+Usage:
+    python3 benchmarks/load_test.py                                   # 1000 products, 6 months
+    python3 benchmarks/load_test.py --workers 4 --concurrency 64 --duration 30
+    python3 benchmarks/load_test.py --db /tmp/weeddb_bench.db --no-writer --output before.json
+
+Requires uvicorn, fastapi and httpx (requirements.txt).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import httpx  # noqa: E402
+
+from seed_database import DEFAULT_MONTHS, DEFAULT_PHARMACIES, DEFAULT_PRODUCTS, seed_database  # noqa: E402
+
+# Constants
+DEFAULT_WORKERS = 1
+DEFAULT_CONCURRENCY = 32
+DEFAULT_DURATION = 20  # seconds per phase
+DEFAULT_WARMUP = 3  # seconds, not measured
+STARTUP_TIMEOUT = 60
+WRITER_INTERVAL = 0.05  # seconds between committed products
+REQUEST_TIMEOUT = 30
+
+SORT_KEYS = ["name", "rating", "thc_percent", "review_count"]
+GENETICS = ['Indica', 'Sativa', 'Hybrid-Sativa', 'Hybrid-Indica', 'Hybrid']
+EFFECTS = ['Relaxed', 'Happy', 'Euphoric', 'Sleepy', 'Uplifted']
+SEARCH_TERMS = ['Kush', 'Haze', 'Lemon', 'Gelato', 'Pink']
+
+
+class Workload:
+    """Random requests against the read endpoints"""
+
+    def __init__(self, product_ids: List[int], seed: int = 1):
+        self.product_ids = product_ids
+        self.rng = random.Random(seed)
+        self.cursors: Dict[Tuple[str, str], List[str]] = {}
+        self.endpoints: List[Tuple[str, float, Callable[[], Tuple[str, Dict[str, Any]]]]] = [
+            ("stats", 0.10, lambda: ("/api/stats", {})),
+            ("products", 0.40, self._products),
+            ("product_detail", 0.35,
+             lambda: (f"/api/products/{self.rng.choice(self.product_ids)}", {})),
+            ("analytics", 0.15, lambda: ("/api/analytics/prices", {})),
+        ]
+
+    def _products(self) -> Tuple[str, Dict[str, Any]]:
+        rng = self.rng
+        sort = (rng.choice(SORT_KEYS), rng.choice(["asc", "desc"]))
+        params: Dict[str, Any] = {"sort_by": sort[0], "sort_order": sort[1], "limit": rng.choice([20, 50, 100])}
+        roll = rng.random()
+        if roll < 0.2:
+            params["genetics"] = rng.choice(GENETICS)
+        elif roll < 0.35:
+            params["min_rating"] = rng.choice([3.5, 4.0, 4.5])
+        elif roll < 0.45:
+            params["effect"] = rng.choice(EFFECTS)
+        elif roll < 0.55:
+            params["search"] = rng.choice(SEARCH_TERMS)
+        elif roll < 0.75 and self.cursors.get(sort):
+            params["cursor"] = rng.choice(self.cursors[sort])
+        return "/api/products", params
+
+    def next_request(self) -> Tuple[str, str, Dict[str, Any]]:
+        """Pick the next (endpoint name, path, params)"""
+        roll, total = self.rng.random(), 0.0
+        for name, weight, build in self.endpoints:
+            total += weight
+            if roll < total:
+                return (name, *build())
+        name, _, build = self.endpoints[-1]
+        return (name, *build())
+
+    def remember_cursor(self, params: Dict[str, Any], body: Dict[str, Any]) -> None:
+        """Keep next_cursor values of unfiltered pages for later page requests"""
+        cursor = (body.get("pagination") or {}).get("next_cursor")
+        if cursor and not any(key in params for key in ("genetics", "min_rating", "effect", "search")):
+            cursors = self.cursors.setdefault((params["sort_by"], params["sort_order"]), [])
+            if len(cursors) < 50:
+                cursors.append(cursor)
+
+
+class ScraperSimulator(threading.Thread):
+    """Writes new prices product by product while the API is under load"""
+
+    def __init__(self, db_path: Path, product_ids: List[int], pharmacy_ids: List[int]):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.product_ids = product_ids
+        self.pharmacy_ids = pharmacy_ids
+        self.stop_event = threading.Event()
+        self.commits = 0
+        self.commit_times: List[float] = []
+        self.errors = 0
+
+    def run(self) -> None:
+        from database import get_connection
+        from price_store import record_price
+
+        rng = random.Random(7)
+        conn = get_connection(self.db_path, timeout=30)
+        try:
+            while not self.stop_event.is_set():
+                product_id = rng.choice(self.product_ids)
+                start = time.perf_counter()
+                try:
+                    cursor = conn.cursor()
+                    for category in ('top', 'all'):
+                        record_price(cursor, product_id, rng.choice(self.pharmacy_ids),
+                                     round(rng.uniform(4, 15), 2), category)
+                    conn.commit()
+                    self.commit_times.append(time.perf_counter() - start)
+                    self.commits += 1
+                except Exception:
+                    conn.rollback()
+                    self.errors += 1
+                self.stop_event.wait(WRITER_INTERVAL)
+        finally:
+            conn.close()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop writing and return commit statistics"""
+        self.stop_event.set()
+        self.join()
+        return {"commits": self.commits, "errors": self.errors, **latency_summary(self.commit_times)}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values)))) - 1
+    return sorted_values[index]
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """Count, mean and percentiles in milliseconds"""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+async def run_phase(base_url: str, workload: Workload, concurrency: int,
+                    duration: float, warmup: float) -> Dict[str, Any]:
+    """Drive the workload with concurrent clients, returns per-endpoint results"""
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=REQUEST_TIMEOUT) as client:
+
+        async def worker() -> None:
+            while True:
+                name, path, params = workload.next_request()
+                start = time.perf_counter()
+                if start >= deadline:
+                    return
+                response: Optional[httpx.Response] = None
+                try:
+                    response = await client.get(path, params=params)
+                except httpx.HTTPError:
+                    pass
+                elapsed = time.perf_counter() - start
+                if start < measure_from:
+                    continue
+                if response is not None and response.status_code == 200:
+                    latencies.setdefault(name, []).append(elapsed)
+                    if name == "products":
+                        workload.remember_cursor(params, response.json())
+                else:
+                    errors[name] = errors.get(name, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    endpoints = {}
+    for name, _, _ in workload.endpoints:
+        endpoints[name] = {**latency_summary(latencies.get(name, [])), "errors": errors.get(name, 0)}
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "rps": round(len(everything) / duration, 1),
+        "overall": latency_summary(everything),
+        "endpoints": endpoints
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def start_server(db_path: Path, workers: int, port: int) -> subprocess.Popen:
+    """Start uvicorn with web.app:app and wait until /health answers"""
+    env = {**os.environ, "WEEDDB_DATABASE_PATH": str(db_path), "PYTHONUNBUFFERED": "1"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "web.app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=PROJECT_ROOT, env=env
+    )
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=2).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    stop_server(process)
+    raise RuntimeError(f"Server did not become healthy within {STARTUP_TIMEOUT}s")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def load_ids(db_path: Path) -> Tuple[List[int], List[int]]:
+    """Product and pharmacy ids of the benchmark database"""
+    from database import get_connection
+
+    conn = get_connection(db_path)
+    try:
+        product_ids = [row[0] for row in conn.execute("SELECT id FROM products")]
+        pharmacy_ids = [row[0] for row in conn.execute("SELECT id FROM pharmacies")]
+    finally:
+        conn.close()
+    return product_ids, pharmacy_ids
+
+
+def print_phase(title: str, result: Dict[str, Any]) -> None:
+    print(f"\n📊 {title}: {result['rps']} req/s, {result['requests']:,} requests, {result['errors']} errors")
+    print(f"   {'endpoint':<16} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  errors")
+    rows = list(result["endpoints"].items()) + [("overall", {**result["overall"], "errors": result["errors"]})]
+    for name, entry in rows:
+        print(f"   {name:<16} {entry['count']:>7} {entry['p50_ms']:>7.1f}ms {entry['p95_ms']:>7.1f}ms "
+              f"{entry['p99_ms']:>7.1f}ms {entry['max_ms']:>7.1f}ms  {entry['errors']}")
+    if "writer" in result:
+        writer = result["writer"]
+        print(f"   ✍️  writer: {writer['commits']} commits, {writer['errors']} errors, "
+              f"commit p50 {writer['p50_ms']:.1f}ms / p99 {writer['p99_ms']:.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the WeedDB web API")
+    parser.add_argument('--db', help='Existing database to test (default: seed a temporary one)')
+    parser.add_argument('--products', type=int, default=DEFAULT_PRODUCTS, help='Products to seed')
+    parser.add_argument('--pharmacies', type=int, default=DEFAULT_PHARMACIES, help='Pharmacies to seed')
+    parser.add_argument('--months', type=int, default=DEFAULT_MONTHS, help='Months of prices to seed')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Uvicorn worker processes')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help='Seconds per phase')
+    parser.add_argument('--warmup', type=float, default=DEFAULT_WARMUP, help='Unmeasured seconds per phase')
+    parser.add_argument('--no-writer', action='store_true', help='Skip the concurrent scraper phase')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('-o', '--output', help='Also write JSON results to this file')
+    args = parser.parse_args()
+
+    temp_dir: Optional[tempfile.TemporaryDirectory] = None
+    if args.db:
+        db_path = Path(args.db)
+        seeded = None
+    else:
+        temp_dir = tempfile.TemporaryDirectory(prefix="weeddb_load_")
+        db_path = Path(temp_dir.name) / "WeedDB.db"
+        if not args.json:
+            print(f"🌱 Seeding {args.products} products, {args.months} months of prices...")
+        seeded = seed_database(db_path, args.products, args.pharmacies, months=args.months)
+
+    product_ids, pharmacy_ids = load_ids(db_path)
+    if not product_ids:
+        print(f"❌ No products in {db_path}")
+        sys.exit(1)
+
+    port = free_port()
+    if not args.json:
+        print(f"🚀 Starting uvicorn ({args.workers} workers) on port {port}...")
+    server = start_server(db_path, args.workers, port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    results: Dict[str, Any] = {
+        "config": {"workers": args.workers, "concurrency": args.concurrency, "duration": args.duration,
+                   "products": len(product_ids), "database": str(db_path) if args.db else None,
+                   "seeded": seeded},
+        "phases": {}
+    }
+    try:
+        workload = Workload(product_ids)
+        results["phases"]["read_only"] = asyncio.run(
+            run_phase(base_url, workload, args.concurrency, args.duration, args.warmup))
+        if not args.json:
+            print_phase("Read-only", results["phases"]["read_only"])
+
+        if not args.no_writer:
+            writer = ScraperSimulator(db_path, product_ids, pharmacy_ids)
+            writer.start()
+            try:
+                phase = asyncio.run(run_phase(base_url, workload, args.concurrency, args.duration, args.warmup))
+            finally:
+                writer_stats = writer.stop()
+            phase["writer"] = writer_stats
+            results["phases"]["with_writer"] = phase
+            if not args.json:
+                print_phase("With concurrent scraper", phase)
+    finally:
+        stop_server(server)
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        if not args.json:
+            print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
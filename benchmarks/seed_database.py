@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Seed a synthetic WeedDB database for benchmarks and load tests.
+
+Creates a database with the current schema (via database.get_connection)
+and fills it with deterministic fake data at a configurable scale, so
+performance changes can be measured on realistic table sizes without
+scraping.
+
+Features:
+- Producers, pharmacies, products with effects/complaints/terpenes (x/4)
+- Daily prices per product and category over N months (triggers keep
+  price_daily, latest_prices and the FTS index in sync as in production),
+  price_analytics is refreshed at the end like after a price update
+- Deterministic (--seed), refuses to overwrite without --force
+
+Usage:
+    python3 benchmarks/seed_database.py /tmp/weeddb_bench.db --products 1000 --months 6
+    python3 benchmarks/seed_database.py /tmp/weeddb_bench.db --force --pharmacies 80
+
+    # Use it with the web app / scripts
+    WEEDDB_DATABASE_PATH=/tmp/weeddb_bench.db uvicorn web.app:app
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from database import get_connection  # noqa: E402
+from price_analytics import refresh_price_analytics  # noqa: E402
+from product_store import format_top_entries, store_attributes  # noqa: E402
+
+# Constants
+DEFAULT_PRODUCTS = 1000
+DEFAULT_PHARMACIES = 50
+DEFAULT_PRODUCERS = 40
+DEFAULT_MONTHS = 6
+DEFAULT_SEED = 42
+FIRST_PRODUCT_ID = 100000
+
+GENETICS = ['Indica', 'Sativa', 'Hybrid-Sativa', 'Hybrid-Indica', 'Hybrid']
+COUNTRIES = ['Canada', 'Germany', 'Portugal', 'Netherlands', 'Denmark', 'Australia']
+NAME_PARTS = (['Pink', 'Lemon', 'Gorilla', 'Wedding', 'Northern', 'Purple', 'Blue', 'Ghost',
+               'Amnesia', 'Critical', 'Jack', 'Sour', 'Mango', 'Papaya', 'Gelato'],
+              ['Kush', 'Haze', 'Glue', 'Cake', 'Lights', 'Dream', 'Diesel', 'Train',
+               'Cookies', 'Runtz', 'Skunk', 'Punch', 'Sherbet', 'OG', 'Zkittlez'])
+EFFECTS = ['Relaxed', 'Happy', 'Euphoric', 'Sleepy', 'Uplifted', 'Creative', 'Focused', 'Hungry']
+COMPLAINTS = ['Chronic pain', 'Insomnia', 'Stress', 'Anxiety', 'Depression', 'Migraine', 'ADHD']
+TERPENES = ['Myrcene', 'Limonene', 'Caryophyllene', 'Pinene', 'Linalool', 'Humulene', 'Terpinolene']
+
+
+def _random_attributes(rng: random.Random, names: List[str]) -> List[Tuple[str, int]]:
+    return [(name, rng.randint(0, 4)) for name in rng.sample(names, rng.randint(2, min(5, len(names))))]
+
+
+def seed_database(db_path: Path, products: int = DEFAULT_PRODUCTS,
+                  pharmacies: int = DEFAULT_PHARMACIES, producers: int = DEFAULT_PRODUCERS,
+                  months: int = DEFAULT_MONTHS, seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """Create and fill a synthetic database, returns row counts and duration"""
+    rng = random.Random(seed)
+    started = time.time()
+
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")  # throwaway benchmark data
+
+    cursor.executemany("INSERT INTO producers (name, origin) VALUES (?, ?)",
+                       [(f"Producer {i}", rng.choice(COUNTRIES)) for i in range(producers)])
+    cursor.executemany("INSERT INTO pharmacies (name, location) VALUES (?, ?)",
+                       [(f"Apotheke {i}", f"Stadt {i % 20}") for i in range(pharmacies)])
+    producer_ids = [row[0] for row in cursor.execute("SELECT id FROM producers")]
+    pharmacy_ids = [row[0] for row in cursor.execute("SELECT id FROM pharmacies")]
+
+    product_ids = []
+    for i in range(products):
+        product_id = FIRST_PRODUCT_ID + i
+        name = f"{rng.choice(NAME_PARTS[0])} {rng.choice(NAME_PARTS[1])} {i}"
+        effects = _random_attributes(rng, EFFECTS)
+        complaints = _random_attributes(rng, COMPLAINTS)
+        cursor.execute("""
+            INSERT INTO products (id, name, variant, genetics, thc_percent, cbd_percent, producer_id,
+                                  stock_level, rating, review_count, irradiation, country,
+                                  effects, complaints, url)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            product_id, name, rng.choice([None, '10g', '15g']), rng.choice(GENETICS),
+            round(rng.uniform(12, 32), 1), round(rng.uniform(0, 2), 1), rng.choice(producer_ids),
+            rng.randint(0, 5), rng.choice([None, round(rng.uniform(2.5, 5), 1)]), rng.randint(0, 2500),
+            rng.choice(['Yes', 'No']), rng.choice(COUNTRIES),
+            format_top_entries(effects), format_top_entries(complaints),
+            f"https://shop.dransay.com/product/bench/{product_id}"
+        ))
+        store_attributes(cursor, product_id, 'effects', effects)
+        store_attributes(cursor, product_id, 'complaints', complaints)
+        store_attributes(cursor, product_id, 'terpenes', _random_attributes(rng, TERPENES))
+        product_ids.append(product_id)
+    conn.commit()
+
+    # One price per product, category and day (random walk, occasional pharmacy change)
+    days = max(1, months * 30)
+    start = datetime.now().replace(hour=6, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    price_count = 0
+    for product_id in product_ids:
+        rows = []
+        for category in ('top', 'all'):
+            price = rng.uniform(5, 14)
+            pharmacy_id = rng.choice(pharmacy_ids)
+            for day in range(days):
+                price = min(25.0, max(3.0, price + rng.uniform(-0.25, 0.25)))
+                if rng.random() < 0.05:
+                    pharmacy_id = rng.choice(pharmacy_ids)
+                timestamp = int((start + timedelta(days=day, minutes=rng.randint(0, 120))).timestamp())
+                rows.append((product_id, pharmacy_id, round(price, 2), category, timestamp))
+        cursor.executemany("""
+            INSERT INTO prices (product_id, pharmacy_id, price_per_g, category, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        price_count += len(rows)
+    conn.commit()
+
+    # Analytics are refreshed by the writers, not by the price triggers
+    refresh_price_analytics(conn)
+
+    conn.execute("PRAGMA optimize")
+    conn.close()
+
+    return {
+        "products": products,
+        "pharmacies": pharmacies,
+        "producers": producers,
+        "prices": price_count,
+        "days": days,
+        "seconds": round(time.time() - started, 1)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a synthetic WeedDB database")
+    parser.add_argument('path', help='Database file to create')
+    parser.add_argument('--products', type=int, default=DEFAULT_PRODUCTS, help='Number of products')
+    parser.add_argument('--pharmacies', type=int, default=DEFAULT_PHARMACIES, help='Number of pharmacies')
+    parser.add_argument('--producers', type=int, default=DEFAULT_PRODUCERS, help='Number of producers')
+    parser.add_argument('--months', type=int, default=DEFAULT_MONTHS, help='Months of daily prices')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Random seed')
+    parser.add_argument('--force', action='store_true', help='Overwrite an existing file')
+    args = parser.parse_args()
+
+    db_path = Path(args.path)
+    if db_path.exists():
+        if not args.force:
+            print(f"❌ {db_path} exists, use --force to overwrite")
+            sys.exit(1)
+        for suffix in ('', '-wal', '-shm'):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+
+    print(f"🌱 Seeding {db_path} ({args.products} products, {args.months} months)...")
+    result = seed_database(db_path, args.products, args.pharmacies, args.producers, args.months, args.seed)
+    print(f"✅ {result['products']} products, {result['prices']:,} prices in {result['seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Serialization and compression benchmark for WeedDB API payloads.
+
+Compares how long it takes to turn typical large API responses into bytes
+and how many bytes go over the wire, for each available JSON serializer
+and compression method.
+
+Payloads:
+- products: shaped like /api/products?limit=500
+- price_history: shaped like /api/prices/history (5 series, 500 points)
+
+Payloads are built from the database when it has enough data, otherwise
+synthetic payloads of the same shape are used (--synthetic forces them).
+
+Features:
+- Serializers: FastAPI's default path (jsonable_encoder + json, if FastAPI
+  is installed), json (JSONResponse rendering), orjson (if installed)
+- Compression: gzip (level 6, as the API middleware), brotli (quality 4,
+  if installed)
+- Median time per operation and payload size in bytes
+
+Usage:
+    python3 benchmarks/serialization_benchmark.py
+    python3 benchmarks/serialization_benchmark.py --synthetic --repeat 50 --json
+"""
+
+import argparse
+import gzip
+import importlib
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+
+def _optional_module(name: str) -> Optional[ModuleType]:
+    """Import an optional dependency, None if it is not installed"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+orjson = _optional_module("orjson")
+brotli = _optional_module("brotli")
+fastapi_encoders = _optional_module("fastapi.encoders")
+
+# Constants
+PRODUCTS_LIMIT = 500
+HISTORY_SERIES = 5
+HISTORY_POINTS = 500
+DEFAULT_REPEAT = 20
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def _dumps_json(content: Any) -> bytes:
+    # Same settings as starlette's JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+SERIALIZERS: Dict[str, Callable[[Any], bytes]] = {"json": _dumps_json}
+if fastapi_encoders is not None:
+    jsonable_encoder = fastapi_encoders.jsonable_encoder
+    SERIALIZERS["fastapi_default"] = lambda content: _dumps_json(jsonable_encoder(content))
+if orjson is not None:
+    SERIALIZERS["orjson"] = orjson.dumps
+
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL)
+}
+if brotli is not None:
+    brotli_compress = brotli.compress
+    COMPRESSORS["brotli"] = lambda data: brotli_compress(data, quality=BROTLI_QUALITY)
+
+
+def synthetic_products(count: int = PRODUCTS_LIMIT) -> Dict[str, Any]:
+    """Build a /api/products-shaped payload"""
+    rng = random.Random(42)
+    genetics = ["Indica", "Sativa", "Hybrid", "Indica-dominant", "Sativa-dominant"]
+    producers = ["Aurora", "Tilray", "Bedrocan", "Four 20 Pharma", "Cantourage", "Demecan"]
+    products = [{
+        "id": 10000 + i,
+        "name": f"Strain {rng.choice(['Kush', 'Haze', 'Glue', 'Cake', 'Diesel'])} {i}",
+        "thc_percent": round(rng.uniform(15, 30), 1),
+        "cbd_percent": round(rng.uniform(0, 1), 1),
+        "genetics": rng.choice(genetics),
+        "producer": rng.choice(producers),
+        "rating": round(rng.uniform(2.5, 5), 1),
+        "review_count": rng.randint(0, 2000)
+    } for i in range(count)]
+    return _products_payload(products)
+
+
+def _products_payload(products: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "products": products,
+        "pagination": {"total": None, "limit": len(products), "offset": 0,
+                       "has_more": True, "next_cursor": "eyJrIjogWyJuYW1lIiwgImFzYyJdfQ"},
+        "filters": {"search": None, "genetics": None, "producer": None, "min_rating": None,
+                    "effect": None, "complaint": None, "terpene": None, "min_strength": None},
+        "sorting": {"sort_by": "name", "sort_order": "asc"}
+    }
+
+
+def synthetic_history(series: int = HISTORY_SERIES, points: int = HISTORY_POINTS) -> Dict[str, Any]:
+    """Build a /api/prices/history-shaped payload"""
+    rng = random.Random(7)
+    start = int(time.time()) - 365 * 86400
+    step = 365 * 86400 // points
+    lines = []
+    for i in range(series):
+        price = rng.uniform(5, 12)
+        line = []
+        for j in range(points):
+            price = max(3.0, price + rng.uniform(-0.2, 0.2))
+            line.append((start + j * step, round(price, 2)))
+        lines.append({"product_id": 10000 + i, "category": "top" if i % 2 else "all", "points": line})
+    return {"series": lines, "method": "lttb", "points": points, "timestamp_unit": "epoch_seconds"}
+
+
+def database_payloads() -> Optional[Dict[str, Any]]:
+    """Build both payloads from the database, None if it has too little data"""
+    try:
+        from database import DATABASE_PATH, get_connection
+        from downsample import get_price_series
+    except ImportError:
+        return None
+    if not Path(DATABASE_PATH).exists():
+        return None
+
+    conn = get_connection(DATABASE_PATH)
+    try:
+        rows = conn.execute("""
+            SELECT p.id, p.name, p.thc_percent, p.cbd_percent, p.genetics, pr.name, p.rating, p.review_count
+            FROM products p LEFT JOIN producers pr ON p.producer_id = pr.id
+            ORDER BY p.name, p.id LIMIT ?
+        """, (PRODUCTS_LIMIT,)).fetchall()
+        top_ids = [row[0] for row in conn.execute(
+            "SELECT product_id FROM prices GROUP BY product_id ORDER BY COUNT(*) DESC LIMIT ?",
+            (HISTORY_SERIES,)
+        )]
+        series = get_price_series(conn, top_ids, start="2000-01-01", points=HISTORY_POINTS)
+    finally:
+        conn.close()
+
+    if len(rows) < PRODUCTS_LIMIT // 2 or not series:
+        return None
+
+    keys = ("id", "name", "thc_percent", "cbd_percent", "genetics", "producer", "rating", "review_count")
+    return {
+        "products": _products_payload([dict(zip(keys, row)) for row in rows]),
+        "price_history": {
+            "series": [{"product_id": product_id, "category": category, "points": line}
+                       for (product_id, category), line in sorted(series.items())],
+            "method": "lttb", "points": HISTORY_POINTS, "timestamp_unit": "epoch_seconds"
+        }
+    }
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> float:
+    """Median milliseconds per call"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1000, 3)
+
+
+def benchmark_payload(content: Any, repeat: int) -> Dict[str, Any]:
+    """Time every serializer and compressor on one payload"""
+    results: Dict[str, Any] = {"serializers": {}, "compression": {}}
+    for name, serialize in SERIALIZERS.items():
+        results["serializers"][name] = {
+            "ms": time_call(lambda: serialize(content), repeat),
+            "bytes": len(serialize(content))
+        }
+
+    body = _dumps_json(content)
+    results["compression"]["identity"] = {"ms": 0.0, "bytes": len(body)}
+    for name, compress in COMPRESSORS.items():
+        results["compression"][name] = {
+            "ms": time_call(lambda: compress(body), repeat),
+            "bytes": len(compress(body))
+        }
+    return results
+
+
+def print_report(source: str, results: Dict[str, Dict[str, Any]]) -> None:
+    print("📦 WeedDB Serialization Benchmark")
+    print("=" * 60)
+    print(f"📥 Payloads: {source}")
+    missing = [name for name, module in (("orjson", orjson), ("brotli", brotli), ("fastapi", fastapi_encoders))
+               if module is None]
+    if missing:
+        print(f"⚠️  Not installed (skipped): {', '.join(missing)}")
+
+    for payload, result in results.items():
+        print(f"\n📊 {payload}")
+        for name, entry in result["serializers"].items():
+            print(f"   serialize {name:<16} {entry['ms']:>9.3f} ms  {entry['bytes']:>9,} bytes")
+        identity = result["compression"]["identity"]["bytes"]
+        for name, entry in result["compression"].items():
+            ratio = entry["bytes"] / identity * 100 if identity else 0
+            print(f"   compress  {name:<16} {entry['ms']:>9.3f} ms  {entry['bytes']:>9,} bytes ({ratio:.0f}%)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare JSON serializers and compression for API payloads")
+    parser.add_argument('--synthetic', action='store_true', help='Use synthetic payloads instead of the database')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Runs per measurement')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    payloads = None if args.synthetic else database_payloads()
+    source = "database"
+    if payloads is None:
+        payloads = {"products": synthetic_products(), "price_history": synthetic_history()}
+        source = "synthetic"
+
+    repeat = max(1, args.repeat)
+    results = {name: benchmark_payload(content, repeat) for name, content in payloads.items()}
+
+    if args.json:
+        print(json.dumps({"source": source, "results": results}, indent=2))
+    else:
+        print_report(source, results)
+
+
+if __name__ == '__main__':
+    main()
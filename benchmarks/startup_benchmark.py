@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the WeedDB web app and CLI scripts.
+
+Measures how long a fresh interpreter needs to import each entry point and
+profiles the imports with `python -X importtime`, so heavy modules that are
+loaded at import time (Playwright, pandas, plotly, matplotlib) show up
+before they slow down uvicorn worker boots or DB-only scripts.
+
+Features:
+- Wall time per target (median/min over several fresh interpreters)
+- Import profile: slowest modules by cumulative import time
+- Heavy-module check: lists which known heavy packages a target loads
+- JSON output for comparing runs
+
+Usage:
+    python3 benchmarks/startup_benchmark.py
+    python3 benchmarks/startup_benchmark.py --target generate_overview --target web.app --top 15
+    python3 benchmarks/startup_benchmark.py --repeat 10 --json > startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+
+# target → (module to import, directory put on sys.path)
+TARGETS: Dict[str, Tuple[str, Path]] = {
+    "web.app": ("web.app", PROJECT_ROOT),
+    "generate_overview": ("generate_overview", SCRIPTS_DIR),
+    "database": ("database", SCRIPTS_DIR),
+    "price_analytics": ("price_analytics", SCRIPTS_DIR),
+    "update_prices": ("update_prices", SCRIPTS_DIR),
+    "add_product": ("add_product", SCRIPTS_DIR),
+    "find_new_products": ("find_new_products", SCRIPTS_DIR),
+    "fix_producers": ("fix_producers", SCRIPTS_DIR),
+    "scheduler": ("scheduler", SCRIPTS_DIR),
+}
+
+# Packages that must only be imported on the code paths that need them
+HEAVY_MODULES = ("playwright", "pandas", "plotly", "matplotlib", "numpy")
+
+DEFAULT_REPEAT = 5
+DEFAULT_TOP = 10
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse `-X importtime` output into [{'module', 'self_us', 'cumulative_us'}]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        entries.append({
+            "module": parts[2].strip(),
+            "depth": (len(parts[2]) - len(parts[2].lstrip())) // 2,
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+    return entries
+
+
+def run_target(module: str, path: Path, importtime: bool = False) -> Tuple[float, str, int]:
+    """Import module in a fresh interpreter, returns (seconds, stderr, returncode)"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", f"import {module}"]
+
+    env = dict(os.environ, PYTHONPATH=str(path), PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=path, env=env, capture_output=True, text=True)
+    return time.perf_counter() - start, result.stderr, result.returncode
+
+
+def benchmark_target(name: str, repeat: int, top: int) -> Dict[str, Any]:
+    """Benchmark one target: wall times plus one import profile"""
+    module, path = TARGETS[name]
+
+    # Warm-up run also compiles bytecode caches, so later runs measure imports only
+    _, stderr, returncode = run_target(module, path)
+    if returncode != 0:
+        error = stderr.strip().splitlines()[-1] if stderr.strip() else f"exit code {returncode}"
+        return {"target": name, "error": error}
+
+    times = [run_target(module, path)[0] for _ in range(repeat)]
+
+    _, stderr, _ = run_target(module, path, importtime=True)
+    entries = parse_importtime(stderr)
+    loaded = {entry["module"].split(".")[0] for entry in entries}
+    slowest = sorted(entries, key=lambda entry: entry["cumulative_us"], reverse=True)[:top]
+
+    return {
+        "target": name,
+        "median_ms": round(statistics.median(times) * 1000, 1),
+        "min_ms": round(min(times) * 1000, 1),
+        "import_ms": round(sum(e["cumulative_us"] for e in entries if e["depth"] == 0) / 1000, 1),
+        "modules": len(entries),
+        "heavy_modules": sorted(loaded.intersection(HEAVY_MODULES)),
+        "slowest_imports": [
+            {"module": e["module"], "cumulative_ms": round(e["cumulative_us"] / 1000, 1)} for e in slowest
+        ],
+    }
+
+
+def baseline_ms(repeat: int) -> float:
+    """Median startup time of a bare interpreter (subtract to get import cost)"""
+    times = [run_target("sys", PROJECT_ROOT)[0] for _ in range(repeat)]
+    return round(statistics.median(times) * 1000, 1)
+
+
+def print_report(baseline: float, results: List[Dict[str, Any]], top: int) -> None:
+    print("🚀 WeedDB Startup Benchmark")
+    print("=" * 60)
+    print(f"🐍 Bare interpreter: {baseline} ms\n")
+
+    for result in results:
+        if "error" in result:
+            print(f"❌ {result['target']}: {result['error']}\n")
+            continue
+
+        heavy = ", ".join(result["heavy_modules"]) or "none"
+        print(f"📦 {result['target']}: {result['median_ms']} ms median "
+              f"(min {result['min_ms']} ms, imports {result['import_ms']} ms, {result['modules']} modules)")
+        print(f"   Heavy modules: {heavy}")
+        if top:
+            for entry in result["slowest_imports"]:
+                print(f"   {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+        print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure import/startup time of WeedDB entry points")
+    parser.add_argument('--target', action='append', choices=sorted(TARGETS),
+                        help='Target to benchmark (repeatable, default: all)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Runs per target')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='Slowest imports to show per target')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    repeat = max(1, args.repeat)
+    baseline = baseline_ms(repeat)
+    results = [benchmark_target(name, repeat, args.top) for name in (args.target or TARGETS)]
+
+    if args.json:
+        print(json.dumps({"baseline_ms": baseline, "results": results}, indent=2))
+    else:
+        print_report(baseline, results, args.top)
+
+
+if __name__ == '__main__':
+    main()
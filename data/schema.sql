@@ -41,6 +41,7 @@ CREATE TABLE IF NOT EXISTS product_terpenes (
     product_id INTEGER NOT NULL,
     terpene_id INTEGER NOT NULL,
     percentage REAL,
+    strength INTEGER CHECK(strength BETWEEN 0 AND 4),  -- x/4 Bewertung von der Produktseite
     PRIMARY KEY (product_id, terpene_id),
     FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
     FOREIGN KEY (terpene_id) REFERENCES terpenes(id)
@@ -92,19 +93,321 @@ CREATE TABLE IF NOT EXISTS prices (
     pharmacy_id INTEGER NOT NULL,
     price_per_g REAL NOT NULL,
     category TEXT NOT NULL CHECK(category IN ('top', 'all')),
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    timestamp INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),  -- Unix-Epoch (Sekunden)
+    last_seen INTEGER,  -- Epoch, nur im Change-Only-Modus: letzter Scrape mit identischem Preis/Apotheke
     FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
     FOREIGN KEY (pharmacy_id) REFERENCES pharmacies(id)
 );
 
+-- Tägliche Preis-Rollups (OHLC) pro Produkt, Kategorie und Apotheke
+-- Wird per Trigger bei jedem INSERT in prices fortgeschrieben, wächst also mit
+-- der Anzahl Tage statt mit der Anzahl Scrapes. Alle historischen Auswertungen
+-- (Export, Charts, Archivierung) lesen aus dieser Tabelle.
+CREATE TABLE IF NOT EXISTS price_daily (
+    product_id INTEGER NOT NULL,
+    category TEXT NOT NULL CHECK(category IN ('top', 'all')),
+    pharmacy_id INTEGER NOT NULL,
+    day TEXT NOT NULL,  -- YYYY-MM-DD
+    open_price REAL NOT NULL,
+    high_price REAL NOT NULL,
+    low_price REAL NOT NULL,  -- Tagesminimum
+    close_price REAL NOT NULL,
+    avg_price REAL NOT NULL,
+    sample_count INTEGER NOT NULL DEFAULT 1,
+    first_seen INTEGER NOT NULL,  -- Epoch
+    last_seen INTEGER NOT NULL,  -- Epoch
+    PRIMARY KEY (product_id, category, pharmacy_id, day),
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+    FOREIGN KEY (pharmacy_id) REFERENCES pharmacies(id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_price_daily_day ON price_daily(day);
+
+-- Trigger: Rollup inkrementell aktualisieren (auch bei nachträglich importierten,
+-- zeitlich älteren Preisen bleiben open/close korrekt)
+CREATE TRIGGER IF NOT EXISTS trg_prices_daily_rollup
+AFTER INSERT ON prices
+BEGIN
+    INSERT INTO price_daily (
+        product_id, category, pharmacy_id, day,
+        open_price, high_price, low_price, close_price, avg_price,
+        sample_count, first_seen, last_seen
+    )
+    VALUES (
+        NEW.product_id, NEW.category, NEW.pharmacy_id, DATE(NEW.timestamp, 'unixepoch', 'localtime'),
+        NEW.price_per_g, NEW.price_per_g, NEW.price_per_g, NEW.price_per_g, NEW.price_per_g,
+        1, NEW.timestamp, NEW.timestamp
+    )
+    ON CONFLICT(product_id, category, pharmacy_id, day) DO UPDATE SET
+        open_price = CASE WHEN excluded.first_seen < first_seen THEN excluded.open_price ELSE open_price END,
+        close_price = CASE WHEN excluded.last_seen >= last_seen THEN excluded.close_price ELSE close_price END,
+        high_price = MAX(high_price, excluded.high_price),
+        low_price = MIN(low_price, excluded.low_price),
+        avg_price = (avg_price * sample_count + excluded.avg_price) / (sample_count + 1),
+        sample_count = sample_count + 1,
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen);
+END;
+
+-- Trigger: Heartbeats im Change-Only-Modus (UPDATE von last_seen) zählen als
+-- Preispunkt des jeweiligen Tages
+CREATE TRIGGER IF NOT EXISTS trg_prices_daily_heartbeat
+AFTER UPDATE OF last_seen ON prices
+WHEN NEW.last_seen IS NOT NULL
+BEGIN
+    INSERT INTO price_daily (
+        product_id, category, pharmacy_id, day,
+        open_price, high_price, low_price, close_price, avg_price,
+        sample_count, first_seen, last_seen
+    )
+    VALUES (
+        NEW.product_id, NEW.category, NEW.pharmacy_id, DATE(NEW.last_seen, 'unixepoch', 'localtime'),
+        NEW.price_per_g, NEW.price_per_g, NEW.price_per_g, NEW.price_per_g, NEW.price_per_g,
+        1, NEW.last_seen, NEW.last_seen
+    )
+    ON CONFLICT(product_id, category, pharmacy_id, day) DO UPDATE SET
+        open_price = CASE WHEN excluded.first_seen < first_seen THEN excluded.open_price ELSE open_price END,
+        close_price = CASE WHEN excluded.last_seen >= last_seen THEN excluded.close_price ELSE close_price END,
+        high_price = MAX(high_price, excluded.high_price),
+        low_price = MIN(low_price, excluded.low_price),
+        avg_price = (avg_price * sample_count + excluded.avg_price) / (sample_count + 1),
+        sample_count = sample_count + 1,
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen);
+END;
+
+-- Aktueller Preis pro Produkt und Kategorie (per Trigger gepflegt)
+-- Ersetzt MAX(timestamp)-Subqueries für Auswertungen über den ganzen Katalog
+CREATE TABLE IF NOT EXISTS latest_prices (
+    product_id INTEGER NOT NULL,
+    category TEXT NOT NULL CHECK(category IN ('top', 'all')),
+    pharmacy_id INTEGER NOT NULL,
+    price_per_g REAL NOT NULL,
+    timestamp INTEGER NOT NULL,  -- Epoch des Preises (prices.timestamp)
+    PRIMARY KEY (product_id, category),
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+    FOREIGN KEY (pharmacy_id) REFERENCES pharmacies(id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_latest_prices_category_price ON latest_prices(category, price_per_g);
+
+CREATE TRIGGER IF NOT EXISTS trg_prices_latest_insert
+AFTER INSERT ON prices
+BEGIN
+    INSERT INTO latest_prices (product_id, category, pharmacy_id, price_per_g, timestamp)
+    VALUES (NEW.product_id, NEW.category, NEW.pharmacy_id, NEW.price_per_g, NEW.timestamp)
+    ON CONFLICT(product_id, category) DO UPDATE SET
+        pharmacy_id = excluded.pharmacy_id,
+        price_per_g = excluded.price_per_g,
+        timestamp = excluded.timestamp
+    WHERE excluded.timestamp >= latest_prices.timestamp;
+END;
+
+-- Wird der aktuelle Preis gelöscht, rückt der nächstjüngere nach
+CREATE TRIGGER IF NOT EXISTS trg_prices_latest_delete
+AFTER DELETE ON prices
+WHEN EXISTS (
+    SELECT 1 FROM latest_prices
+    WHERE product_id = OLD.product_id AND category = OLD.category AND timestamp = OLD.timestamp
+)
+BEGIN
+    DELETE FROM latest_prices WHERE product_id = OLD.product_id AND category = OLD.category;
+    INSERT INTO latest_prices (product_id, category, pharmacy_id, price_per_g, timestamp)
+    SELECT product_id, category, pharmacy_id, price_per_g, timestamp
+    FROM prices
+    WHERE product_id = OLD.product_id AND category = OLD.category
+    ORDER BY timestamp DESC, id DESC
+    LIMIT 1;
+END;
+
+-- Vorberechnete Preis-Analytics (eine Zeile pro Kategorie + '*' gesamt)
+-- Neu berechnet nach Batch-Schreibvorgängen (scripts/price_analytics.py)
+CREATE TABLE IF NOT EXISTS price_analytics (
+    category TEXT PRIMARY KEY,
+    product_count INTEGER NOT NULL,
+    avg_price REAL,
+    min_price REAL,
+    max_price REAL,
+    cheapest TEXT,  -- JSON: [[name, price, pharmacy], ...]
+    most_expensive TEXT,  -- JSON: [[name, price, pharmacy], ...]
+    generation INTEGER NOT NULL,  -- data_generation zum Zeitpunkt der Berechnung
+    updated_at INTEGER NOT NULL  -- Epoch
+);
+
+-- Volltextsuche über Produkte (FTS5)
+-- rowid = products.id; Präfix-Indizes (2/3 Zeichen) für Autocomplete,
+-- unicode61 mit remove_diacritics 2: "creme" findet auch "Crème".
+-- Wird per Trigger synchron gehalten (auch bei Umbenennung eines Herstellers).
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name,
+    variant,
+    producer,
+    effects,
+    complaints,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- OR REPLACE: INSERT OR REPLACE auf products löst keinen DELETE-Trigger aus
+CREATE TRIGGER IF NOT EXISTS trg_products_fts_insert
+AFTER INSERT ON products
+BEGIN
+    INSERT OR REPLACE INTO products_fts (rowid, name, variant, producer, effects, complaints)
+    VALUES (
+        NEW.id, NEW.name, NEW.variant,
+        (SELECT name FROM producers WHERE id = NEW.producer_id),
+        NEW.effects, NEW.complaints
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_fts_update
+AFTER UPDATE OF id, name, variant, producer_id, effects, complaints ON products
+BEGIN
+    DELETE FROM products_fts WHERE rowid = OLD.id;
+    INSERT OR REPLACE INTO products_fts (rowid, name, variant, producer, effects, complaints)
+    VALUES (
+        NEW.id, NEW.name, NEW.variant,
+        (SELECT name FROM producers WHERE id = NEW.producer_id),
+        NEW.effects, NEW.complaints
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_fts_delete
+AFTER DELETE ON products
+BEGIN
+    DELETE FROM products_fts WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_producers_fts_rename
+AFTER UPDATE OF name ON producers
+BEGIN
+    UPDATE products_fts SET producer = NEW.name
+    WHERE rowid IN (SELECT id FROM products WHERE producer_id = NEW.id);
+END;
+
+-- Daten-Generation: globaler Zähler, der bei jeder Änderung an Produkten,
+-- Herstellern, Apotheken und Preisen hochgezählt wird. Die Web-API leitet
+-- daraus ETags ab (gleich über alle Worker-Prozesse hinweg).
+CREATE TABLE IF NOT EXISTS data_generation (
+    id INTEGER PRIMARY KEY CHECK(id = 1),
+    generation INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_products_generation_insert
+AFTER INSERT ON products
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_generation_update
+AFTER UPDATE ON products
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_generation_delete
+AFTER DELETE ON products
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_producers_generation_insert
+AFTER INSERT ON producers
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_producers_generation_update
+AFTER UPDATE ON producers
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_producers_generation_delete
+AFTER DELETE ON producers
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pharmacies_generation_insert
+AFTER INSERT ON pharmacies
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pharmacies_generation_update
+AFTER UPDATE ON pharmacies
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pharmacies_generation_delete
+AFTER DELETE ON pharmacies
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_prices_generation_insert
+AFTER INSERT ON prices
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_prices_generation_update
+AFTER UPDATE ON prices
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_prices_generation_delete
+AFTER DELETE ON prices
+BEGIN
+    UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
 -- Indices für Performance bei häufigen Queries
 CREATE INDEX IF NOT EXISTS idx_products_genetics ON products(genetics);
 CREATE INDEX IF NOT EXISTS idx_products_thc ON products(thc_percent);
 CREATE INDEX IF NOT EXISTS idx_products_rating ON products(rating);
+-- Keyset-Pagination /api/products: Sortierschlüssel + id als Tie-Breaker (NULL → -1)
+CREATE INDEX IF NOT EXISTS idx_products_name_id ON products(name, id);
+CREATE INDEX IF NOT EXISTS idx_products_rating_id ON products(COALESCE(rating, -1), id);
+CREATE INDEX IF NOT EXISTS idx_products_thc_id ON products(COALESCE(thc_percent, -1), id);
+CREATE INDEX IF NOT EXISTS idx_products_review_count_id ON products(COALESCE(review_count, -1), id);
+-- Filter nach Effekt/Beschwerde/Terpen (+ Mindeststärke) über die Junction-Tabellen
+CREATE INDEX IF NOT EXISTS idx_product_effects_effect ON product_effects(effect_id, strength, product_id);
+CREATE INDEX IF NOT EXISTS idx_product_therapeutic_uses_use ON product_therapeutic_uses(therapeutic_use_id, strength, product_id);
+CREATE INDEX IF NOT EXISTS idx_product_terpenes_terpene ON product_terpenes(terpene_id, strength, product_id);
 CREATE INDEX IF NOT EXISTS idx_prices_timestamp ON prices(timestamp);
 CREATE INDEX IF NOT EXISTS idx_prices_product ON prices(product_id);
 CREATE INDEX IF NOT EXISTS idx_prices_pharmacy ON prices(pharmacy_id);
 CREATE INDEX IF NOT EXISTS idx_prices_category ON prices(category);
+CREATE INDEX IF NOT EXISTS idx_prices_product_category_ts ON prices(product_id, category, timestamp);
+-- Zusammen mit idx_prices_timestamp: Multi-Index-OR für "zuletzt gesehen"-Filter
+CREATE INDEX IF NOT EXISTS idx_prices_last_seen ON prices(last_seen);
+
+-- View: Preise als Tagespunkte (Kompatibilität zum Change-Only-Modus)
+-- Expandiert jede Preis-Periode (timestamp bis last_seen) wieder in einen Punkt
+-- pro Tag. Im Append-Modus (last_seen NULL) entspricht jede Zeile genau einem Punkt.
+-- timestamp wird wie früher als lokaler Text 'YYYY-MM-DD HH:MM:SS' ausgegeben.
+CREATE VIEW IF NOT EXISTS price_points AS
+WITH RECURSIVE points(id, product_id, pharmacy_id, price_per_g, category, ts, run_end) AS (
+    SELECT id, product_id, pharmacy_id, price_per_g, category, timestamp, COALESCE(last_seen, timestamp)
+    FROM prices
+    UNION ALL
+    SELECT id, product_id, pharmacy_id, price_per_g, category,
+           CASE WHEN ts + 86400 >= run_end
+                  OR DATE(ts + 86400, 'unixepoch', 'localtime') = DATE(run_end, 'unixepoch', 'localtime')
+                THEN run_end ELSE ts + 86400 END,
+           run_end
+    FROM points
+    WHERE ts < run_end
+)
+SELECT id, product_id, pharmacy_id, price_per_g, category,
+       datetime(ts, 'unixepoch', 'localtime') AS timestamp
+FROM points;
 
 -- View: Aktuellste Preise pro Produkt und Apotheke
 CREATE VIEW IF NOT EXISTS current_prices AS
@@ -113,7 +416,7 @@ SELECT
     p1.pharmacy_id,
     p1.price_per_g,
     p1.category,
-    p1.timestamp
+    datetime(p1.timestamp, 'unixepoch', 'localtime') AS timestamp
 FROM prices p1
 INNER JOIN (
     SELECT product_id, pharmacy_id, category, MAX(timestamp) as max_timestamp
@@ -151,12 +454,13 @@ SELECT
     ph.id as pharmacy_id,
     ph.name as pharmacy_name,
     pr.price_per_g,
-    pr.timestamp,
+    datetime(COALESCE(pr.last_seen, pr.timestamp), 'unixepoch', 'localtime') as timestamp,
     RANK() OVER (PARTITION BY p.id ORDER BY pr.price_per_g ASC) as price_rank
 FROM products p
 JOIN prices pr ON p.id = pr.product_id
 JOIN pharmacies ph ON pr.pharmacy_id = ph.id
-WHERE pr.timestamp >= datetime('now', '-7 days');
+WHERE (pr.timestamp >= CAST(strftime('%s', 'now', '-7 days') AS INTEGER)
+       OR pr.last_seen >= CAST(strftime('%s', 'now', '-7 days') AS INTEGER));
 
 -- View: Preisspanne pro Produkt (min, max, avg, Anzahl Apotheken)
 -- Zeigt Preisstatistiken für umfassenden Preisvergleich
@@ -171,11 +475,12 @@ SELECT
     MAX(pr.price_per_g) as max_price,
     ROUND(AVG(pr.price_per_g), 2) as avg_price,
     ROUND(MAX(pr.price_per_g) - MIN(pr.price_per_g), 2) as price_spread,
-    MAX(pr.timestamp) as last_updated
+    datetime(MAX(COALESCE(pr.last_seen, pr.timestamp)), 'unixepoch', 'localtime') as last_updated
 FROM products p
 JOIN prices pr ON p.id = pr.product_id
 JOIN pharmacies ph ON pr.pharmacy_id = ph.id
-WHERE pr.timestamp >= datetime('now', '-7 days')
+WHERE (pr.timestamp >= CAST(strftime('%s', 'now', '-7 days') AS INTEGER)
+       OR pr.last_seen >= CAST(strftime('%s', 'now', '-7 days') AS INTEGER))
 GROUP BY p.id;
 
 -- View: Apotheken-Ranking (günstigste Apotheken insgesamt)
@@ -198,8 +503,10 @@ LEFT JOIN (
         pr.product_id,
         RANK() OVER (PARTITION BY pr.product_id ORDER BY pr.price_per_g ASC) as price_rank
     FROM prices pr
-    WHERE pr.timestamp >= datetime('now', '-7 days')
+    WHERE (pr.timestamp >= CAST(strftime('%s', 'now', '-7 days') AS INTEGER)
+           OR pr.last_seen >= CAST(strftime('%s', 'now', '-7 days') AS INTEGER))
 ) rank_table ON ph.id = rank_table.pharmacy_id
-WHERE pr.timestamp >= datetime('now', '-7 days')
+WHERE (pr.timestamp >= CAST(strftime('%s', 'now', '-7 days') AS INTEGER)
+       OR pr.last_seen >= CAST(strftime('%s', 'now', '-7 days') AS INTEGER))
 GROUP BY ph.id
 ORDER BY times_cheapest DESC, avg_price_per_g ASC;
@@ -20,9 +20,16 @@ import re
 import sqlite3
 import os
 import asyncio
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout, Page, Locator
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, Locator
+
+from database import get_connection
+from price_analytics import refresh_price_analytics
+from price_store import record_price
+from product_store import (RESULT_CHANGED, SECTION_HEADINGS, format_top_entries, parse_rated_section,
+                           store_attributes, upsert_product)
 
 BASE_URL = "https://shop.dransay.com"
 
@@ -36,7 +43,7 @@ def construct_search_url(product_name: str, vendor_id: str) -> str:
     encoded_product_name = product_name.replace(' ', '%20')
     return f"{BASE_URL}/products?vendorId={vendor_id}&deliveryMethod=shipping&filters=%7B%22topProducersLowPrice%22:false%7D&search={encoded_product_name}"
 
-async def _scrape_product_details_from_card(page: Page, product_card_locator: Locator, product_link_locator: Optional[Locator] = None) -> Dict[str, Any]:
+async def _scrape_product_details_from_card(page: 'Page', product_card_locator: 'Locator', product_link_locator: Optional['Locator'] = None) -> Dict[str, Any]:
     """Extracts product details from a given product link by parsing text content"""
     product_data: Dict[str, Any] = {}
 
@@ -141,7 +148,7 @@ async def _scrape_product_details_from_card(page: Page, product_card_locator: Lo
 
     return product_data
 
-async def _scrape_cheapest_price_from_search_page(page: Page, product_name: str, vendor_id: str) -> Optional[Dict[str, Any]]:
+async def _scrape_cheapest_price_from_search_page(page: 'Page', product_name: str, vendor_id: str) -> Optional[Dict[str, Any]]:
     """
     Finds the product URL from search, then navigates to product page with vendorId
     to extract the cheapest pharmacy and price for that category.
@@ -358,34 +365,24 @@ async def _scrape_cheapest_price_from_search_page(page: Page, product_name: str,
         except Exception as e:
             print(f"   ⚠ Could not extract irradiation: {e}")
 
-        # Extract effects and complaints from structured sections
-        try:
-            if body_text:
-                # Effects section
-                effects_start = body_text.find('Effects')
-                if effects_start != -1:
-                    effects_section = body_text[effects_start:effects_start+500]
-                    # Extract main effects (those with ratings like 4/4)
-                    effect_matches = re.findall(r'([^\n]+)\s+\d+/\d+', effects_section)
-                    if effect_matches:
-                        product_details['effects'] = ', '.join([e.strip() for e in effect_matches[:3]])  # Take first 3
-                        print(f"   ✅ Found effects: {product_details['effects']}")
-        except Exception as e:
-            print(f"   ⚠ Could not extract effects: {e}")
+        # Extract full rated lists (x/4) of effects, complaints and terpenes
+        for kind, heading in SECTION_HEADINGS.items():
+            try:
+                if body_text:
+                    entries = parse_rated_section(body_text, heading)
+                    if entries:
+                        product_details[f'{kind}_ratings'] = entries
+                        print(f"   ✅ Found {len(entries)} {kind}: "
+                              f"{', '.join(f'{name} {strength}/4' for name, strength in entries)}")
+            except Exception as e:
+                print(f"   ⚠ Could not extract {kind}: {e}")
 
-        try:
-            if body_text:
-                # Complaints section
-                complaints_start = body_text.find('Complaints')
-                if complaints_start != -1:
-                    complaints_section = body_text[complaints_start:complaints_start+500]
-                    # Extract main complaints
-                    complaint_matches = re.findall(r'([^\n]+)\s+\d+/\d+', complaints_section)
-                    if complaint_matches:
-                        product_details['complaints'] = ', '.join([c.strip() for c in complaint_matches[:3]])  # Take first 3
-                        print(f"   ✅ Found complaints: {product_details['complaints']}")
-        except Exception as e:
-            print(f"   ⚠ Could not extract complaints: {e}")
+        # Text columns keep the strongest three for display (only set when found,
+        # so the 'all' page can still fill them in)
+        for kind in ('effects', 'complaints'):
+            top_entries = format_top_entries(product_details.get(f'{kind}_ratings', []))
+            if top_entries:
+                product_details[kind] = top_entries
 
         # Set defaults for stock (not available on dransay.com)
         product_details['stock_level'] = None
@@ -534,6 +531,9 @@ async def scrape_product_data(product_name: str) -> Optional[Dict[str, Any]]:
     """
     Scrapes product data and the cheapest prices for 'top' and 'all' categories.
     """
+    # Imported here so DB-only code paths start without loading Playwright
+    from playwright.async_api import async_playwright
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page()
@@ -592,7 +592,7 @@ def insert_product_to_db(product_data: Optional[Dict[str, Any]]) -> bool:
         print("❌ No product data to insert")
         return False
 
-    conn = sqlite3.connect(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'WeedDB.db'))
+    conn = get_connection(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'WeedDB.db'))
     cursor = conn.cursor()
 
     try:
@@ -615,29 +615,32 @@ def insert_product_to_db(product_data: Optional[Dict[str, Any]]) -> bool:
             result = cursor.fetchone()
             producer_id = result[0] if result else None
 
-        # Insert product (using INSERT OR REPLACE to update if exists)
-        cursor.execute("""
-            INSERT OR REPLACE INTO products
-            (id, name, variant, genetics, thc_percent, cbd_percent, producer_id,
-             rating, review_count, irradiation, country, effects, complaints, url, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            product_data['id'],
-            product_data['name'],
-            product_data.get('variant'),
-            product_data.get('genetics'),
-            product_data.get('thc_percent'),
-            product_data.get('cbd_percent'),
-            producer_id,
-            product_data.get('rating'),
-            product_data.get('review_count'),
-            product_data.get('irradiation'),
-            product_data.get('country'),
-            product_data.get('effects'),
-            product_data.get('complaints'),
-            product_data['url'],
-            datetime.now()
-        ))
+        # Upsert product, only changed columns are written
+        status, changed_columns = upsert_product(cursor, product_data['id'], {
+            'name': product_data['name'],
+            'variant': product_data.get('variant'),
+            'genetics': product_data.get('genetics'),
+            'thc_percent': product_data.get('thc_percent'),
+            'cbd_percent': product_data.get('cbd_percent'),
+            'producer_id': producer_id,
+            'rating': product_data.get('rating'),
+            'review_count': product_data.get('review_count'),
+            'irradiation': product_data.get('irradiation'),
+            'country': product_data.get('country'),
+            'effects': product_data.get('effects'),
+            'complaints': product_data.get('complaints'),
+            'url': product_data['url'],
+        })
+        if status == RESULT_CHANGED:
+            print(f"📝 Product status: {status} ({', '.join(changed_columns)})")
+        else:
+            print(f"📝 Product status: {status}")
+
+        # Normalized attributes (only replaced when the page listed them)
+        for kind in SECTION_HEADINGS:
+            entries = product_data.get(f'{kind}_ratings')
+            if entries:
+                store_attributes(cursor, product_data['id'], kind, entries)
 
         # Insert cheapest 'top' pharmacy price
         if product_data.get('cheapest_top_price_per_g'):
@@ -650,10 +653,7 @@ def insert_product_to_db(product_data: Optional[Dict[str, Any]]) -> bool:
             pharmacy_result = cursor.fetchone()
             if pharmacy_result:
                 pharmacy_id = pharmacy_result[0]
-                cursor.execute("""
-                    INSERT INTO prices (product_id, pharmacy_id, price_per_g, category, timestamp)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (product_data['id'], pharmacy_id, price_per_g, category, datetime.now()))
+                record_price(cursor, product_data['id'], pharmacy_id, price_per_g, category)
 
         # Insert cheapest 'all' pharmacy price
         if product_data.get('cheapest_all_price_per_g'):
@@ -666,12 +666,12 @@ def insert_product_to_db(product_data: Optional[Dict[str, Any]]) -> bool:
             pharmacy_result = cursor.fetchone()
             if pharmacy_result:
                 pharmacy_id = pharmacy_result[0]
-                cursor.execute("""
-                    INSERT INTO prices (product_id, pharmacy_id, price_per_g, category, timestamp)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (product_data['id'], pharmacy_id, price_per_g, category, datetime.now()))
+                record_price(cursor, product_data['id'], pharmacy_id, price_per_g, category)
 
         conn.commit()
+        # Keep /api/analytics/prices in step with the new prices (also for the batch
+        # scripts, which run this script per product)
+        refresh_price_analytics(conn)
         print(f"\n✅ Successfully added '{product_data['name']}' to database with cheapest prices.")
         return True
 
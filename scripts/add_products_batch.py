@@ -23,7 +23,9 @@ Example products.txt:
 
 import subprocess
 import sys
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
+from product_store import RESULT_CHANGED, RESULT_NEW, RESULT_UNCHANGED, parse_change_status
 
 def read_product_names(filename: str) -> List[str]:
     """Read product names from file, ignoring comments and empty lines"""
@@ -51,8 +53,8 @@ def read_product_names(filename: str) -> List[str]:
         print(f"❌ Error reading file: {e}")
         sys.exit(1)
 
-def add_product(product_name: str) -> bool:
-    """Add a single product by calling add_product.py"""
+def add_product(product_name: str) -> Tuple[bool, Optional[str]]:
+    """Add a single product by calling add_product.py, returns (success, change status)"""
     try:
         result = subprocess.run(
             ['python3', 'add_product.py', product_name],
@@ -66,18 +68,18 @@ def add_product(product_name: str) -> bool:
             print(result.stdout)
 
         if result.returncode == 0:
-            return True
+            return True, parse_change_status(result.stdout)
         else:
             if result.stderr:
                 print(f"Error: {result.stderr}")
-            return False
+            return False, None
 
     except subprocess.TimeoutExpired:
         print(f"⏱️ Timeout adding '{product_name}' (>2 minutes)")
-        return False
+        return False, None
     except Exception as e:
         print(f"❌ Error adding '{product_name}': {e}")
-        return False
+        return False, None
 
 def main() -> None:
     if len(sys.argv) < 2:
@@ -131,6 +133,7 @@ def main() -> None:
     # Add each product in very small batches to avoid timeouts
     success_count = 0
     failed_products = []
+    status_counts: Dict[str, int] = {RESULT_NEW: 0, RESULT_CHANGED: 0, RESULT_UNCHANGED: 0}
     batch_size = 1  # Process one by one to maximize reliability
 
     for i in range(0, total, batch_size):
@@ -143,8 +146,11 @@ def main() -> None:
             print(f"[{batch_index}/{total}] Adding: {product_name}")
             print(f"{'='*60}")
 
-            if add_product(product_name):
+            success, change_status = add_product(product_name)
+            if success:
                 success_count += 1
+                if change_status in status_counts:
+                    status_counts[change_status] += 1
                 print(f"✅ Successfully added '{product_name}'")
             else:
                 failed_products.append(product_name)
@@ -162,6 +168,8 @@ def main() -> None:
     print("="*60)
     print(f"✅ Successful: {success_count}/{total}")
     print(f"❌ Failed: {len(failed_products)}/{total}")
+    print(f"✨ New: {status_counts[RESULT_NEW]} | 📝 Changed: {status_counts[RESULT_CHANGED]} | "
+          f"⏸️  Unchanged: {status_counts[RESULT_UNCHANGED]}")
 
     if failed_products:
         print("\n❌ Failed products:")
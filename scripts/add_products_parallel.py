@@ -8,7 +8,8 @@ Features:
 - Parallel processing with semaphore-based rate limiting
 - Progress tracking with tqdm
 - Comprehensive error handling and retry logic
-- Detailed logging and reporting
+- Detailed logging and reporting (new/changed/unchanged products)
+- Live progress to the web dashboard (batched POSTs over one HTTP client)
 - Graceful shutdown on interruption
 
 Usage:
@@ -37,6 +38,8 @@ import subprocess
 import argparse
 from pathlib import Path
 
+from product_store import RESULT_CHANGED, RESULT_NEW, RESULT_UNCHANGED, parse_change_status
+
 try:
     from tqdm.asyncio import tqdm
 except ImportError:
@@ -64,6 +67,9 @@ except ImportError:
 # Constants
 DEFAULT_CONCURRENCY = 3
 DEFAULT_TIMEOUT = 120
+WEB_API_URL = os.environ.get('WEEDDB_WEB_API_URL', 'http://localhost:8000')
+STATUS_FLUSH_INTERVAL = 0.5  # seconds between batched status POSTs
+STATUS_MAX_BATCH = 25  # flush early once this many events are pending
 LOG_DIR = Path(__file__).parent.parent / "data" / "logs"
 
 @dataclass
@@ -74,6 +80,7 @@ class ProductResult:
     duration: float
     error_message: Optional[str] = None
     product_id: Optional[int] = None
+    change_status: Optional[str] = None  # new / changed / unchanged
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -88,6 +95,9 @@ class BatchResult:
     concurrency: int
     timestamp: str
     results: List[ProductResult]
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -95,6 +105,70 @@ class BatchResult:
             "results": [r.to_dict() for r in self.results]
         }
 
+class BatchStatusReporter:
+    """Sends status events to the web API in batches over one persistent client"""
+
+    def __init__(self, web_api_url: str = WEB_API_URL,
+                 flush_interval: float = STATUS_FLUSH_INTERVAL,
+                 max_batch: int = STATUS_MAX_BATCH):
+        self.url = f"{web_api_url}/api/batch/status"
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: List[Dict[str, Any]] = []
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._closed = False
+
+    async def start(self) -> None:
+        """Open the HTTP client and start the background flusher"""
+        if not WEB_API_AVAILABLE or not httpx:
+            return
+        self._client = httpx.AsyncClient(timeout=5.0)
+        self._task = asyncio.create_task(self._run())
+
+    def report(self, status_data: Dict[str, Any]) -> None:
+        """Queue a status event (non-blocking)"""
+        if self._client is None or self._closed:
+            return
+        self._pending.append(status_data)
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._pending or self._client is None:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            response = await self._client.post(self.url, json=batch)
+            if response.status_code == 200:
+                logger.debug(f"Sent {len(batch)} status update(s) to web API") if logger else None
+            else:
+                logger.warning(f"Failed to send status to web API: {response.status_code}") if logger else None
+        except Exception as e:
+            # Silently fail if web API is not available
+            logger.debug(f"Could not send status to web API: {e}") if logger else None
+
+    async def close(self) -> None:
+        """Send remaining events and close the client"""
+        self._closed = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+        await self._flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
 class ParallelBatchProcessor:
     """Handles parallel processing of product additions"""
 
@@ -103,6 +177,7 @@ class ParallelBatchProcessor:
         self.timeout = timeout
         self.semaphore = asyncio.Semaphore(concurrency)
         self.shutdown_event = asyncio.Event()
+        self.reporter = BatchStatusReporter()
 
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -155,6 +230,7 @@ class ParallelBatchProcessor:
 
                 # Try to extract product ID from stdout
                 product_id = None
+                change_status = None
                 if success and stdout:
                     output = stdout.decode()
                     # Look for "ID: <number>" pattern
@@ -162,23 +238,26 @@ class ParallelBatchProcessor:
                     match = re.search(r'ID:\s*(\d+)', output)
                     if match:
                         product_id = int(match.group(1))
+                    change_status = parse_change_status(output)
 
                 progress_bar.update(1)
                 progress_bar.set_description(f"Processing: {product_name[:20]}...")
 
-                # Send status update to web API
+                # Queue status update for the web API
                 status_data = {
+                    "type": "product",
                     "product_name": product_name,
                     "success": success,
                     "duration": duration,
                     "error_message": error_msg,
                     "product_id": product_id,
+                    "change_status": change_status,
                     "timestamp": datetime.now().isoformat()
                 }
-                asyncio.create_task(send_web_api_status(status_data))
+                self.reporter.report(status_data)
 
                 return ProductResult(
-                    product_name, success, duration, error_msg, product_id
+                    product_name, success, duration, error_msg, product_id, change_status
                 )
 
             except Exception as e:
@@ -200,43 +279,73 @@ class ParallelBatchProcessor:
         print(f"   📅 Started: {timestamp}")
         print()
 
-        # Create progress bar
-        with tqdm(total=len(product_names), desc="Processing products") as progress_bar:
-            # Create tasks for all products
-            tasks = [
-                self.process_product(name, progress_bar)
-                for name in product_names
-            ]
-
-            # Run all tasks concurrently
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Handle any exceptions that occurred
-        processed_results: List[ProductResult] = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed_results.append(ProductResult(
-                    product_names[i], False, 0.0,
-                    f"Task exception: {str(result)}"
-                ))
-            elif isinstance(result, ProductResult):
-                processed_results.append(result)
-            else:
-                # Fallback for unexpected types
-                processed_results.append(ProductResult(
-                    product_names[i], False, 0.0,
-                    f"Unexpected result type: {type(result)}"
-                ))
-
-        # Calculate summary
-        total_duration = time.time() - start_time
-        successful = sum(1 for r in processed_results if r.success)
-        failed = len(processed_results) - successful
-
-        batch_result = BatchResult(
-            len(product_names), successful, failed, total_duration,
-            self.concurrency, timestamp, processed_results
-        )
+        await self.reporter.start()
+        try:
+            self.reporter.report({
+                "type": "batch_started",
+                "total_products": len(product_names),
+                "concurrency": self.concurrency,
+                "timestamp": timestamp
+            })
+
+            # Create progress bar
+            with tqdm(total=len(product_names), desc="Processing products") as progress_bar:
+                # Create tasks for all products
+                tasks = [
+                    self.process_product(name, progress_bar)
+                    for name in product_names
+                ]
+
+                # Run all tasks concurrently
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Handle any exceptions that occurred
+            processed_results: List[ProductResult] = []
+            for i, result in enumerate(results):
+                if isinstance(result, Exception):
+                    processed_results.append(ProductResult(
+                        product_names[i], False, 0.0,
+                        f"Task exception: {str(result)}"
+                    ))
+                elif isinstance(result, ProductResult):
+                    processed_results.append(result)
+                else:
+                    # Fallback for unexpected types
+                    processed_results.append(ProductResult(
+                        product_names[i], False, 0.0,
+                        f"Unexpected result type: {type(result)}"
+                    ))
+
+            # Calculate summary
+            total_duration = time.time() - start_time
+            successful = sum(1 for r in processed_results if r.success)
+            failed = len(processed_results) - successful
+
+            status_counts = {
+                status: sum(1 for r in processed_results if r.change_status == status)
+                for status in (RESULT_NEW, RESULT_CHANGED, RESULT_UNCHANGED)
+            }
+
+            batch_result = BatchResult(
+                len(product_names), successful, failed, total_duration,
+                self.concurrency, timestamp, processed_results,
+                new=status_counts[RESULT_NEW],
+                changed=status_counts[RESULT_CHANGED],
+                unchanged=status_counts[RESULT_UNCHANGED]
+            )
+
+            self.reporter.report({
+                "type": "batch_finished",
+                "total_products": len(product_names),
+                "successful": successful,
+                "failed": failed,
+                "duration": total_duration,
+                **status_counts,
+                "timestamp": datetime.now().isoformat()
+            })
+        finally:
+            # Flush queued events and close the client even if the batch fails
+            await self.reporter.close()
 
         return batch_result
 
@@ -262,26 +371,6 @@ def read_product_names(filename: str) -> List[str]:
         print(f"❌ Error reading file: {e}")
         sys.exit(1)
 
-async def send_web_api_status(status_data: Dict[str, Any], web_api_url: str = "http://localhost:8000") -> None:
-    """Send status update to web API if available"""
-    if not WEB_API_AVAILABLE or not httpx:
-        return
-
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.post(
-                f"{web_api_url}/api/batch/status",
-                json=status_data,
-                headers={"Content-Type": "application/json"}
-            )
-            if response.status_code == 200:
-                logger.debug("Status update sent to web API") if logger else None
-            else:
-                logger.warning(f"Failed to send status to web API: {response.status_code}") if logger else None
-    except Exception as e:
-        # Silently fail if web API is not available
-        logger.debug(f"Could not send status to web API: {e}") if logger else None
-
 def save_batch_report(result: BatchResult, output_file: Optional[str] = None) -> None:
     """Save detailed batch processing report"""
     LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -305,6 +394,9 @@ def print_summary(result: BatchResult) -> None:
     print(f"Total Products:     {result.total_products}")
     print(f"Successful:         {result.successful}")
     print(f"Failed:            {result.failed}")
+    print(f"New:                {result.new}")
+    print(f"Changed:            {result.changed}")
+    print(f"Unchanged:          {result.unchanged}")
     print(".1f")
     print(".1f")
     print(".1f")
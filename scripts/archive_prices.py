@@ -7,19 +7,22 @@ Creates daily snapshots of current prices and manages historical data.
 Designed to be run automatically (e.g., via cron job).
 
 Usage:
-    python3 scripts/archive_prices.py [--cleanup-days N]
+    python3 scripts/archive_prices.py [--cleanup-days=N]
     
 Options:
-    --cleanup-days N: Remove history older than N days (default: 365)
+    --cleanup-days=N: Also delete daily price history (price_daily) older than
+                      N days. Opt-in only: price_daily is the long-term price
+                      rollup, without this flag it is never pruned.
 """
 
-import sqlite3
 import json
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from database import get_connection
+
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'WeedDB.db')
 PRICE_HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'price_history')
 
@@ -30,7 +33,7 @@ def create_price_snapshot(date_str: Optional[str] = None) -> bool:
     
     try:
         # Get current prices
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_connection(DATABASE_PATH)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -39,7 +42,7 @@ def create_price_snapshot(date_str: Optional[str] = None) -> bool:
                 pr.price_per_g,
                 pr.category,
                 ph.name as pharmacy_name,
-                pr.timestamp
+                datetime(COALESCE(pr.last_seen, pr.timestamp), 'unixepoch', 'localtime')
             FROM products p
             JOIN prices pr ON p.id = pr.product_id
             LEFT JOIN pharmacies ph ON pr.pharmacy_id = ph.id
@@ -87,15 +90,15 @@ def create_price_snapshot(date_str: Optional[str] = None) -> bool:
         print(f"❌ Snapshot creation failed: {e}")
         return False
 
-def cleanup_old_history(days_to_keep: int = 365) -> int:
-    """Remove price history older than specified days"""
-    conn = sqlite3.connect(DATABASE_PATH)
+def cleanup_old_history(days_to_keep: int) -> int:
+    """Remove daily price history older than specified days (explicit opt-in only)"""
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
     
-    cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+    cutoff_day = (datetime.now() - timedelta(days=days_to_keep)).date().isoformat()
     
     try:
-        cursor.execute("DELETE FROM price_history WHERE recorded_at < ?", (cutoff_date,))
+        cursor.execute("DELETE FROM price_daily WHERE day < ?", (cutoff_day,))
         deleted_count = cursor.rowcount
         conn.commit()
         
@@ -141,8 +144,8 @@ def main() -> None:
     print(f"🕒 Started at: {datetime.now()}")
     print()
     
-    # Parse arguments
-    cleanup_days = 365
+    # Parse arguments (no default: pruning price_daily destroys long-term history)
+    cleanup_days: Optional[int] = None
     
     if len(sys.argv) > 1 and sys.argv[1].startswith('--cleanup-days='):
         try:
@@ -151,7 +154,10 @@ def main() -> None:
             print("❌ Invalid cleanup days value")
             return
     
-    print(f"🗂️  History retention: {cleanup_days} days")
+    if cleanup_days is None:
+        print("🗂️  History retention: unlimited (use --cleanup-days=N to prune price_daily)")
+    else:
+        print(f"🗂️  History retention: {cleanup_days} days")
     print()
     
     # Step 1: Create today's snapshot
@@ -167,7 +173,7 @@ def main() -> None:
     
     # Step 2: Cleanup old data
     print("🧹 Step 2: Cleaning up old data...")
-    db_cleaned = cleanup_old_history(cleanup_days)
+    db_cleaned = cleanup_old_history(cleanup_days) if cleanup_days is not None else 0
     files_cleaned = cleanup_old_files(90)
     
     print(f"✅ Cleanup completed ({db_cleaned} DB entries, {files_cleaned} files)")
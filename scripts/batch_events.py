@@ -0,0 +1,257 @@
+"""
+Batch progress events for the WeedDB web app (Server-Sent Events fan-out).
+
+Batch scripts POST their per-product status to the web API. Events are
+stored in a fixed-size ring buffer in a small SQLite file shared by all
+uvicorn workers, so a status POST handled by one worker is visible to
+dashboards connected to any other. Each worker pushes new events to its
+connected dashboards over SSE instead of being polled.
+
+Features:
+- Ring buffer in SQLite (data/batch_status.db): slot = seq % capacity,
+  O(1) per event, no list.pop(0) trimming, shared across worker processes
+- Monotonic sequence numbers (also the SSE event ids): "everything since
+  seq N" is one indexed range query, reconnecting clients resume with
+  Last-Event-ID
+- Separate database file, so status writes never invalidate the response
+  cache of the main database
+- Per-worker poller fans out events from other workers to local
+  subscribers (only runs while dashboards are connected)
+- Per-subscriber bounded queues; a slow dashboard drops its oldest events
+  instead of blocking the publisher
+
+Usage:
+    from batch_events import BatchEventStore, BatchEventBroker, format_sse
+
+    broker = BatchEventBroker(BatchEventStore())
+    await broker.publish([{"product_name": "Pink Kush", "success": True}])
+    events = await broker.since(42)
+
+    queue = await broker.subscribe()
+    event = await queue.get()
+    message = format_sse(event)
+    broker.unsubscribe(queue)
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+
+# Constants
+BATCH_STATUS_PATH = Path(os.environ.get(
+    'WEEDDB_BATCH_STATUS_PATH', Path(__file__).parent.parent / "data" / "batch_status.db"
+))
+DEFAULT_MAX_EVENTS = 100
+SUBSCRIBER_QUEUE_SIZE = 256
+POLL_INTERVAL = 0.25  # seconds between checks for events posted to other workers
+BUSY_TIMEOUT_SECONDS = 5.0
+EVENT_TYPE = "batch"
+
+
+class BatchEventStore:
+    """Fixed-size ring buffer of status events in SQLite, shared across processes"""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None,
+                 capacity: int = DEFAULT_MAX_EVENTS):
+        self.db_path = Path(db_path or BATCH_STATUS_PATH)
+        self.capacity = max(1, capacity)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False, isolation_level=None
+        )
+        self._init_db()
+
+    def _init_db(self) -> None:
+        """Initialize the ring buffer tables"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS batch_events (
+                    slot INTEGER PRIMARY KEY,
+                    seq INTEGER NOT NULL,
+                    event TEXT NOT NULL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_batch_events_seq ON batch_events(seq)')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS batch_event_seq (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    seq INTEGER NOT NULL
+                )
+            ''')
+            self._conn.execute('INSERT OR IGNORE INTO batch_event_seq (id, seq) VALUES (1, 0)')
+
+    def append(self, statuses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store events with the next sequence numbers (one transaction), returns them"""
+        if not statuses:
+            return []
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                last = self._conn.execute(
+                    "UPDATE batch_event_seq SET seq = seq + ? WHERE id = 1 RETURNING seq",
+                    (len(statuses),)
+                ).fetchone()[0]
+
+                events = []
+                for seq, status in enumerate(statuses, start=last - len(statuses) + 1):
+                    event = {**status, "seq": seq}
+                    event.setdefault("timestamp", datetime.now().isoformat())
+                    events.append(event)
+
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO batch_events (slot, seq, event) VALUES (?, ?, ?)",
+                    [(event["seq"] % self.capacity, event["seq"],
+                      json.dumps(event, ensure_ascii=False, default=str)) for event in events]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return events
+
+    def since(self, seq: int) -> List[Dict[str, Any]]:
+        """Get buffered events newer than seq (oldest first)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT event FROM batch_events WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get the newest events (oldest first)"""
+        if limit <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT event FROM batch_events ORDER BY seq DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def last_seq(self) -> int:
+        """Sequence number of the newest event (0 if none)"""
+        with self._lock:
+            return int(self._conn.execute("SELECT seq FROM batch_event_seq WHERE id = 1").fetchone()[0])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get ring buffer statistics"""
+        with self._lock:
+            buffered = self._conn.execute("SELECT COUNT(*) FROM batch_events").fetchone()[0]
+            last = self._conn.execute("SELECT seq FROM batch_event_seq WHERE id = 1").fetchone()[0]
+        return {
+            "buffered_events": buffered,
+            "total_events": last,
+            "last_seq": last,
+            "capacity": self.capacity
+        }
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class BatchEventBroker:
+    """Fans out events from the shared store to this worker's SSE subscribers
+
+    Used from the event loop only; store access runs in worker threads.
+    """
+
+    def __init__(self, store: Optional[BatchEventStore] = None,
+                 queue_size: int = SUBSCRIBER_QUEUE_SIZE,
+                 poll_interval: float = POLL_INTERVAL):
+        self.store = store or BatchEventStore()
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self._subscribers: Set["asyncio.Queue[Dict[str, Any]]"] = set()
+        self._poller: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_seq = 0
+
+    async def publish(self, statuses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store events in the shared ring buffer, returns them with sequence numbers"""
+        events = await asyncio.to_thread(self.store.append, statuses)
+        if self._wakeup is not None:
+            self._wakeup.set()  # deliver to local subscribers without waiting for the next poll
+        return events
+
+    async def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get the newest events (oldest first)"""
+        return await asyncio.to_thread(self.store.recent, limit)
+
+    async def since(self, seq: int) -> List[Dict[str, Any]]:
+        """Get buffered events newer than seq"""
+        return await asyncio.to_thread(self.store.since, seq)
+
+    async def subscribe(self) -> "asyncio.Queue[Dict[str, Any]]":
+        """Register a subscriber queue receiving every event stored from now on"""
+        if self._poller is None or self._poller.done():
+            # Start position is read before returning, so a replay after subscribe() has no gap
+            self._last_seq = await asyncio.to_thread(self.store.last_seq)
+            self._wakeup = asyncio.Event()
+            self._poller = asyncio.create_task(self._poll(self._wakeup))
+
+        queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: "asyncio.Queue[Dict[str, Any]]") -> None:
+        """Remove a subscriber queue (the poller stops with the last one)"""
+        self._subscribers.discard(queue)
+
+    def _fan_out(self, event: Dict[str, Any]) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # drop the oldest event of a slow subscriber
+            queue.put_nowait(event)
+
+    async def _poll(self, wakeup: asyncio.Event) -> None:
+        """Forward new events from the shared store while anyone is subscribed"""
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+
+            if not self._subscribers:
+                break
+            for event in await asyncio.to_thread(self.store.since, self._last_seq):
+                self._last_seq = event["seq"]
+                self._fan_out(event)
+
+    async def close(self) -> None:
+        """Stop the poller and close the store"""
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+        self.store.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get broker statistics (subscribers of this worker)"""
+        return {**self.store.get_stats(), "subscribers": len(self._subscribers)}
+
+
+def format_sse(data: Dict[str, Any], event: str = EVENT_TYPE, event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Events message"""
+    lines = []
+    if event_id is None:
+        event_id = data.get("seq")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
@@ -5,9 +5,16 @@ Provides fast access to frequently requested data with automatic expiration
 and memory management.
 
 Features:
+- Two tiers: bounded in-process LRU (L1) in front of the SQLite cache (L2);
+  L1 hits need no I/O, L2 hits and set() populate L1
 - SQLite-based persistent cache
 - TTL (Time To Live) support
-- LRU-style cleanup for storage limits
+- Byte budgets (overall and per entry type) enforced by LRU eviction on
+  (key, entry_type), from a background janitor and after heavy writes
+- Access statistics collected in memory and written back in batches
+  (reads never take the SQLite write lock)
+- get_or_compute(): concurrent misses for a key share one load
+  (single-flight), optional stale-while-revalidate
 - Multiple cache types for different data
 - Thread-safe operations
 
@@ -17,23 +24,41 @@ Usage:
     cache = CacheManager()
     await cache.set('product_search', 'sourdough', product_data, ttl_hours=24)
     data = await cache.get('product_search', 'sourdough')
+    # One scrape for all concurrent callers, stale data served for up to 1h while refreshing
+    data = await cache.get_or_compute('product_search', 'sourdough', lambda: scrape('sourdough'),
+                                      ttl_seconds=24 * 3600, stale_seconds=3600)
+    await cache.flush_access_stats()  # optional, also runs periodically and at exit
+
+Values served from L1 are shared between callers: treat them as read-only.
 """
 
+import atexit
+import inspect
 import sqlite3
 import json
 import time
 import asyncio
-from typing import Any, Optional, Dict, List
+from typing import Any, Callable, Optional, Dict, List, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
 import hashlib
 import logging
+import os
+import threading
+from collections import OrderedDict
 from enum import Enum
 
 # Constants
 CACHE_DB_PATH = Path(__file__).parent.parent / "data" / "cache.db"
 CACHE_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+L1_MAX_ENTRIES = int(os.environ.get('WEEDDB_CACHE_L1_ENTRIES', '2048'))
+# Upper bound for how long L1 may serve an entry without looking at cache.db
+# (other processes may replace or delete it there)
+L1_MAX_TTL = float(os.environ.get('WEEDDB_CACHE_L1_TTL', '300'))
+# Access statistics write-back: every N seconds or once this many keys are pending
+ACCESS_FLUSH_INTERVAL = float(os.environ.get('WEEDDB_CACHE_FLUSH_INTERVAL', '30'))
+ACCESS_FLUSH_MAX_PENDING = 500
 
 # Cache entry types
 CACHE_PRODUCT_SEARCH = "product_search"    # Product search results
@@ -42,6 +67,21 @@ CACHE_PRICE_DATA = "price_data"          # Price information
 CACHE_URL_MAPPING = "url_mapping"        # URL to product ID mappings
 CACHE_SEARCH_RESULTS = "search_results"   # General search results
 
+# Byte budgets for cache.db payloads (JSON size), overall and per entry type;
+# types without a budget are only limited by the overall one
+CACHE_MAX_BYTES = int(os.environ.get('WEEDDB_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+CACHE_TYPE_BUDGETS = {
+    CACHE_PRODUCT_DATA: 32 * 1024 * 1024,
+    CACHE_PRODUCT_SEARCH: 8 * 1024 * 1024,
+    CACHE_SEARCH_RESULTS: 8 * 1024 * 1024,
+    CACHE_PRICE_DATA: 8 * 1024 * 1024,
+    CACHE_URL_MAPPING: 2 * 1024 * 1024,
+}
+# Janitor: expired/over-budget cleanup interval, plus an early run after writing
+# this fraction of the overall budget
+JANITOR_INTERVAL = float(os.environ.get('WEEDDB_CACHE_JANITOR_INTERVAL', '300'))
+EVICTION_WRITE_FRACTION = 0.1
+
 @dataclass
 class CacheEntry:
     """Cache entry structure"""
@@ -78,17 +118,105 @@ class CacheEntry:
         data = json.loads(data_json)
         return cls(key, data, entry_type, created_at, expires_at, access_count, last_accessed)
 
+class MemoryCache:
+    """Thread-safe in-process LRU with a per-entry expiry time"""
+
+    def __init__(self, max_entries: int = L1_MAX_ENTRIES, max_ttl: float = L1_MAX_TTL):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def get_item(self, entry_type: str, key: str) -> Optional[Tuple[Any, float]]:
+        """Get a live entry's (data, created_at) or None"""
+        cache_key = (entry_type, key)
+        with self._lock:
+            item = self._entries.get(cache_key)
+            if item is None:
+                return None
+            data, expires_at, created_at = item
+            if time.time() > expires_at:
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return data, created_at
+
+    def get(self, entry_type: str, key: str) -> Optional[Any]:
+        """Get a live entry's data or None"""
+        item = self.get_item(entry_type, key)
+        return item[0] if item else None
+
+    def set(self, entry_type: str, key: str, data: Any, expires_at: Optional[float],
+            created_at: Optional[float] = None) -> None:
+        """Store an entry until expires_at (capped at max_ttl), evicting the LRU entries"""
+        if self.max_entries <= 0:
+            return
+        now = time.time()
+        local_expiry = now + self.max_ttl
+        expires_at = local_expiry if expires_at is None else min(expires_at, local_expiry)
+        cache_key = (entry_type, key)
+        with self._lock:
+            self._entries[cache_key] = (data, expires_at, created_at or now)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, entry_type: str, key: str) -> None:
+        """Drop one entry"""
+        with self._lock:
+            self._entries.pop((entry_type, key), None)
+
+    def clear(self, entry_type: Optional[str] = None) -> None:
+        """Drop all entries, or all entries of one type"""
+        with self._lock:
+            if entry_type is None:
+                self._entries.clear()
+                return
+            for cache_key in [k for k in self._entries if k[0] == entry_type]:
+                del self._entries[cache_key]
+
+    def clear_expired(self) -> None:
+        """Drop expired entries"""
+        now = time.time()
+        with self._lock:
+            for cache_key in [k for k, (_, expires_at, _) in self._entries.items() if now > expires_at]:
+                del self._entries[cache_key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class CacheManager:
     """Main cache management class"""
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None,
+                 l1_max_entries: int = L1_MAX_ENTRIES, l1_max_ttl: float = L1_MAX_TTL,
+                 max_bytes: int = CACHE_MAX_BYTES, type_budgets: Optional[Dict[str, int]] = None):
         self.db_path = db_path or CACHE_DB_PATH
         self.logger = logging.getLogger(__name__)
+        self.memory = MemoryCache(l1_max_entries, l1_max_ttl)
+        self.max_bytes = max_bytes
+        self.type_budgets = CACHE_TYPE_BUDGETS if type_budgets is None else type_budgets
+        self._bytes_written = 0
+        self._evict_task: Optional[asyncio.Future] = None
+        self._janitor_task: Optional[asyncio.Task] = None
+        # (entry_type, key) -> running get_or_compute() load
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        # (entry_type, key) -> [hits, last access] not yet written to cache.db
+        self._pending_access: Dict[tuple, list] = {}
+        self._access_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flush_task: Optional[asyncio.Future] = None
         self._init_db()
 
-    def _init_db(self):
+    def _init_db(self) -> None:
         """Initialize cache database"""
         with sqlite3.connect(self.db_path) as conn:
+            # Lets evictions give pages back to the file system (new databases only)
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS cache (
                     key TEXT NOT NULL,
@@ -98,10 +226,17 @@ class CacheManager:
                     expires_at REAL,
                     access_count INTEGER DEFAULT 0,
                     last_accessed REAL,
+                    size INTEGER NOT NULL DEFAULT 0,
                     PRIMARY KEY (key, entry_type)
                 )
             ''')
 
+            # Caches created before byte budgets: add and backfill payload sizes
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(cache)')]
+            if 'size' not in columns:
+                conn.execute('ALTER TABLE cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0')
+                conn.execute('UPDATE cache SET size = length(CAST(data AS BLOB))')
+
             # Create indexes for performance
             conn.execute('CREATE INDEX IF NOT EXISTS idx_expires_at ON cache(expires_at)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_entry_type ON cache(entry_type)')
@@ -111,47 +246,103 @@ class CacheManager:
         """Get database connection"""
         return sqlite3.connect(self.db_path)
 
-    async def get(self, entry_type: str, key: str) -> Optional[Any]:
-        """Get cached data"""
-        def _query():
+    def _record_access(self, entry_type: str, key: str) -> None:
+        """Count a hit in memory and schedule a write-back when one is due"""
+        now = time.time()
+        with self._access_lock:
+            pending = self._pending_access.setdefault((entry_type, key), [0, now])
+            pending[0] += 1
+            pending[1] = now
+            due = (len(self._pending_access) >= ACCESS_FLUSH_MAX_PENDING
+                   or time.monotonic() - self._last_flush >= ACCESS_FLUSH_INTERVAL)
+
+        if due and (self._flush_task is None or self._flush_task.done()):
+            self._last_flush = time.monotonic()
+            self._flush_task = asyncio.ensure_future(self.flush_access_stats())
+
+    def _write_access_stats(self) -> int:
+        """Write pending access statistics in one transaction, returns updated keys"""
+        with self._access_lock:
+            pending, self._pending_access = self._pending_access, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        rows = [(hits, last_accessed, key, entry_type)
+                for (entry_type, key), (hits, last_accessed) in pending.items()]
+        try:
             with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT key, data, entry_type, created_at, expires_at, access_count, last_accessed
-                    FROM cache
+                conn.executemany('''
+                    UPDATE cache
+                    SET access_count = access_count + ?,
+                        last_accessed = MAX(COALESCE(last_accessed, 0), ?)
                     WHERE key = ? AND entry_type = ?
-                ''', (key, entry_type))
-
-                row = cursor.fetchone()
-                if not row:
-                    return None
-
-                entry = CacheEntry.from_db_row(row)
+                ''', rows)
+        except sqlite3.Error as e:
+            # Keep the counts for the next flush
+            with self._access_lock:
+                for cache_key, (hits, last_accessed) in pending.items():
+                    current = self._pending_access.setdefault(cache_key, [0, last_accessed])
+                    current[0] += hits
+                    current[1] = max(current[1], last_accessed)
+            self.logger.warning(f"Could not write cache access statistics: {e}")
+            return 0
+        return len(rows)
+
+    async def flush_access_stats(self) -> int:
+        """Write pending access statistics to cache.db"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._write_access_stats)
+
+    def close(self) -> None:
+        """Write pending access statistics (call on shutdown)"""
+        self._write_access_stats()
+
+    def _read_entry(self, entry_type: str, key: str) -> Optional[CacheEntry]:
+        """Read an entry from cache.db (expired or not)"""
+        with self._get_connection() as conn:
+            row = conn.execute('''
+                SELECT key, data, entry_type, created_at, expires_at, access_count, last_accessed
+                FROM cache
+                WHERE key = ? AND entry_type = ?
+            ''', (key, entry_type)).fetchone()
+        return CacheEntry.from_db_row(row) if row else None
 
-                # Check if expired
-                if entry.is_expired():
-                    # Delete expired entry
-                    cursor.execute(
+    async def get(self, entry_type: str, key: str) -> Optional[Any]:
+        """Get cached data (L1 first, then cache.db)"""
+        data = self.memory.get(entry_type, key)
+        if data is not None:
+            self.l1_hits += 1
+            self._record_access(entry_type, key)
+            return data
+
+        def _query() -> Optional[Any]:
+            entry = self._read_entry(entry_type, key)
+            if entry is None:
+                return None
+
+            # Check if expired
+            if entry.is_expired():
+                # Delete expired entry
+                with self._get_connection() as conn:
+                    conn.execute(
                         'DELETE FROM cache WHERE key = ? AND entry_type = ?',
                         (key, entry_type)
                     )
-                    conn.commit()
-                    return None
-
-                # Update access statistics
-                now = time.time()
-                cursor.execute('''
-                    UPDATE cache
-                    SET access_count = access_count + 1, last_accessed = ?
-                    WHERE key = ? AND entry_type = ?
-                ''', (now, key, entry_type))
-                conn.commit()
+                return None
 
-                return entry.data
+            self.memory.set(entry_type, key, entry.data, entry.expires_at, entry.created_at)
+            return entry.data
 
         # Run in thread pool to avoid blocking
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _query)
+        data = await loop.run_in_executor(None, _query)
+        if data is None:
+            self.misses += 1
+        else:
+            self.l2_hits += 1
+            self._record_access(entry_type, key)
+        return data
 
     async def set(self, entry_type: str, key: str, data: Any,
                  ttl_seconds: Optional[float] = None) -> None:
@@ -160,26 +351,106 @@ class CacheManager:
         expires_at = now + ttl_seconds if ttl_seconds else None
 
         entry = CacheEntry(key, data, entry_type, now, expires_at)
+        row = entry.to_db_row()
+        size = len(row[1].encode('utf-8'))
 
-        def _insert():
+        def _insert() -> None:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO cache
-                    (key, data, entry_type, created_at, expires_at, access_count, last_accessed)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', entry.to_db_row())
+                    (key, data, entry_type, created_at, expires_at, access_count, last_accessed, size)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', row + (size,))
                 conn.commit()
 
         # Run in thread pool
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(None, _insert)
+        self.memory.set(entry_type, key, data, expires_at)
+
+        # Heavy writers trigger eviction before the next janitor run
+        self._bytes_written += size
+        if (self._bytes_written >= self.max_bytes * EVICTION_WRITE_FRACTION
+                and (self._evict_task is None or self._evict_task.done())):
+            self._bytes_written = 0
+            self._evict_task = asyncio.ensure_future(self.enforce_budget())
 
         self.logger.debug(f"Cached {entry_type}:{key} (TTL: {ttl_seconds}s)")
 
+    async def get_or_compute(self, entry_type: str, key: str, loader: Callable[[], Any],
+                             ttl_seconds: Optional[float] = None,
+                             stale_seconds: float = 0) -> Any:
+        """Get cached data or load it once, however many callers miss at the same time
+
+        Concurrent misses for the same (entry_type, key) share one loader()
+        call (sync or async); a None result is returned but not cached.
+        With stale_seconds, entries up to stale_seconds past their TTL are
+        returned immediately while a single background load refreshes them.
+        """
+        item = self.memory.get_item(entry_type, key)
+        if item is not None:
+            self.l1_hits += 1
+        else:
+            loop = asyncio.get_event_loop()
+            entry = await loop.run_in_executor(None, self._read_entry, entry_type, key)
+            if entry is not None and not entry.is_expired():
+                self.memory.set(entry_type, key, entry.data, entry.expires_at, entry.created_at)
+                item = (entry.data, entry.created_at)
+                self.l2_hits += 1
+            else:
+                self.misses += 1
+
+        if item is not None:
+            data, created_at = item
+            self._record_access(entry_type, key)
+            if ttl_seconds is None or time.time() < created_at + ttl_seconds:
+                return data
+            if stale_seconds > 0:
+                refresh = self._start_load(entry_type, key, loader, ttl_seconds, stale_seconds)
+                refresh.add_done_callback(self._log_refresh_error)
+                return data
+
+        # Shielded: a cancelled caller must not cancel the load other callers wait for
+        return await asyncio.shield(self._start_load(entry_type, key, loader, ttl_seconds, stale_seconds))
+
+    def _start_load(self, entry_type: str, key: str, loader: Callable[[], Any],
+                    ttl_seconds: Optional[float], stale_seconds: float) -> asyncio.Future:
+        """Get the running load for a key or start one"""
+        flight_key = (entry_type, key)
+        future = self._inflight.get(flight_key)
+        if future is not None and not future.done():
+            return future
+
+        async def _load() -> Any:
+            data = loader()
+            if inspect.isawaitable(data):
+                data = await data
+            if data is not None:
+                # Stored until the end of the stale window, fresh for ttl_seconds
+                await self.set(entry_type, key, data,
+                               ttl_seconds + stale_seconds if ttl_seconds else None)
+            return data
+
+        def _done(done: asyncio.Future) -> None:
+            if self._inflight.get(flight_key) is done:
+                del self._inflight[flight_key]
+
+        future = asyncio.ensure_future(_load())
+        self._inflight[flight_key] = future
+        future.add_done_callback(_done)
+        return future
+
+    def _log_refresh_error(self, future: asyncio.Future) -> None:
+        """Report failed background refreshes (the stale entry stays in place)"""
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.warning(f"Background cache refresh failed: {future.exception()}")
+
     async def delete(self, entry_type: str, key: str) -> bool:
         """Delete cached entry"""
-        def _delete():
+        self.memory.delete(entry_type, key)
+
+        def _delete() -> bool:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
@@ -194,7 +465,9 @@ class CacheManager:
 
     async def clear_expired(self) -> int:
         """Clear all expired entries"""
-        def _clear():
+        self.memory.clear_expired()
+
+        def _clear() -> int:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 now = time.time()
@@ -213,7 +486,9 @@ class CacheManager:
 
     async def clear_type(self, entry_type: str) -> int:
         """Clear all entries of a specific type"""
-        def _clear():
+        self.memory.clear(entry_type)
+
+        def _clear() -> int:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM cache WHERE entry_type = ?', (entry_type,))
@@ -231,7 +506,9 @@ class CacheManager:
 
     async def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        def _stats():
+        await self.flush_access_stats()
+
+        def _stats() -> Dict[str, Any]:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
 
@@ -241,17 +518,19 @@ class CacheManager:
 
                 # Entries by type
                 cursor.execute('''
-                    SELECT entry_type, COUNT(*), AVG(access_count), MAX(last_accessed)
+                    SELECT entry_type, COUNT(*), AVG(access_count), MAX(last_accessed), SUM(size)
                     FROM cache
                     GROUP BY entry_type
                 ''')
                 type_stats = {}
                 for row in cursor.fetchall():
-                    entry_type, count, avg_access, last_access = row
+                    entry_type, count, avg_access, last_access, size = row
                     type_stats[entry_type] = {
                         'count': count,
                         'avg_access_count': avg_access or 0,
-                        'last_accessed': last_access
+                        'last_accessed': last_access,
+                        'bytes': size or 0,
+                        'budget_bytes': self.type_budgets.get(entry_type)
                     }
 
                 # Expired entries
@@ -259,10 +538,18 @@ class CacheManager:
                 cursor.execute('SELECT COUNT(*) FROM cache WHERE expires_at < ?', (now,))
                 expired_count = cursor.fetchone()[0]
 
+                lookups = self.l1_hits + self.l2_hits + self.misses
                 return {
                     'total_entries': total_entries,
                     'expired_entries': expired_count,
                     'type_stats': type_stats,
+                    'total_bytes': sum(stats['bytes'] for stats in type_stats.values()),
+                    'max_bytes': self.max_bytes,
+                    'l1_entries': len(self.memory),
+                    'l1_hits': self.l1_hits,
+                    'l2_hits': self.l2_hits,
+                    'misses': self.misses,
+                    'hit_rate': round((self.l1_hits + self.l2_hits) / lookups, 3) if lookups else 0.0,
                     'db_size_mb': self.db_path.stat().st_size / (1024 * 1024) if self.db_path.exists() else 0
                 }
 
@@ -271,7 +558,10 @@ class CacheManager:
 
     async def cleanup_lru(self, max_entries: int = 1000) -> int:
         """Remove least recently used entries to stay under max_entries limit"""
-        def _cleanup():
+        # Eviction order depends on last_accessed
+        await self.flush_access_stats()
+
+        def _cleanup() -> int:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
 
@@ -282,13 +572,13 @@ class CacheManager:
                 if current_count <= max_entries:
                     return 0
 
-                # Delete oldest accessed entries
+                # Delete oldest accessed entries (never accessed: by creation time)
                 to_delete = current_count - max_entries
                 cursor.execute('''
                     DELETE FROM cache
-                    WHERE key IN (
-                        SELECT key FROM cache
-                        ORDER BY last_accessed ASC, created_at ASC
+                    WHERE (key, entry_type) IN (
+                        SELECT key, entry_type FROM cache
+                        ORDER BY COALESCE(last_accessed, created_at) ASC, created_at ASC
                         LIMIT ?
                     )
                 ''', (to_delete,))
@@ -304,25 +594,107 @@ class CacheManager:
 
         return deleted
 
+    def _evict_over_budget(self, conn: sqlite3.Connection, budget: int,
+                           entry_type: Optional[str] = None) -> int:
+        """Delete the least recently used entries beyond a byte budget"""
+        where, params = ('WHERE entry_type = ?', [entry_type]) if entry_type else ('', [])
+        # Running size from the most recently used entry down; everything past the budget goes
+        cursor = conn.execute(f'''
+            DELETE FROM cache
+            WHERE (key, entry_type) IN (
+                SELECT key, entry_type FROM (
+                    SELECT key, entry_type,
+                           SUM(size) OVER (
+                               ORDER BY COALESCE(last_accessed, created_at) DESC, created_at DESC
+                               ROWS UNBOUNDED PRECEDING
+                           ) AS running_size
+                    FROM cache {where}
+                )
+                WHERE running_size > ?
+            )
+        ''', params + [budget])
+        return cursor.rowcount
+
+    async def enforce_budget(self) -> Dict[str, int]:
+        """Remove expired entries, then LRU entries over the per-type and overall byte budgets"""
+        # Eviction order depends on last_accessed
+        await self.flush_access_stats()
+        self.memory.clear_expired()
+
+        def _enforce() -> Dict[str, int]:
+            with self._get_connection() as conn:
+                expired = conn.execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),)).rowcount
+                evicted = 0
+                for entry_type, budget in self.type_budgets.items():
+                    evicted += self._evict_over_budget(conn, budget, entry_type)
+                evicted += self._evict_over_budget(conn, self.max_bytes)
+                total_bytes = int(conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0])
+                conn.commit()
+                if expired or evicted:
+                    conn.execute('PRAGMA incremental_vacuum')
+                return {'expired': expired, 'evicted': evicted, 'total_bytes': total_bytes}
+
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(None, _enforce)
+
+        if result['expired'] or result['evicted']:
+            self.logger.info(
+                f"Cache cleanup: {result['expired']} expired, {result['evicted']} evicted, "
+                f"{result['total_bytes'] / (1024 * 1024):.1f} MB of {self.max_bytes / (1024 * 1024):.0f} MB used"
+            )
+        return result
+
+    def start_janitor(self, interval: float = JANITOR_INTERVAL) -> asyncio.Task:
+        """Run enforce_budget() every interval seconds in the background"""
+        async def _janitor() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.enforce_budget()
+                except Exception as e:
+                    self.logger.warning(f"Cache janitor failed: {e}")
+
+        if self._janitor_task is None or self._janitor_task.done():
+            self._janitor_task = asyncio.create_task(_janitor())
+        return self._janitor_task
+
+    async def stop_janitor(self) -> None:
+        """Stop the background janitor"""
+        if self._janitor_task is None:
+            return
+        self._janitor_task.cancel()
+        try:
+            await self._janitor_task
+        except asyncio.CancelledError:
+            pass
+        self._janitor_task = None
+
 # Convenience functions
 async def get_cached_product_search(search_term: str) -> Optional[Any]:
     """Get cached product search results"""
-    cache = CacheManager()
+    cache = get_cache_manager()
     return await cache.get(CACHE_PRODUCT_SEARCH, search_term)
 
 async def set_cached_product_search(search_term: str, data: Any, ttl_hours: float = 24) -> None:
     """Cache product search results"""
-    cache = CacheManager()
+    cache = get_cache_manager()
     await cache.set(CACHE_PRODUCT_SEARCH, search_term, data, ttl_hours * 3600)
 
+async def get_or_compute_product_search(search_term: str, loader: Callable[[], Any],
+                                        ttl_hours: float = 24, stale_hours: float = 1) -> Any:
+    """Get product search results, loading them once for concurrent callers"""
+    cache = get_cache_manager()
+    return await cache.get_or_compute(CACHE_PRODUCT_SEARCH, search_term, loader,
+                                      ttl_hours * 3600, stale_hours * 3600)
+
 async def get_cached_product_data(product_id: int) -> Optional[Any]:
     """Get cached product data"""
-    cache = CacheManager()
+    cache = get_cache_manager()
     return await cache.get(CACHE_PRODUCT_DATA, str(product_id))
 
 async def set_cached_product_data(product_id: int, data: Any, ttl_hours: float = 1) -> None:
     """Cache product data"""
-    cache = CacheManager()
+    cache = get_cache_manager()
     await cache.set(CACHE_PRODUCT_DATA, str(product_id), data, ttl_hours * 3600)
 
 # Global cache manager instance
@@ -333,4 +705,5 @@ def get_cache_manager() -> CacheManager:
     global _default_cache
     if _default_cache is None:
         _default_cache = CacheManager()
+        atexit.register(_default_cache.close)
     return _default_cache
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Streaming bulk exports of WeedDB data as NDJSON or CSV.
+
+The web API only offers paginated JSON. These exports stream whole tables
+(products, current prices, full price history) straight from a database
+cursor: rows are fetched in chunks with fetchmany() and encoded chunk by
+chunk, so memory use stays constant regardless of table size.
+
+Features:
+- Datasets: products, current_prices, price_history (optionally including
+  archived prices, one archive file attached at a time)
+- Formats: NDJSON (one JSON object per line) and CSV with header
+- Optional gzip compression of the stream
+- Dedicated read connection per export (does not tie up the web pool)
+
+Usage:
+    from data_export import stream_export
+
+    for chunk in stream_export("price_history", "csv", compress=True):
+        output.write(chunk)
+
+    # Command line
+    python3 scripts/data_export.py products --format ndjson -o products.ndjson
+    python3 scripts/data_export.py price_history --format csv --gzip --archived -o prices.csv.gz
+"""
+
+import argparse
+import csv
+import io
+import json
+import sqlite3
+import sys
+import zlib
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from database import DATABASE_PATH, get_connection, to_epoch
+from price_archive import attached_archives, get_archive_dir, list_archives
+
+# Constants
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+FORMATS = (FORMAT_NDJSON, FORMAT_CSV)
+MEDIA_TYPES = {
+    FORMAT_NDJSON: "application/x-ndjson",
+    FORMAT_CSV: "text/csv; charset=utf-8",
+}
+GZIP_MEDIA_TYPE = "application/gzip"
+DEFAULT_CHUNK_SIZE = 1000  # rows per fetchmany()
+GZIP_LEVEL = 6
+
+
+@dataclass
+class Dataset:
+    """Export query of one dataset ({schema} is the prices schema for price_history)"""
+    columns: Tuple[str, ...]
+    sql: str
+
+
+DATASETS = {
+    "products": Dataset(
+        ("id", "name", "variant", "producer", "genetics", "thc_percent", "cbd_percent",
+         "rating", "review_count", "stock_level", "irradiation", "country",
+         "effects", "complaints", "url", "last_updated"),
+        """
+        SELECT p.id, p.name, p.variant, pr.name, p.genetics, p.thc_percent, p.cbd_percent,
+               p.rating, p.review_count, p.stock_level, p.irradiation, p.country,
+               p.effects, p.complaints, p.url, p.last_updated
+        FROM products p
+        LEFT JOIN producers pr ON pr.id = p.producer_id
+        ORDER BY p.id
+        """
+    ),
+    "current_prices": Dataset(
+        ("product_id", "product_name", "category", "price_per_g", "pharmacy", "timestamp"),
+        """
+        SELECT lp.product_id, p.name, lp.category, lp.price_per_g, ph.name,
+               datetime(lp.timestamp, 'unixepoch', 'localtime')
+        FROM latest_prices lp
+        JOIN products p ON p.id = lp.product_id
+        LEFT JOIN pharmacies ph ON ph.id = lp.pharmacy_id
+        ORDER BY lp.product_id, lp.category
+        """
+    ),
+    "price_history": Dataset(
+        ("id", "product_id", "product_name", "category", "price_per_g", "pharmacy",
+         "timestamp", "last_seen"),
+        """
+        SELECT pr.id, pr.product_id, p.name, pr.category, pr.price_per_g, ph.name,
+               datetime(pr.timestamp, 'unixepoch', 'localtime'),
+               datetime(COALESCE(pr.last_seen, pr.timestamp), 'unixepoch', 'localtime')
+        FROM {schema}.prices pr
+        LEFT JOIN main.products p ON p.id = pr.product_id
+        LEFT JOIN main.pharmacies ph ON ph.id = pr.pharmacy_id
+        WHERE {condition}
+        ORDER BY pr.id
+        """
+    ),
+}
+
+
+def _fetch_chunks(cursor: sqlite3.Cursor, chunk_size: int) -> Iterator[List[Tuple[Any, ...]]]:
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _history_condition(product_id: Optional[int], category: Optional[str],
+                       start: Optional[Union[str, date]], end: Optional[Union[str, date]]
+                       ) -> Tuple[str, List[Any]]:
+    where = ["1=1"]
+    params: List[Any] = []
+    if product_id is not None:
+        where.append("pr.product_id = ?")
+        params.append(product_id)
+    if category is not None:
+        where.append("pr.category = ?")
+        params.append(category)
+    if start is not None:
+        # Spelled out (not COALESCE) so idx_prices_timestamp/idx_prices_last_seen apply
+        where.append("(pr.timestamp >= ? OR pr.last_seen >= ?)")
+        params.extend([to_epoch(date.fromisoformat(str(start)[:10]))] * 2)
+    if end is not None:
+        where.append("pr.timestamp < ?")
+        params.append(to_epoch(date.fromisoformat(str(end)[:10])) + 86400)
+    return " AND ".join(where), params
+
+
+def iter_rows(conn: sqlite3.Connection, dataset: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              product_id: Optional[int] = None, category: Optional[str] = None,
+              start: Optional[Union[str, date]] = None, end: Optional[Union[str, date]] = None,
+              include_archived: bool = False) -> Iterator[List[Tuple[Any, ...]]]:
+    """Yield the rows of a dataset in chunks of chunk_size"""
+    spec = DATASETS[dataset]
+    if dataset != "price_history":
+        yield from _fetch_chunks(conn.execute(spec.sql), chunk_size)
+        return
+
+    condition, params = _history_condition(product_id, category, start, end)
+
+    # Archived (older) prices first, one attached file at a time
+    if include_archived:
+        for _, _, path in list_archives(get_archive_dir(conn)):
+            with attached_archives(conn, [path]) as (schema,):
+                cursor = conn.execute(spec.sql.format(schema=schema, condition=condition), params)
+                try:
+                    yield from _fetch_chunks(cursor, chunk_size)
+                finally:
+                    cursor.close()  # an active statement would block DETACH
+
+    cursor = conn.execute(spec.sql.format(schema="main", condition=condition), params)
+    yield from _fetch_chunks(cursor, chunk_size)
+
+
+def encode_ndjson(rows: Sequence[Tuple[Any, ...]], columns: Sequence[str]) -> bytes:
+    """Encode rows as NDJSON lines"""
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+def encode_csv(rows: Sequence[Tuple[Any, ...]], header: Optional[Sequence[str]] = None) -> bytes:
+    """Encode rows (and an optional header) as CSV"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+    """Compress a byte stream into a single gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _encoded_chunks(conn: sqlite3.Connection, dataset: str, fmt: str, chunk_size: int,
+                    **filters: Any) -> Iterator[bytes]:
+    columns = DATASETS[dataset].columns
+    if fmt == FORMAT_CSV:
+        yield encode_csv([], header=columns)
+    for rows in iter_rows(conn, dataset, chunk_size, **filters):
+        yield encode_csv(rows) if fmt == FORMAT_CSV else encode_ndjson(rows, columns)
+
+
+def stream_export(dataset: str, fmt: str = FORMAT_NDJSON, compress: bool = False,
+                  db_path: Optional[Union[str, Path]] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, **filters: Any) -> Iterator[bytes]:
+    """Stream a dataset as encoded (optionally gzipped) byte chunks
+
+    Opens its own connection, closed when the stream ends or is closed.
+    Filters (price_history only): product_id, category, start, end,
+    include_archived.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+
+    conn = get_connection(db_path or DATABASE_PATH, check_same_thread=False)
+    try:
+        chunks = _encoded_chunks(conn, dataset, fmt, chunk_size, **filters)
+        yield from gzip_chunks(chunks) if compress else chunks
+    finally:
+        conn.close()
+
+
+def export_filename(dataset: str, fmt: str, compress: bool = False) -> str:
+    """Get the download file name of an export"""
+    return f"weeddb_{dataset}_{date.today().isoformat()}.{fmt}" + (".gz" if compress else "")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream WeedDB data as NDJSON or CSV")
+    parser.add_argument('dataset', choices=sorted(DATASETS), help='Dataset to export')
+    parser.add_argument('--format', choices=FORMATS, default=FORMAT_NDJSON, help='Output format')
+    parser.add_argument('--gzip', action='store_true', help='Compress output with gzip')
+    parser.add_argument('--archived', action='store_true', help='Include archived prices (price_history)')
+    parser.add_argument('--product-id', type=int, help='Only this product (price_history)')
+    parser.add_argument('--start', help='Start date YYYY-MM-DD (price_history)')
+    parser.add_argument('--end', help='End date YYYY-MM-DD (price_history)')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    args = parser.parse_args()
+
+    filters = {}
+    if args.dataset == "price_history":
+        filters = {"product_id": args.product_id, "start": args.start, "end": args.end,
+                   "include_archived": args.archived}
+
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in stream_export(args.dataset, args.format, args.gzip, **filters):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+            print(f"✅ Exported {args.dataset} to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
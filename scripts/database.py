@@ -0,0 +1,467 @@
+"""
+Shared database access and schema migrations for WeedDB scripts.
+
+Keeps existing databases in line with data/schema.sql, so scripts no longer
+depend on a manual `sqlite3 WeedDB.db < schema.sql` after schema changes.
+
+Features:
+- Central database path for all scripts
+- Versioned migrations tracked via PRAGMA user_version, applied in a single
+  BEGIN IMMEDIATE transaction (serialized between processes, rolled back
+  completely on errors)
+- Idempotent schema application (all DDL uses IF NOT EXISTS)
+- One-pass backfills for derived tables (e.g. daily price rollups)
+- Price timestamps stored as integer Unix epoch seconds (to_epoch/format_epoch)
+- FTS5 product search index (products_fts) kept in sync by triggers
+- Normalized effects/complaints/terpenes junction tables for indexed filters
+
+Usage:
+    from database import get_connection
+
+    # Other database file (scripts and web app)
+    export WEEDDB_DATABASE_PATH=/path/to/WeedDB.db
+
+    conn = get_connection()  # migrates the database on first use
+
+    # Migrate manually / show schema version
+    python3 scripts/database.py --migrate
+    python3 scripts/database.py --status
+"""
+
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Set, Union, cast
+
+# Constants
+PROJECT_ROOT = Path(__file__).parent.parent
+DATABASE_PATH = Path(os.environ.get('WEEDDB_DATABASE_PATH', PROJECT_ROOT / "data" / "WeedDB.db"))
+SCHEMA_PATH = PROJECT_ROOT / "data" / "schema.sql"
+
+logger = logging.getLogger('database')
+
+# Other processes wait this long for a running migration (busy timeout in ms)
+MIGRATION_LOCK_TIMEOUT_MS = int(os.environ.get('WEEDDB_MIGRATION_TIMEOUT', '600')) * 1000
+
+# Output format of price timestamps (local time, as stored before epoch migration)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def to_epoch(value: Optional[Union[datetime, date, str, int, float]] = None) -> int:
+    """Convert a timestamp (naive values are local time) to Unix epoch seconds, default now"""
+    if value is None:
+        value = datetime.now()
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return int(value.timestamp())
+
+
+def format_epoch(value: Optional[Union[int, float, str]]) -> Optional[str]:
+    """Format Unix epoch seconds as local 'YYYY-MM-DD HH:MM:SS' text"""
+    if value is None or isinstance(value, str):
+        return value
+    return datetime.fromtimestamp(value).strftime(TIMESTAMP_FORMAT)
+
+
+@contextmanager
+def immediate_transaction(conn: sqlite3.Connection,
+                          busy_timeout_ms: Optional[int] = None) -> Iterator[sqlite3.Connection]:
+    """Run a block in one BEGIN IMMEDIATE transaction, committed on success
+
+    Takes the write lock up front, so DDL and DML of the block are atomic and
+    concurrent writers (other processes) wait instead of interleaving. An
+    optional busy timeout applies while waiting for the lock.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    previous_timeout = None
+    if busy_timeout_ms is not None:
+        previous_timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+        conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    finally:
+        if previous_timeout is not None:
+            conn.execute(f"PRAGMA busy_timeout = {int(previous_timeout)}")
+
+
+def _epoch_sql(column: str) -> str:
+    """SQL expression converting a local-time text column to epoch seconds"""
+    return (f"CASE WHEN typeof({column}) = 'text' "
+            f"THEN CAST(strftime('%s', {column}, 'utc') AS INTEGER) ELSE {column} END")
+
+
+@dataclass
+class Migration:
+    """Single schema migration step
+
+    `upgrade` runs before data/schema.sql is (re)applied and handles structural
+    changes the idempotent schema cannot express (ALTER TABLE, table rebuilds,
+    dropping outdated views/triggers). `backfill` runs afterwards, once all
+    tables of the current schema exist.
+    """
+    version: int
+    description: str
+    upgrade: Optional[Callable[[sqlite3.Connection], None]] = None
+    backfill: Optional[Callable[[sqlite3.Connection], None]] = None
+
+
+def backfill_price_daily(conn: sqlite3.Connection) -> None:
+    """Rebuild the daily OHLC rollup from all raw prices in a single pass"""
+    conn.execute("DELETE FROM price_daily")
+    conn.execute("""
+        INSERT INTO price_daily (
+            product_id, category, pharmacy_id, day,
+            open_price, high_price, low_price, close_price, avg_price,
+            sample_count, first_seen, last_seen
+        )
+        SELECT
+            product_id, category, pharmacy_id, day,
+            MAX(open_price), MAX(price_per_g), MIN(price_per_g), MAX(close_price), AVG(price_per_g),
+            COUNT(*), MIN(timestamp), MAX(timestamp)
+        FROM (
+            SELECT
+                product_id, category, pharmacy_id, DATE(timestamp, 'unixepoch', 'localtime') AS day,
+                price_per_g, timestamp,
+                FIRST_VALUE(price_per_g) OVER w AS open_price,
+                LAST_VALUE(price_per_g) OVER w AS close_price
+            FROM prices
+            WINDOW w AS (
+                PARTITION BY product_id, category, pharmacy_id, DATE(timestamp, 'unixepoch', 'localtime')
+                ORDER BY timestamp, id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+            )
+        )
+        GROUP BY product_id, category, pharmacy_id, day
+    """)
+
+
+def backfill_products_fts(conn: sqlite3.Connection) -> None:
+    """Rebuild the product full-text index from products and producers"""
+    conn.execute("DELETE FROM products_fts")
+    conn.execute("""
+        INSERT INTO products_fts (rowid, name, variant, producer, effects, complaints)
+        SELECT p.id, p.name, p.variant, pr.name, p.effects, p.complaints
+        FROM products p
+        LEFT JOIN producers pr ON p.producer_id = pr.id
+    """)
+
+
+def upgrade_attribute_strength(conn: sqlite3.Connection) -> None:
+    """Add the x/4 strength to product_terpenes (effects/complaints already have it)"""
+    if _table_exists(conn, 'product_terpenes') and not _column_exists(conn, 'product_terpenes', 'strength'):
+        conn.execute(
+            "ALTER TABLE product_terpenes ADD COLUMN strength INTEGER CHECK(strength BETWEEN 0 AND 4)"
+        )
+
+
+def backfill_product_attributes(conn: sqlite3.Connection) -> None:
+    """Fill effect/complaint junction tables from the text columns of existing products
+
+    Strengths are unknown for old rows (NULL) until the product is scraped again.
+    """
+    from product_store import parse_text_list, store_attributes
+
+    cursor = conn.cursor()
+    rows = cursor.execute("""
+        SELECT id, effects, complaints FROM products p
+        WHERE NOT EXISTS (SELECT 1 FROM product_effects WHERE product_id = p.id)
+          AND NOT EXISTS (SELECT 1 FROM product_therapeutic_uses WHERE product_id = p.id)
+    """).fetchall()
+    for product_id, effects, complaints in rows:
+        store_attributes(cursor, product_id, 'effects', parse_text_list(effects))
+        store_attributes(cursor, product_id, 'complaints', parse_text_list(complaints))
+
+
+def backfill_latest_prices(conn: sqlite3.Connection) -> None:
+    """Fill latest_prices from existing prices (price_analytics is refreshed separately)"""
+    conn.execute("DELETE FROM latest_prices")
+    conn.execute("""
+        INSERT INTO latest_prices (product_id, category, pharmacy_id, price_per_g, timestamp)
+        SELECT product_id, category, pharmacy_id, price_per_g, timestamp
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY product_id, category ORDER BY timestamp DESC, id DESC
+            ) AS rn
+            FROM prices
+        )
+        WHERE rn = 1
+    """)
+
+
+def backfill_price_analytics(conn: sqlite3.Connection) -> None:
+    """Fill latest_prices and compute price_analytics from it"""
+    from price_analytics import refresh_price_analytics
+
+    backfill_latest_prices(conn)
+    refresh_price_analytics(conn)
+
+
+def upgrade_price_runs(conn: sqlite3.Connection) -> None:
+    """Add last_seen to prices for change-only (run-length) storage"""
+    if not _column_exists(conn, 'prices', 'last_seen'):
+        conn.execute("ALTER TABLE prices ADD COLUMN last_seen TIMESTAMP")
+    # 7-day views now consider last_seen, schema.sql recreates them
+    drop_dependents(conn, 'prices')
+
+
+def upgrade_epoch_timestamps(conn: sqlite3.Connection) -> None:
+    """Convert price timestamps from local-time text to integer epoch seconds"""
+    if _column_type(conn, 'prices', 'timestamp') != 'INTEGER':
+        rebuild_table(conn, 'prices', f"""
+            SELECT id, product_id, pharmacy_id, price_per_g, category,
+                   {_epoch_sql('timestamp')}, {_epoch_sql('last_seen')}
+            FROM prices_old
+        """, reapply_schema=False)
+
+    if _table_exists(conn, 'price_daily') and _column_type(conn, 'price_daily', 'first_seen') != 'INTEGER':
+        rebuild_table(conn, 'price_daily', f"""
+            SELECT product_id, category, pharmacy_id, day,
+                   open_price, high_price, low_price, close_price, avg_price, sample_count,
+                   {_epoch_sql('first_seen')}, {_epoch_sql('last_seen')}
+            FROM price_daily_old
+        """, reapply_schema=False)
+
+    # Archive files written before this migration hold text timestamps as well
+    from price_archive import get_archive_dir, list_archives
+    for _, _, path in list_archives(get_archive_dir(conn)):
+        archive = sqlite3.connect(str(path))
+        try:
+            archive.execute(f"""
+                UPDATE prices
+                SET timestamp = {_epoch_sql('timestamp')}, last_seen = {_epoch_sql('last_seen')}
+                WHERE typeof(timestamp) = 'text' OR typeof(last_seen) = 'text'
+            """)
+            archive.commit()
+        finally:
+            archive.close()
+
+
+def upgrade_recent_price_filters(conn: sqlite3.Connection) -> None:
+    """Drop the 7-day price views, schema.sql recreates them with index-friendly filters"""
+    drop_dependents(conn, 'prices')
+
+
+# Ordered list of all migrations; append new steps with increasing versions
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Daily OHLC price rollup (price_daily)", backfill=backfill_price_daily),
+    Migration(2, "Change-only price storage (prices.last_seen)", upgrade=upgrade_price_runs),
+    Migration(3, "Integer epoch price timestamps", upgrade=upgrade_epoch_timestamps),
+    Migration(4, "FTS5 product search index (products_fts)", backfill=backfill_products_fts),
+    Migration(5, "Normalized product attributes (effects, complaints, terpenes)",
+              upgrade=upgrade_attribute_strength, backfill=backfill_product_attributes),
+    Migration(6, "Keyset pagination indexes on products"),
+    Migration(7, "Data generation counter for ETags (data_generation)"),
+    Migration(8, "Current prices and precomputed price analytics", backfill=backfill_price_analytics),
+    Migration(9, "Index-friendly recent price filters (idx_prices_last_seen)",
+              upgrade=upgrade_recent_price_filters),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+# Databases already migrated by this process
+_migrated_paths: Set[str] = set()
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the migration version stored in the database"""
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def _column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def _column_type(conn: sqlite3.Connection, table: str, column: str) -> Optional[str]:
+    for row in conn.execute(f"PRAGMA table_info({table})"):
+        if row[1] == column:
+            return cast(str, row[2]).upper()
+    return None
+
+
+def _schema_statement(table: str) -> str:
+    """Get the CREATE TABLE statement for a table from data/schema.sql"""
+    schema = SCHEMA_PATH.read_text(encoding='utf-8')
+    match = re.search(
+        rf"CREATE TABLE IF NOT EXISTS {table} \(.*?\n\)[^;]*;", schema, re.DOTALL
+    )
+    if not match:
+        raise ValueError(f"Table '{table}' not found in {SCHEMA_PATH}")
+    return match.group(0)
+
+
+def drop_dependents(conn: sqlite3.Connection, table: str) -> None:
+    """Drop all views and triggers referencing a table
+
+    They are recreated by apply_schema(), which keeps their definitions in
+    sync with data/schema.sql after structural changes.
+    """
+    rows = conn.execute(
+        "SELECT type, name FROM sqlite_master WHERE type IN ('view', 'trigger') AND sql LIKE ?",
+        (f'%{table}%',)
+    ).fetchall()
+    for object_type, name in rows:
+        conn.execute(f"DROP {object_type.upper()} IF EXISTS {name}")
+
+
+def rebuild_table(conn: sqlite3.Connection, table: str, select_sql: str,
+                  reapply_schema: bool = True) -> None:
+    """Recreate a table from data/schema.sql and refill it from `select_sql`
+
+    `select_sql` reads from `{table}_old` and must return the columns of the
+    new table in schema order. Views, triggers and indexes are dropped and
+    recreated by the following apply_schema(), so no trigger fires for the
+    copied rows (derived tables like price_daily stay untouched). Migration
+    upgrades pass reapply_schema=False, the runner applies the schema once
+    all upgrades are done.
+
+    All steps run in one transaction: the caller's, or an own BEGIN IMMEDIATE
+    if none is open, so a crash never leaves `{table}_old` behind.
+    """
+    if not conn.in_transaction:
+        with immediate_transaction(conn):
+            rebuild_table(conn, table, select_sql, reapply_schema)
+        return
+
+    drop_dependents(conn, table)
+    conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    conn.execute(_schema_statement(table))
+    conn.execute(f"INSERT INTO {table} {select_sql}")
+    conn.execute(f"DROP TABLE {table}_old")
+    if reapply_schema:
+        apply_schema(conn)
+
+
+def _schema_statements() -> Iterator[str]:
+    """Split data/schema.sql into complete statements (trigger bodies stay whole)"""
+    buffer = ""
+    for line in SCHEMA_PATH.read_text(encoding='utf-8').splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            yield buffer
+            buffer = ""
+
+
+def apply_schema(conn: sqlite3.Connection) -> None:
+    """Apply data/schema.sql (idempotent)
+
+    Statements are executed one by one instead of with executescript(),
+    which would commit the caller's open transaction first.
+    """
+    for statement in _schema_statements():
+        conn.execute(statement)
+
+
+def migrate_database(conn: sqlite3.Connection) -> int:
+    """Bring a database up to LATEST_VERSION, returns number of applied migrations
+
+    Runs in one BEGIN IMMEDIATE transaction. Concurrent processes (e.g.
+    several uvicorn workers) wait for the lock and re-read the version, so
+    each migration is applied exactly once.
+    """
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return 0
+
+    with immediate_transaction(conn, busy_timeout_ms=MIGRATION_LOCK_TIMEOUT_MS):
+        return _migrate_locked(conn)
+
+
+def _migrate_locked(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations, caller holds the write lock"""
+    # Another process may have migrated while we waited for the lock
+    version = get_schema_version(conn)
+    if version >= LATEST_VERSION:
+        return 0
+
+    # Fresh database: the schema already describes the latest version
+    if not _table_exists(conn, 'products'):
+        apply_schema(conn)
+        conn.execute(f"PRAGMA user_version = {LATEST_VERSION}")
+        logger.info(f"Created database schema (version {LATEST_VERSION})")
+        return 0
+
+    pending = [m for m in MIGRATIONS if m.version > version]
+
+    for migration in pending:
+        if migration.upgrade:
+            migration.upgrade(conn)
+
+    apply_schema(conn)
+
+    for migration in pending:
+        if migration.backfill:
+            migration.backfill(conn)
+        logger.info(f"Applied migration {migration.version}: {migration.description}")
+
+    conn.execute(f"PRAGMA user_version = {LATEST_VERSION}")
+    return len(pending)
+
+
+def get_connection(db_path: Optional[Union[str, Path]] = None,
+                   migrate: bool = True, **connect_kwargs: Any) -> sqlite3.Connection:
+    """Open a database connection, migrating the schema once per process
+
+    Extra keyword arguments are passed to sqlite3.connect (e.g. timeout).
+    """
+    path = str(db_path or DATABASE_PATH)
+    conn: sqlite3.Connection = sqlite3.connect(path, **connect_kwargs)
+
+    if migrate and path not in _migrated_paths:
+        migrate_database(conn)
+        _migrated_paths.add(path)
+
+    return conn
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="WeedDB schema migrations")
+    parser.add_argument('--db', help=f'Database path (default: {DATABASE_PATH})')
+    parser.add_argument('--migrate', action='store_true', help='Apply pending migrations')
+    parser.add_argument('--status', action='store_true', help='Show schema version')
+    args = parser.parse_args()
+
+    db_path = args.db or str(DATABASE_PATH)
+    if not os.path.exists(db_path) and not args.migrate:
+        print(f"❌ Database not found: {db_path}")
+        sys.exit(1)
+
+    conn = get_connection(db_path, migrate=False)
+    try:
+        if args.migrate:
+            before = get_schema_version(conn)
+            applied = migrate_database(conn)
+            print(f"✅ Schema version {before} → {get_schema_version(conn)} ({applied} migrations applied)")
+        else:
+            version = get_schema_version(conn)
+            state = "up to date" if version >= LATEST_VERSION else f"{LATEST_VERSION - version} pending"
+            print(f"📋 Schema version {version}/{LATEST_VERSION} ({state})")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
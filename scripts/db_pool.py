@@ -0,0 +1,112 @@
+"""
+SQLite connection pool with async execution for the WeedDB web app.
+
+sqlite3 calls block, so async handlers must not run them on the event loop.
+The pool keeps a fixed number of connections and runs queries on a matching
+thread pool, so a slow query only occupies one worker thread while the event
+loop keeps serving other requests.
+
+Features:
+- Reused connections (no connect/migrate per request)
+- WAL journal + busy timeout, readers are not blocked by a writing scraper
+- `await pool.run(func, *args)` runs `func(conn, *args)` in the thread pool
+- Clean shutdown (closes connections, stops worker threads)
+
+Usage:
+    from db_pool import ConnectionPool
+
+    pool = ConnectionPool(DATABASE_PATH, size=4)
+
+    def count_products(conn):
+        return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    count = await pool.run(count_products)
+    pool.close()
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, TypeVar, Union
+
+from database import DATABASE_PATH, get_connection
+
+# Constants
+DEFAULT_POOL_SIZE = int(os.environ.get('WEEDDB_DB_POOL_SIZE', '4'))
+BUSY_TIMEOUT_SECONDS = 5.0
+
+T = TypeVar('T')
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections served by a thread pool"""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None,
+                 size: int = DEFAULT_POOL_SIZE,
+                 busy_timeout: float = BUSY_TIMEOUT_SECONDS):
+        self.db_path = str(db_path or DATABASE_PATH)
+        self.size = max(1, size)
+        self.busy_timeout = busy_timeout
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='weeddb-db')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = get_connection(self.db_path, check_same_thread=False, timeout=self.busy_timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if len(self._connections) < self.size:
+                conn = self._connect()
+                self._connections.append(conn)
+                return conn
+
+        return self._idle.get(timeout=self.busy_timeout)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection (blocking), rolled back on errors and returned afterwards"""
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def _call(self, func: Callable[..., T], args: tuple) -> T:
+        with self.connection() as conn:
+            return func(conn, *args)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run func(conn, *args) on the pool's worker threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, func, args)
+
+    def close(self) -> None:
+        """Stop worker threads and close all connections"""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=True)
+        for conn in self._connections:
+            conn.close()
+        self._connections.clear()
@@ -0,0 +1,167 @@
+"""
+Downsampled price series for charts.
+
+Price history grows with every scrape, but a chart only needs a few hundred
+points. This module reads a product's prices for a time range (live
+database plus attached archives, via the (product_id, category, timestamp)
+index) and reduces each series server-side to a target point count.
+
+Features:
+- LTTB (Largest-Triangle-Three-Buckets): keeps the visual shape of a line
+- Min/max bucketing: keeps every extreme (no hidden price spikes)
+- Series per product and category, change-only rows expanded to their
+  last_seen so constant prices still span the whole range
+
+Usage:
+    from downsample import get_price_series, lttb, min_max
+
+    series = get_price_series(conn, [123, 456], '2024-01-01', '2024-12-31',
+                              points=300, method='lttb')
+    # {(123, 'top'): [(epoch, price), ...], ...}
+
+    # Command line
+    python3 scripts/downsample.py 123 --start 2024-01-01 --points 100
+"""
+
+import argparse
+import json
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from database import DATABASE_PATH, get_connection
+from price_archive import get_price_range
+
+# Constants
+METHOD_LTTB = "lttb"
+METHOD_MIN_MAX = "minmax"
+METHODS = (METHOD_LTTB, METHOD_MIN_MAX)
+DEFAULT_POINTS = 500
+DEFAULT_RANGE_DAYS = 90
+
+Point = Tuple[float, float]
+SeriesKey = Tuple[int, str]
+
+
+def lttb(points: Sequence[Point], threshold: int) -> List[Point]:
+    """Downsample time-ordered (x, y) points with Largest-Triangle-Three-Buckets"""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    previous = 0
+
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_points = points[next_start:next_end] or points[-1:]
+        avg_x = sum(x for x, _ in next_points) / len(next_points)
+        avg_y = sum(y for _, y in next_points) / len(next_points)
+
+        ax, ay = points[previous]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+
+        sampled.append(points[best])
+        previous = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def min_max(points: Sequence[Point], threshold: int) -> List[Point]:
+    """Downsample to the minimum and maximum of equal-width time buckets"""
+    n = len(points)
+    if threshold >= n or threshold < 4:
+        return list(points)
+
+    buckets = (threshold - 2) // 2
+    first_x, last_x = points[0][0], points[-1][0]
+    width = (last_x - first_x) / buckets or 1
+
+    groups: Dict[int, List[Point]] = {}
+    for point in points[1:-1]:
+        groups.setdefault(min(int((point[0] - first_x) / width), buckets - 1), []).append(point)
+
+    sampled = [points[0]]
+    for bucket in sorted(groups):
+        group = groups[bucket]
+        low = min(group, key=lambda point: point[1])
+        high = max(group, key=lambda point: point[1])
+        sampled.extend(sorted({low, high}))
+    sampled.append(points[-1])
+    return sampled
+
+
+def downsample(points: Sequence[Point], threshold: int, method: str = METHOD_LTTB) -> List[Point]:
+    """Downsample with the given method ('lttb' or 'minmax')"""
+    if method == METHOD_MIN_MAX:
+        return min_max(points, threshold)
+    if method == METHOD_LTTB:
+        return lttb(points, threshold)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def get_price_series(conn: sqlite3.Connection, product_ids: Sequence[int],
+                     start: Union[str, date, datetime, None] = None,
+                     end: Union[str, date, datetime, None] = None,
+                     category: Optional[str] = None, points: int = DEFAULT_POINTS,
+                     method: str = METHOD_LTTB,
+                     archive_dir: Optional[Path] = None) -> Dict[SeriesKey, List[Point]]:
+    """Get downsampled (epoch, price) series per (product_id, category) in [start, end]"""
+    end_day = end or date.today()
+    start_day = start or (date.fromisoformat(str(end_day)[:10]) - timedelta(days=DEFAULT_RANGE_DAYS))
+
+    series: Dict[SeriesKey, List[Point]] = {}
+    for product_id in product_ids:
+        rows = get_price_range(conn, start_day, end_day, product_id=product_id,
+                               category=category, archive_dir=archive_dir)
+        for _, _, _, price, row_category, timestamp, last_seen in rows:
+            line = series.setdefault((product_id, row_category), [])
+            line.append((timestamp, price))
+            # Change-only storage: the price held until last_seen
+            if last_seen and last_seen > timestamp:
+                line.append((last_seen, price))
+
+    for key, line in series.items():
+        line.sort()
+        series[key] = downsample(line, points, method)
+    return series
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Downsampled WeedDB price series")
+    parser.add_argument('product_ids', type=int, nargs='+', help='Product ids')
+    parser.add_argument('--start', help='Start date (YYYY-MM-DD, default: 90 days ago)')
+    parser.add_argument('--end', help='End date (YYYY-MM-DD, default: today)')
+    parser.add_argument('--category', choices=['top', 'all'], help='Price category')
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help='Target points per series')
+    parser.add_argument('--method', choices=METHODS, default=METHOD_LTTB, help='Downsampling method')
+    args = parser.parse_args()
+
+    conn = get_connection(DATABASE_PATH)
+    try:
+        series = get_price_series(conn, args.product_ids, args.start, args.end,
+                                  args.category, args.points, args.method)
+    finally:
+        conn.close()
+
+    print(json.dumps([
+        {"product_id": product_id, "category": category, "points": line}
+        for (product_id, category), line in sorted(series.items())
+    ], indent=2))
+
+
+if __name__ == '__main__':
+    main()
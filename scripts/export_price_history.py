@@ -13,7 +13,6 @@ Options:
     --all: Export complete history instead of current snapshot
 """
 
-import sqlite3
 import json
 import os
 import sys
@@ -22,12 +21,14 @@ from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 import hashlib
 
+from database import get_connection
+
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'WeedDB.db')
 PRICE_HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'price_history')
 
 def get_current_prices() -> Dict[str, Any]:
     """Get current prices snapshot"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
 
     # Get latest prices for each product/category combination
@@ -37,7 +38,7 @@ def get_current_prices() -> Dict[str, Any]:
             pr.price_per_g,
             pr.category,
             ph.name as pharmacy_name,
-            pr.timestamp
+            datetime(COALESCE(pr.last_seen, pr.timestamp), 'unixepoch', 'localtime')
         FROM products p
         JOIN prices pr ON p.id = pr.product_id
         LEFT JOIN pharmacies ph ON pr.pharmacy_id = ph.id
@@ -110,28 +111,35 @@ def get_changes_since_last_export(last_export_file: Optional[str] = None) -> Dic
     return changes
 
 def get_historical_prices(days_back: int = 30) -> Dict[str, Any]:
-    """Get historical price data"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    """Get historical price data from the daily rollup (one entry per pharmacy and day)"""
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
     
-    # Get price history for the last N days
+    # Get daily price history for the last N days
     cursor.execute("""
         SELECT 
-            DATE(ph.recorded_at) as date,
+            pd.day,
             p.name as product_name,
-            ph.price_per_g,
-            ph.category,
-            ph.pharmacy_name,
-            ph.recorded_at
-        FROM price_history ph
-        JOIN products p ON ph.product_id = p.id
-        WHERE DATE(ph.recorded_at) >= DATE('now', '-{} days')
-        ORDER BY ph.recorded_at DESC, p.name, ph.category
-    """.format(days_back))
+            pd.close_price,
+            pd.category,
+            ph.name as pharmacy_name,
+            datetime(pd.last_seen, 'unixepoch', 'localtime'),
+            pd.open_price,
+            pd.high_price,
+            pd.low_price,
+            pd.avg_price,
+            pd.sample_count
+        FROM price_daily pd
+        JOIN products p ON pd.product_id = p.id
+        LEFT JOIN pharmacies ph ON pd.pharmacy_id = ph.id
+        WHERE pd.day >= DATE('now', ?)
+        ORDER BY pd.day DESC, p.name, pd.category
+    """, (f'-{int(days_back)} days',))
     
     history_data: Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]] = {}
     for row in cursor.fetchall():
-        date_str, product_name, price, category, pharmacy, timestamp = row
+        date_str, product_name, price, category, pharmacy, timestamp = row[:6]
+        open_price, high_price, low_price, avg_price, sample_count = row[6:]
         
         if date_str not in history_data:
             history_data[date_str] = {}
@@ -145,7 +153,12 @@ def get_historical_prices(days_back: int = 30) -> Dict[str, Any]:
         history_data[date_str][product_name][category].append({
             'price': price,
             'pharmacy': pharmacy or 'Unknown',
-            'timestamp': timestamp
+            'timestamp': timestamp,
+            'open': open_price,
+            'high': high_price,
+            'low': low_price,
+            'avg': round(avg_price, 2),
+            'samples': sample_count
         })
     
     conn.close()
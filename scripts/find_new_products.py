@@ -24,11 +24,13 @@ import asyncio
 import sqlite3
 import os
 import sys
-from typing import Dict, List, Any, Optional, Set
-from playwright.async_api import async_playwright, Page, Locator
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Set
 import json
 import re
 
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
 BASE_URL = "https://shop.dransay.com"
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'WeedDB.db')
 
@@ -76,7 +78,7 @@ def construct_product_list_url(
     
     return final_url
 
-async def scrape_product_names_from_page(page: Page) -> List[Dict[str, Any]]:
+async def scrape_product_names_from_page(page: 'Page') -> List[Dict[str, Any]]:
     """Extracts product names and IDs from the current page."""
     products_on_page: List[Dict[str, Any]] = []
     
@@ -146,6 +148,9 @@ async def find_new_products(
     existing_product_ids = get_existing_product_ids()
     new_products_found: List[Dict[str, Any]] = []
 
+    # Imported here so DB-only code paths start without loading Playwright
+    from playwright.async_api import async_playwright
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page()
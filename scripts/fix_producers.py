@@ -5,7 +5,6 @@ Fix missing producers in the database by re-scraping product pages.
 
 import sqlite3
 import asyncio
-from playwright.async_api import async_playwright
 import re
 import os
 
@@ -33,7 +32,10 @@ async def fix_missing_producers() -> None:
         return
     
     print(f"🔧 Found {len(products)} products with missing producers")
-    
+
+    # Imported here so DB-only code paths start without loading Playwright
+    from playwright.async_api import async_playwright
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         
@@ -9,7 +9,6 @@ Usage:
     python3 generate_charts.py
 """
 
-import sqlite3
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.dates import DateFormatter
@@ -18,9 +17,16 @@ from typing import List, Dict, Any, Optional, Tuple
 import os
 from pathlib import Path
 
+from database import get_connection
+from downsample import lttb
+
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'WeedDB.db')
 CHARTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'docs', 'assets', 'charts')
 
+# Price trend chart: number of series and points per line
+TREND_SERIES = 5
+TREND_MAX_POINTS = 200
+
 def setup_matplotlib_style() -> None:
     """Configure matplotlib for better-looking charts"""
     plt.style.use('seaborn-v0_8')
@@ -33,30 +39,49 @@ def setup_matplotlib_style() -> None:
 
 
 def get_price_history_data() -> List[Dict[str, Any]]:
-    """Get price history data for top products"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    """Get daily price history (cheapest closing price per day) for top products
+
+    Only the series with the most days are loaded, each downsampled (LTTB) to
+    TREND_MAX_POINTS so the chart stays fast as history grows.
+    """
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
 
     cursor.execute("""
+        WITH top_series AS (
+            SELECT pd.product_id, pd.category
+            FROM price_daily pd
+            JOIN products p ON p.id = pd.product_id
+            WHERE p.review_count > 100
+            GROUP BY pd.product_id, pd.category
+            ORDER BY COUNT(DISTINCT pd.day) DESC
+            LIMIT ?
+        )
         SELECT
             p.name,
-            pr.price_per_g,
-            pr.timestamp,
-            pr.category
-        FROM products p
-        JOIN prices pr ON p.id = pr.product_id
-        WHERE p.review_count > 100
-        ORDER BY p.name, pr.timestamp
-    """)
+            MIN(pd.close_price),
+            pd.day,
+            pd.category
+        FROM top_series ts
+        JOIN products p ON p.id = ts.product_id
+        JOIN price_daily pd ON pd.product_id = ts.product_id AND pd.category = ts.category
+        GROUP BY p.id, pd.category, pd.day
+        ORDER BY p.name, pd.category, pd.day
+    """, (TREND_SERIES,))
+
+    series: Dict[Tuple[str, str], List[Tuple[float, float]]] = {}
+    for name, price, day, category in cursor.fetchall():
+        series.setdefault((name, category), []).append((datetime.fromisoformat(day).timestamp(), price))
 
     data = []
-    for row in cursor.fetchall():
-        data.append({
-            'name': row[0],
-            'price': row[1],
-            'timestamp': datetime.fromisoformat(row[2]),
-            'category': row[3]
-        })
+    for (name, category), points in series.items():
+        for timestamp, price in lttb(points, TREND_MAX_POINTS):
+            data.append({
+                'name': name,
+                'price': price,
+                'timestamp': datetime.fromtimestamp(timestamp),
+                'category': category
+            })
 
     conn.close()
     return data
@@ -64,7 +89,7 @@ def get_price_history_data() -> List[Dict[str, Any]]:
 
 def get_product_distribution_data() -> Dict[str, Any]:
     """Get data for product distribution charts"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
 
     # Genetics distribution
@@ -125,10 +150,10 @@ def create_price_trend_chart(data: List[Dict[str, Any]], output_path: str) -> No
             product_data[key] = []
         product_data[key].append((item['timestamp'], item['price']))
 
-    # Sort by number of data points and take top 5
+    # Sort by number of data points and take the top series
     top_products = sorted(product_data.items(),
                          key=lambda x: len(x[1]),
-                         reverse=True)[:5]
+                         reverse=True)[:TREND_SERIES]
 
     plt.figure(figsize=(14, 8))
 
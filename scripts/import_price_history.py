@@ -12,13 +12,15 @@ Example:
     python3 scripts/import_price_history.py ../data/price_history/2025-11-14.json
 """
 
-import sqlite3
 import json
 import sys
 import os
-from datetime import datetime
 from typing import Dict, List, Any
 
+from database import get_connection, to_epoch
+from price_store import record_price
+from price_analytics import refresh_price_analytics
+
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'WeedDB.db')
 
 def validate_price_data(data: Dict[str, Any]) -> bool:
@@ -65,7 +67,7 @@ def validate_price_data(data: Dict[str, Any]) -> bool:
 
 def import_current_snapshot(data: Dict[str, Any]) -> int:
     """Import a current price snapshot"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
     
     imported_count = 0
@@ -92,15 +94,16 @@ def import_current_snapshot(data: Dict[str, Any]) -> int:
                 pharmacy_result = cursor.fetchone()
                 pharmacy_id = pharmacy_result[0] if pharmacy_result else None
                 
-                # Insert price (will update if exists due to our logic)
-                cursor.execute("""
-                    INSERT INTO prices (product_id, pharmacy_id, price_per_g, category, timestamp)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (product_id, pharmacy_id, price, category, datetime.now()))
+                if pharmacy_id is None:
+                    continue
+
+                # Insert price (or bump last_seen in change-only mode)
+                record_price(cursor, product_id, pharmacy_id, price, category)
                 
                 imported_count += 1
         
         conn.commit()
+        refresh_price_analytics(conn)
         print(f"✅ Imported {imported_count} price entries from snapshot")
         
     except Exception as e:
@@ -113,8 +116,12 @@ def import_current_snapshot(data: Dict[str, Any]) -> int:
     return imported_count
 
 def import_complete_history(data: Dict[str, Any]) -> int:
-    """Import complete price history"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    """Import complete price history into the daily rollup
+
+    Days that already exist in the database are kept as they are, so
+    re-importing an export does not double-count samples.
+    """
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
     
     imported_count = 0
@@ -136,22 +143,31 @@ def import_complete_history(data: Dict[str, Any]) -> int:
                     for entry in price_entries:
                         price = entry['price']
                         pharmacy_name = entry['pharmacy']
-                        timestamp = entry['timestamp']
+                        timestamp = to_epoch(entry['timestamp'])
                         
                         # Get or create pharmacy
                         cursor.execute("INSERT OR IGNORE INTO pharmacies (name) VALUES (?)", (pharmacy_name,))
                         cursor.execute("SELECT id FROM pharmacies WHERE name = ?", (pharmacy_name,))
                         pharmacy_result = cursor.fetchone()
-                        pharmacy_id = pharmacy_result[0] if pharmacy_result else None
+                        if not pharmacy_result:
+                            continue
+                        pharmacy_id = pharmacy_result[0]
                         
-                        # Insert into price_history
+                        # Insert into daily rollup (older exports only carry a single price)
                         cursor.execute("""
-                            INSERT INTO price_history 
-                            (product_id, pharmacy_id, price_per_g, category, recorded_at, pharmacy_name)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        """, (product_id, pharmacy_id, price, category, timestamp, pharmacy_name))
+                            INSERT INTO price_daily
+                            (product_id, category, pharmacy_id, day, open_price, high_price, low_price,
+                             close_price, avg_price, sample_count, first_seen, last_seen)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT(product_id, category, pharmacy_id, day) DO NOTHING
+                        """, (
+                            product_id, category, pharmacy_id, date_str,
+                            entry.get('open', price), entry.get('high', price), entry.get('low', price),
+                            price, entry.get('avg', price), entry.get('samples', 1),
+                            timestamp, timestamp
+                        ))
                         
-                        imported_count += 1
+                        imported_count += cursor.rowcount
         
         conn.commit()
         print(f"✅ Imported {imported_count} historical price entries")
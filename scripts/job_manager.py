@@ -0,0 +1,506 @@
+"""
+Async job manager for long-running updates triggered from the web app.
+
+Scripts like update_prices.py run for many minutes. Running them with a
+blocking subprocess.run() inside an async handler freezes the worker's
+event loop, and repeated clicks start overlapping full updates. The job
+manager runs them as asyncio subprocesses, tracks them by job id and
+reports progress parsed from their output.
+
+Features:
+- Job ids, status (queued/running/succeeded/failed/cancelled), timestamps
+- One active job per kind, also across uvicorn workers (exclusive lock
+  file per kind)
+- Job state in SQLite (jobs table in data/batch_status.db), so every worker
+  can list, get and cancel jobs started by any other worker
+- Cancellation (SIGTERM, SIGKILL after a grace period) and timeout; jobs
+  owned by another worker are signalled through their recorded pid
+- Progress from "[i/total]" lines in the script output, last output lines
+- Optional async callback for every status/progress change (e.g. SSE)
+
+Usage:
+    from job_manager import JobManager, JobConflictError
+
+    jobs = JobManager(on_update=broker_publish)
+    job = await jobs.start("update_prices")
+    (await jobs.get(job.id)).to_dict()
+    await jobs.cancel(job.id)
+    await jobs.shutdown()
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import re
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Awaitable, Callable, Deque, Dict, List, Optional, Pattern, Union
+
+from batch_events import BATCH_STATUS_PATH, BUSY_TIMEOUT_SECONDS
+
+# Constants
+SCRIPTS_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+LOCK_DIR = PROJECT_ROOT / "data"
+DEFAULT_JOB_TIMEOUT = float(os.environ.get('WEEDDB_JOB_TIMEOUT', '600'))
+CANCEL_GRACE_SECONDS = 10.0
+PID_POLL_INTERVAL = 0.1  # seconds between checks whether another worker's job exited
+OUTPUT_TAIL_LINES = 20
+MAX_FINISHED_JOBS = 50
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+# "[3/120] Updating: Pink Kush" (update_prices.py)
+PROGRESS_PATTERN = re.compile(r'\[(\d+)/(\d+)\]\s*(?:Updating:\s*)?(.*)')
+
+
+@dataclass
+class JobSpec:
+    """How to run one kind of job"""
+    command: List[str]
+    progress_pattern: Optional[Pattern[str]] = PROGRESS_PATTERN
+    timeout: float = DEFAULT_JOB_TIMEOUT
+
+
+JOB_SPECS: Dict[str, JobSpec] = {
+    "update_prices": JobSpec([sys.executable, str(SCRIPTS_DIR / "update_prices.py")]),
+}
+
+
+class JobConflictError(Exception):
+    """Raised when a job of the same kind is already running"""
+
+    def __init__(self, kind: str, job_id: Optional[str] = None):
+        self.kind = kind
+        self.job_id = job_id
+        super().__init__(f"A '{kind}' job is already running" + (f" ({job_id})" if job_id else ""))
+
+
+@dataclass
+class Job:
+    """State of a single job"""
+    id: str
+    kind: str
+    status: str = JOB_QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    returncode: Optional[int] = None
+    error: Optional[str] = None
+    progress_current: int = 0
+    progress_total: Optional[int] = None
+    progress_message: Optional[str] = None
+    output_tail: Deque[str] = field(default_factory=lambda: deque(maxlen=OUTPUT_TAIL_LINES))
+    cancel_requested: bool = False
+    pid: Optional[int] = None  # subprocess
+    worker_pid: int = field(default_factory=os.getpid)  # web worker running the job
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    def to_dict(self, include_output: bool = False) -> Dict[str, Any]:
+        def iso(value: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(value).isoformat() if value else None
+
+        data: Dict[str, Any] = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+            "returncode": self.returncode,
+            "error": self.error,
+            "progress": {
+                "current": self.progress_current,
+                "total": self.progress_total,
+                "percent": round(self.progress_current / self.progress_total * 100, 1)
+                if self.progress_total else None,
+                "message": self.progress_message
+            }
+        }
+        if include_output:
+            data["output_tail"] = list(self.output_tail)
+        return data
+
+    def to_record(self) -> Dict[str, Any]:
+        """Serialize all fields for the job store"""
+        return {
+            "id": self.id, "kind": self.kind, "status": self.status,
+            "created_at": self.created_at, "started_at": self.started_at,
+            "finished_at": self.finished_at, "returncode": self.returncode,
+            "error": self.error, "progress_current": self.progress_current,
+            "progress_total": self.progress_total, "progress_message": self.progress_message,
+            "output_tail": list(self.output_tail), "cancel_requested": self.cancel_requested,
+            "pid": self.pid, "worker_pid": self.worker_pid
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "Job":
+        """Rebuild a job from to_record() output"""
+        tail = record.pop("output_tail", [])
+        job = cls(**record)
+        job.output_tail.extend(tail)
+        return job
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether a process exists on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """Job state shared by all worker processes (jobs table next to the batch events)"""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None,
+                 max_finished: int = MAX_FINISHED_JOBS):
+        self.db_path = Path(db_path or BATCH_STATUS_PATH)
+        self.max_finished = max_finished
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False, isolation_level=None
+        )
+        self._init_db()
+
+    def _init_db(self) -> None:
+        """Initialize the jobs table"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    state TEXT NOT NULL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at)')
+
+    def save(self, job: Job) -> None:
+        """Insert or update a job, dropping the oldest finished jobs beyond max_finished"""
+        record = job.to_record()
+        with self._lock:
+            # cancel_requested is only ever set, so a cancel from another worker survives progress saves
+            self._conn.execute("""
+                INSERT INTO jobs (id, kind, status, created_at, cancel_requested, state)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    status = excluded.status,
+                    cancel_requested = MAX(cancel_requested, excluded.cancel_requested),
+                    state = excluded.state
+            """, (job.id, job.kind, job.status, job.created_at, int(job.cancel_requested),
+                  json.dumps(record, ensure_ascii=False)))
+            if not job.active:
+                self._conn.execute(f"""
+                    DELETE FROM jobs WHERE id IN (
+                        SELECT id FROM jobs WHERE status NOT IN ({','.join('?' * len(ACTIVE_STATES))})
+                        ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (*ACTIVE_STATES, self.max_finished))
+
+    @staticmethod
+    def _load(row: Any) -> Job:
+        job = Job.from_record(json.loads(row[0]))
+        job.cancel_requested = bool(row[1])
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._load(row) if row else None
+
+    def list(self, limit: int = 20) -> List[Job]:
+        """Get the newest jobs first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, cancel_requested FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._load(row) for row in rows]
+
+    def active(self, kind: str) -> List[Job]:
+        """Get the queued/running jobs of a kind"""
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT state, cancel_requested FROM jobs
+                WHERE kind = ? AND status IN ({','.join('?' * len(ACTIVE_STATES))})
+            """, (kind, *ACTIVE_STATES)).fetchall()
+        return [self._load(row) for row in rows]
+
+    def request_cancel(self, job_id: str) -> None:
+        """Flag a job as cancelled by request (read by the owning worker when it exits)"""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
+
+class JobManager:
+    """Runs script jobs as asyncio subprocesses, one active job per kind"""
+
+    def __init__(self, specs: Optional[Dict[str, JobSpec]] = None,
+                 on_update: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+                 lock_dir: Path = LOCK_DIR, store: Optional[JobStore] = None):
+        self.specs = specs or JOB_SPECS
+        self.on_update = on_update
+        self.lock_dir = lock_dir
+        self.store = store or JobStore()
+        # Jobs run by this worker; everything else is read from the store
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._processes: Dict[str, asyncio.subprocess.Process] = {}
+
+    def _acquire_lock(self, kind: str) -> IO[str]:
+        """Take the exclusive per-kind lock shared by all worker processes"""
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.lock_dir / f"{kind}.lock", 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise JobConflictError(kind)
+        return lock_file
+
+    async def start(self, kind: str) -> Job:
+        """Start a job in the background, raises JobConflictError if one is active"""
+        if kind not in self.specs:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        for job in self._jobs.values():
+            if job.kind == kind and job.active:
+                raise JobConflictError(kind, job.id)
+
+        try:
+            lock_file = self._acquire_lock(kind)
+        except JobConflictError:
+            # Held by another worker, report its job
+            running = await asyncio.to_thread(self.store.active, kind)
+            raise JobConflictError(kind, running[0].id if running else None)
+
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind)
+        self._jobs[job.id] = job
+        try:
+            # Visible to all workers before the response returns
+            await asyncio.to_thread(self.store.save, job)
+        except Exception:
+            del self._jobs[job.id]
+            lock_file.close()
+            raise
+        self._tasks[job.id] = asyncio.create_task(self._run(job, self.specs[kind], lock_file))
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id (started by any worker)"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        job = await asyncio.to_thread(self.store.get, job_id)
+        return await self._check_orphaned(job) if job is not None else None
+
+    async def list(self, limit: int = 20) -> List[Job]:
+        """Get the newest jobs of all workers first"""
+        jobs = await asyncio.to_thread(self.store.list, limit)
+        # Local jobs are more current than their last saved state
+        return [self._jobs.get(job.id) or await self._check_orphaned(job) for job in jobs]
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel an active job and wait until it stopped, returns the job (None if unknown)"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._cancel_remote(job_id)
+        if not job.active:
+            return job
+
+        job.cancel_requested = True
+        task = self._tasks.get(job_id)
+        process = self._processes.get(job_id)
+        if process is not None and process.returncode is None:
+            await self._stop(process)
+        elif task:
+            task.cancel()
+        if task:
+            await asyncio.wait([task])
+        return job
+
+    async def _cancel_remote(self, job_id: str) -> Optional[Job]:
+        """Cancel a job running in another worker by signalling its subprocess"""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            return None
+        job = await self._check_orphaned(job)
+        if not job.active:
+            return job
+
+        await asyncio.to_thread(self.store.request_cancel, job_id)
+        if job.pid is not None:
+            await self._stop_pid(job.pid)
+        return await asyncio.to_thread(self.store.get, job_id) or job
+
+    async def _check_orphaned(self, job: Job) -> Job:
+        """Mark an active job as failed if the worker that ran it is gone"""
+        if job.active and job.worker_pid != os.getpid() and not _pid_alive(job.worker_pid):
+            job.status = JOB_FAILED
+            job.error = "Worker process exited"
+            job.finished_at = time.time()
+            await asyncio.to_thread(self.store.save, job)
+        return job
+
+    async def shutdown(self) -> None:
+        """Cancel all active jobs and wait for them to finish"""
+        active = [job.id for job in self._jobs.values() if job.active]
+        await asyncio.gather(*(self.cancel(job_id) for job_id in active), return_exceptions=True)
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self.store.close()
+
+    async def _notify(self, job: Job) -> None:
+        """Save the job for other workers and report the change"""
+        try:
+            await asyncio.to_thread(self.store.save, job)
+        except Exception:
+            pass  # state updates must never break the job, the next one retries
+        if self.on_update is None:
+            return
+        try:
+            await self.on_update({"type": "job", **job.to_dict()})
+        except Exception:
+            pass  # progress reporting must never break the job
+
+    def _handle_line(self, job: Job, spec: JobSpec, line: str) -> bool:
+        """Record an output line, returns True if it reported progress"""
+        job.output_tail.append(line)
+        if spec.progress_pattern is None:
+            return False
+        match = spec.progress_pattern.search(line)
+        if not match:
+            return False
+        job.progress_current = int(match.group(1))
+        job.progress_total = int(match.group(2))
+        job.progress_message = match.group(3).strip() or None
+        return True
+
+    async def _read_output(self, job: Job, spec: JobSpec, process: asyncio.subprocess.Process) -> None:
+        assert process.stdout is not None
+        async for raw in process.stdout:
+            line = raw.decode(errors='replace').rstrip()
+            if line and self._handle_line(job, spec, line):
+                await self._notify(job)
+
+    async def _stop(self, process: asyncio.subprocess.Process) -> None:
+        """Terminate a process, kill it if it does not exit within the grace period"""
+        if process.returncode is not None:
+            return
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=CANCEL_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    async def _stop_pid(self, pid: int) -> None:
+        """Like _stop() for a process owned by another worker (reaped by that worker)"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + CANCEL_GRACE_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(PID_POLL_INTERVAL)
+            if not _pid_alive(pid):
+                return
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    async def _run(self, job: Job, spec: JobSpec, lock_file: IO[str]) -> None:
+        process = None
+        try:
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            await self._notify(job)
+
+            process = await asyncio.create_subprocess_exec(
+                *spec.command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=str(PROJECT_ROOT),
+                env={**os.environ, "PYTHONUNBUFFERED": "1"}  # progress lines arrive live
+            )
+            self._processes[job.id] = process
+            job.pid = process.pid
+            await self._notify(job)
+
+            try:
+                await asyncio.wait_for(self._read_output(job, spec, process), timeout=spec.timeout)
+                await process.wait()
+            except asyncio.TimeoutError:
+                await self._stop(process)
+                job.error = f"Timed out after {spec.timeout:.0f}s"
+
+            job.returncode = process.returncode
+            if not job.cancel_requested:
+                # Another worker may have cancelled it through the store
+                stored = await asyncio.to_thread(self.store.get, job.id)
+                job.cancel_requested = bool(stored and stored.cancel_requested)
+            if job.cancel_requested:
+                job.status = JOB_CANCELLED
+            elif job.error is None and process.returncode == 0:
+                job.status = JOB_SUCCEEDED
+            else:
+                job.status = JOB_FAILED
+                if job.error is None:
+                    job.error = job.output_tail[-1] if job.output_tail else f"Exit code {process.returncode}"
+
+        except asyncio.CancelledError:
+            if process is not None:
+                await self._stop(process)
+                job.returncode = process.returncode
+            job.status = JOB_CANCELLED
+        except Exception as e:
+            # The flock is released below, the script must not outlive it
+            if process is not None:
+                await self._stop(process)
+                job.returncode = process.returncode
+            job.status = JOB_FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self._processes.pop(job.id, None)
+            self._tasks.pop(job.id, None)
+            lock_file.close()  # releases the flock
+            await self._notify(job)
+            # Finished jobs are served from the store
+            self._jobs.pop(job.id, None)
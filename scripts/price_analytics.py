@@ -0,0 +1,159 @@
+"""
+Precomputed price analytics for WeedDB.
+
+The web API used to aggregate an arbitrary window of the latest 1000 raw
+price rows with pandas on every request. Analytics are now computed over
+the current price of every product (`latest_prices`, maintained by triggers
+on every price insert) and stored in `price_analytics`, one row per
+category plus an overall row, so the endpoint only reads a handful of rows.
+
+Features:
+- Per-category and overall averages, min/max and product counts
+- Cheapest and most expensive products (top 5) with pharmacy
+- Refreshed by writers after price writes (update_prices, import, the
+  add_product scripts, the schema migration, the benchmark seeder); readers
+  never write and flag the summary as stale when the database changed since
+
+Usage:
+    from price_analytics import refresh_price_analytics, load_price_analytics
+
+    refresh_price_analytics(conn)      # after a batch of price writes
+    analytics = load_price_analytics(conn)
+
+    # Command line
+    python3 scripts/price_analytics.py --refresh
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from database import DATABASE_PATH, format_epoch, get_connection, immediate_transaction
+
+# Constants
+OVERALL = "*"  # category key of the overall row
+TOP_PRODUCTS = 5
+
+
+def _current_generation(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT generation FROM data_generation WHERE id = 1").fetchone()
+    return int(row[0]) if row else 0
+
+
+def _extremes(conn: sqlite3.Connection, condition: str, params: List[Any], order: str) -> List[List[Any]]:
+    """Get [name, price, pharmacy] of the cheapest/most expensive current prices"""
+    rows = conn.execute(f"""
+        SELECT p.name, lp.price_per_g, ph.name
+        FROM latest_prices lp
+        JOIN products p ON p.id = lp.product_id
+        LEFT JOIN pharmacies ph ON ph.id = lp.pharmacy_id
+        WHERE {condition}
+        ORDER BY lp.price_per_g {order}, p.name
+        LIMIT ?
+    """, params + [TOP_PRODUCTS]).fetchall()
+    return [[name, round(price, 2), pharmacy] for name, price, pharmacy in rows]
+
+
+def refresh_price_analytics(conn: sqlite3.Connection) -> int:
+    """Recompute price_analytics from latest_prices, returns number of summary rows
+
+    Runs in the caller's transaction (e.g. a migration), or commits its own.
+    """
+    if not conn.in_transaction:
+        with immediate_transaction(conn):
+            return refresh_price_analytics(conn)
+
+    generation = _current_generation(conn)
+    updated_at = int(time.time())
+
+    categories = [row[0] for row in conn.execute(
+        "SELECT DISTINCT category FROM latest_prices ORDER BY category"
+    )]
+
+    rows = []
+    for category in categories + [OVERALL]:
+        condition, params = ("lp.category = ?", [category]) if category != OVERALL else ("1=1", [])
+        count, avg_price, min_price, max_price = conn.execute(f"""
+            SELECT COUNT(*), AVG(lp.price_per_g), MIN(lp.price_per_g), MAX(lp.price_per_g)
+            FROM latest_prices lp
+            JOIN products p ON p.id = lp.product_id
+            WHERE {condition}
+        """, params).fetchone()
+
+        rows.append((
+            category, count, avg_price, min_price, max_price,
+            json.dumps(_extremes(conn, condition, params, "ASC"), ensure_ascii=False),
+            json.dumps(_extremes(conn, condition, params, "DESC"), ensure_ascii=False),
+            generation, updated_at
+        ))
+
+    conn.execute("DELETE FROM price_analytics")
+    conn.executemany("""
+        INSERT INTO price_analytics
+        (category, product_count, avg_price, min_price, max_price,
+         cheapest, most_expensive, generation, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    return len(rows)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def load_price_analytics(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Read the stored analytics summary (read-only, "stale" if data changed since)"""
+    rows = conn.execute("""
+        SELECT category, product_count, avg_price, min_price, max_price,
+               cheapest, most_expensive, generation, updated_at
+        FROM price_analytics
+    """).fetchall()
+    stale = not rows or rows[0][7] != _current_generation(conn)
+
+    categories: Dict[str, Dict[str, Any]] = {}
+    for category, count, avg_price, min_price, max_price, cheapest, most_expensive, _, updated_at in rows:
+        categories[category] = {
+            "products": count,
+            "avg_price": _round(avg_price),
+            "price_range": {"min": _round(min_price), "max": _round(max_price)},
+            "top_cheap": json.loads(cheapest),
+            "top_expensive": json.loads(most_expensive),
+            "updated_at": format_epoch(updated_at)
+        }
+
+    overall = categories.pop(OVERALL, None)
+    if not overall or not overall["products"]:
+        return {"error": "No price data available", "stale": stale}
+
+    return {
+        "total_records": overall["products"],
+        "avg_price_top": categories.get("top", {}).get("avg_price"),
+        "avg_price_all": categories.get("all", {}).get("avg_price"),
+        "price_range": overall["price_range"],
+        "top_expensive": overall["top_expensive"],
+        "top_cheap": overall["top_cheap"],
+        "categories": categories,
+        "updated_at": overall["updated_at"],
+        "stale": stale
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="WeedDB price analytics summary")
+    parser.add_argument('--refresh', action='store_true', help='Recompute the analytics summary')
+    args = parser.parse_args()
+
+    conn = get_connection(DATABASE_PATH)
+    try:
+        if args.refresh:
+            count = refresh_price_analytics(conn)
+            print(f"✅ Price analytics refreshed ({count} rows)")
+        print(json.dumps(load_price_analytics(conn), indent=2, ensure_ascii=False))
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+Time-partitioned archive databases for old price data.
+
+Moves raw price rows older than a configurable horizon out of WeedDB.db into
+per-year or per-month SQLite files, so the live database (and its indexes)
+only holds the working set. The daily rollup (price_daily) stays in the live
+database, archived raw rows are attached on demand for historical queries.
+
+Features:
+- Rotation into archive/prices_YYYY.db or prices_YYYY-MM.db next to the
+  database file (data/archive for WeedDB.db)
+- Current prices (latest row per product/category) are never archived
+- Range queries across live and archived data via ATTACH; files are picked
+  by period and by how long their runs stayed valid (max last_seen)
+
+Usage:
+    from price_archive import rotate_prices, get_price_range
+
+    rotate_prices(conn, horizon_days=365, granularity='year')
+    rows = get_price_range(conn, '2024-01-01', '2024-12-31', product_id=123)
+
+    # Command line
+    python3 scripts/price_archive.py --rotate --horizon-days 365 --granularity month
+    python3 scripts/price_archive.py --list
+"""
+
+import argparse
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from database import DATABASE_PATH, get_connection, to_epoch
+
+# Constants
+ARCHIVE_DIR_NAME = "archive"
+ARCHIVE_DIR = DATABASE_PATH.parent / ARCHIVE_DIR_NAME
+DEFAULT_HORIZON_DAYS = 365
+GRANULARITY_YEAR = "year"
+GRANULARITY_MONTH = "month"
+PERIOD_FORMATS = {
+    GRANULARITY_YEAR: '%Y',
+    GRANULARITY_MONTH: '%Y-%m',
+}
+
+# SQLite allows 10 attached databases by default, keep one slot spare
+MAX_ATTACHED = 9
+
+ARCHIVE_FILE_PATTERN = re.compile(r'^prices_(\d{4})(?:-(\d{2}))?\.db$')
+
+PRICE_COLUMNS = "id, product_id, pharmacy_id, price_per_g, category, timestamp, last_seen"
+
+ARCHIVE_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS {schema}.prices (
+        id INTEGER PRIMARY KEY,
+        product_id INTEGER NOT NULL,
+        pharmacy_id INTEGER NOT NULL,
+        price_per_g REAL NOT NULL,
+        category TEXT NOT NULL,
+        timestamp INTEGER,
+        last_seen INTEGER
+    )
+"""
+
+# max_seen: latest COALESCE(last_seen, timestamp) in the file, a change-only run
+# archived under its start period can stay valid into later periods
+ARCHIVE_META_DDL = """
+    CREATE TABLE IF NOT EXISTS {schema}.archive_meta (
+        id INTEGER PRIMARY KEY CHECK(id = 1),
+        max_seen INTEGER
+    )
+"""
+
+ARCHIVE_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS {schema}.idx_archive_prices_product
+    ON prices(product_id, category, timestamp)
+"""
+
+
+def get_archive_dir(conn: sqlite3.Connection) -> Path:
+    """Get the archive directory of a connection: archive/ next to its database file"""
+    for _, name, filename in conn.execute("PRAGMA database_list"):
+        if name == 'main' and filename:
+            return Path(filename).parent / ARCHIVE_DIR_NAME
+    return ARCHIVE_DIR  # in-memory database
+
+
+def archive_path(period: str, archive_dir: Optional[Path] = None) -> Path:
+    """Get archive file path for a period ('2025' or '2025-11')"""
+    return (archive_dir or ARCHIVE_DIR) / f"prices_{period}.db"
+
+
+def list_archives(archive_dir: Optional[Path] = None) -> List[Tuple[date, date, Path]]:
+    """List archive files as (first_day, last_day, path), oldest first"""
+    directory = archive_dir or ARCHIVE_DIR
+    if not directory.exists():
+        return []
+
+    archives = []
+    for path in directory.glob('prices_*.db'):
+        match = ARCHIVE_FILE_PATTERN.match(path.name)
+        if not match:
+            continue
+        year = int(match.group(1))
+        if match.group(2):
+            month = int(match.group(2))
+            first_day = date(year, month, 1)
+            next_month = date(year + month // 12, month % 12 + 1, 1)
+            last_day = next_month - timedelta(days=1)
+        else:
+            first_day, last_day = date(year, 1, 1), date(year, 12, 31)
+        archives.append((first_day, last_day, path))
+
+    return sorted(archives)
+
+
+def rotate_prices(conn: sqlite3.Connection, horizon_days: int = DEFAULT_HORIZON_DAYS,
+                  granularity: str = GRANULARITY_YEAR,
+                  archive_dir: Optional[Path] = None) -> Dict[str, int]:
+    """Move prices older than the horizon into archive files, returns rows moved per period"""
+    if granularity not in PERIOD_FORMATS:
+        raise ValueError(f"Unknown granularity: {granularity} (use 'year' or 'month')")
+
+    directory = archive_dir or get_archive_dir(conn)
+    directory.mkdir(parents=True, exist_ok=True)
+    cutoff = to_epoch(datetime.now() - timedelta(days=horizon_days))
+
+    # Candidates: last seen before the cutoff and not the current price of their product/category
+    conn.execute("DROP TABLE IF EXISTS temp.archive_candidates")
+    conn.execute("""
+        CREATE TEMP TABLE archive_candidates AS
+        SELECT pr.id, strftime(?, pr.timestamp, 'unixepoch', 'localtime') AS period
+        FROM prices pr
+        WHERE COALESCE(pr.last_seen, pr.timestamp) < ?
+          AND pr.timestamp < (
+              SELECT MAX(timestamp) FROM prices
+              WHERE product_id = pr.product_id AND category = pr.category
+          )
+    """, (PERIOD_FORMATS[granularity], cutoff))
+    periods = [row[0] for row in conn.execute(
+        "SELECT DISTINCT period FROM temp.archive_candidates WHERE period IS NOT NULL ORDER BY period"
+    )]
+
+    moved: Dict[str, int] = {}
+    for period in periods:
+        conn.execute("ATTACH DATABASE ? AS archive", (str(archive_path(period, directory)),))
+        try:
+            conn.execute(ARCHIVE_TABLE_DDL.format(schema='archive'))
+            conn.execute(ARCHIVE_INDEX_DDL.format(schema='archive'))
+            conn.execute(ARCHIVE_META_DDL.format(schema='archive'))
+            conn.execute("""
+                INSERT INTO archive.archive_meta (id, max_seen)
+                SELECT 1, MAX(COALESCE(last_seen, timestamp)) FROM main.prices
+                WHERE id IN (SELECT id FROM temp.archive_candidates WHERE period = ?)
+                ON CONFLICT(id) DO UPDATE SET max_seen = MAX(COALESCE(max_seen, 0), excluded.max_seen)
+            """, (period,))
+            conn.execute(f"""
+                INSERT OR IGNORE INTO archive.prices ({PRICE_COLUMNS})
+                SELECT {PRICE_COLUMNS} FROM main.prices
+                WHERE id IN (SELECT id FROM temp.archive_candidates WHERE period = ?)
+            """, (period,))
+            cursor = conn.execute("""
+                DELETE FROM main.prices
+                WHERE id IN (SELECT id FROM temp.archive_candidates WHERE period = ?)
+            """, (period,))
+            moved[period] = cursor.rowcount
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("DETACH DATABASE archive")
+
+    conn.execute("DROP TABLE IF EXISTS temp.archive_candidates")
+    return moved
+
+
+# path -> (mtime, last observed day), avoids reopening unchanged archives
+_coverage_cache: Dict[Path, Tuple[float, Optional[date]]] = {}
+
+
+def archive_last_seen_day(path: Path) -> Optional[date]:
+    """Get the last day any price in an archive file was observed (None if empty)"""
+    mtime = path.stat().st_mtime
+    cached = _coverage_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    archive = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        try:
+            row = archive.execute("SELECT max_seen FROM archive_meta WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            row = None  # written before archive_meta existed
+        if row is None:
+            row = archive.execute("SELECT MAX(COALESCE(last_seen, timestamp)) FROM prices").fetchone()
+    finally:
+        archive.close()
+
+    last_day = date.fromtimestamp(row[0]) if row and row[0] is not None else None
+    _coverage_cache[path] = (mtime, last_day)
+    return last_day
+
+
+@contextmanager
+def attached_archives(conn: sqlite3.Connection, paths: List[Path]) -> Iterator[List[str]]:
+    """Attach archive files for the duration of a block, yields their schema names"""
+    schemas: List[str] = []
+    try:
+        for i, path in enumerate(paths):
+            schema = f"archive_{i}"
+            conn.execute("ATTACH DATABASE ? AS " + schema, (str(path),))
+            schemas.append(schema)
+        yield schemas
+    finally:
+        for schema in schemas:
+            conn.execute(f"DETACH DATABASE {schema}")
+
+
+def _to_date(value: Union[str, date, datetime]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def get_price_range(conn: sqlite3.Connection,
+                    start: Union[str, date, datetime], end: Union[str, date, datetime],
+                    product_id: Optional[int] = None, category: Optional[str] = None,
+                    archive_dir: Optional[Path] = None) -> List[Tuple[Any, ...]]:
+    """Get raw prices observed in [start, end] from the live database and archives
+
+    Returns rows as (id, product_id, pharmacy_id, price_per_g, category,
+    timestamp, last_seen) ordered by timestamp (epoch seconds). Archive files are only
+    attached when the time they cover overlaps the requested range: their
+    period, extended to their latest last_seen.
+    """
+    start_day, end_day = _to_date(start), _to_date(end)
+    start_ts = to_epoch(start_day)
+    end_ts = to_epoch(end_day + timedelta(days=1)) - 1
+
+    where = ["COALESCE(last_seen, timestamp) >= ?", "timestamp <= ?"]
+    params: List[Any] = [start_ts, end_ts]
+    if product_id is not None:
+        where.append("product_id = ?")
+        params.append(product_id)
+    if category is not None:
+        where.append("category = ?")
+        params.append(category)
+    condition = " AND ".join(where)
+
+    rows = conn.execute(
+        f"SELECT {PRICE_COLUMNS} FROM main.prices WHERE {condition}", params
+    ).fetchall()
+
+    paths = [path for first_day, last_day, path in list_archives(archive_dir or get_archive_dir(conn))
+             if first_day <= end_day
+             and max(last_day, archive_last_seen_day(path) or last_day) >= start_day]
+
+    # Attach in chunks to stay below SQLite's attached database limit
+    for offset in range(0, len(paths), MAX_ATTACHED):
+        with attached_archives(conn, paths[offset:offset + MAX_ATTACHED]) as schemas:
+            query = " UNION ALL ".join(
+                f"SELECT {PRICE_COLUMNS} FROM {schema}.prices WHERE {condition}" for schema in schemas
+            )
+            rows.extend(conn.execute(query, params * len(schemas)).fetchall())
+
+    rows.sort(key=lambda row: (row[5] or 0, row[0]))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="WeedDB price archive rotation")
+    parser.add_argument('--rotate', action='store_true', help='Move old prices into archive files')
+    parser.add_argument('--list', action='store_true', help='List archive files')
+    parser.add_argument('--horizon-days', type=int, default=DEFAULT_HORIZON_DAYS,
+                        help=f'Keep prices of the last N days in WeedDB.db (default: {DEFAULT_HORIZON_DAYS})')
+    parser.add_argument('--granularity', choices=list(PERIOD_FORMATS), default=GRANULARITY_YEAR,
+                        help='One archive file per year or per month (default: year)')
+    args = parser.parse_args()
+
+    if args.rotate:
+        conn = get_connection(DATABASE_PATH)
+        try:
+            moved = rotate_prices(conn, args.horizon_days, args.granularity)
+        finally:
+            conn.close()
+        if moved:
+            for period, count in moved.items():
+                print(f"📦 {period}: {count} price rows archived")
+        else:
+            print("✅ No prices older than the horizon")
+
+    if args.list or not args.rotate:
+        archives = list_archives()
+        if not archives:
+            print("📭 No archive files")
+        for first_day, last_day, path in archives:
+            size_mb = path.stat().st_size / (1024 * 1024)
+            print(f"🗄️  {path.name}: {first_day} – {last_day} ({size_mb:.2f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Price storage for WeedDB scripts.
+
+Single write path for scraped prices, so every script honours the configured
+storage mode and the daily rollup stays consistent.
+
+Storage modes:
+- append (default): one prices row per scrape
+- change_only: run-length storage, a new row is only written when price or
+  pharmacy changed; otherwise `last_seen` of the current run is bumped
+  (heartbeat). The `price_points` view expands runs back to per-day points.
+
+Usage:
+    from price_store import record_price
+
+    record_price(cursor, product_id, pharmacy_id, 12.99, 'top')
+
+    # Enable change-only storage
+    export WEEDDB_PRICE_STORAGE=change_only
+
+    # Collapse existing repeated rows into runs
+    python3 scripts/price_store.py --compact
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import datetime
+from typing import Optional, Tuple
+
+from database import (DATABASE_PATH, backfill_latest_prices, get_connection,
+                      immediate_transaction, rebuild_table, to_epoch)
+
+# Storage modes
+STORAGE_APPEND = "append"
+STORAGE_CHANGE_ONLY = "change_only"
+
+# Prices are scraped with two decimals, smaller differences are rounding noise
+PRICE_EPSILON = 0.005
+
+# Results of record_price()
+RESULT_INSERTED = "inserted"
+RESULT_HEARTBEAT = "heartbeat"
+
+
+def get_storage_mode() -> str:
+    """Get the configured price storage mode (WEEDDB_PRICE_STORAGE)"""
+    mode = os.environ.get('WEEDDB_PRICE_STORAGE', STORAGE_APPEND).strip().lower()
+    return STORAGE_CHANGE_ONLY if mode == STORAGE_CHANGE_ONLY else STORAGE_APPEND
+
+
+def record_price(cursor: sqlite3.Cursor, product_id: int, pharmacy_id: int,
+                 price_per_g: float, category: str,
+                 timestamp: Optional[datetime] = None,
+                 mode: Optional[str] = None) -> str:
+    """Store a scraped price, returns RESULT_INSERTED or RESULT_HEARTBEAT"""
+    epoch = to_epoch(timestamp)
+    mode = mode or get_storage_mode()
+
+    if mode == STORAGE_CHANGE_ONLY:
+        # Current run = latest row for product/category, newest id on equal
+        # timestamps (matches latest_prices; idx_prices_product_category_ts)
+        cursor.execute("""
+            SELECT id, pharmacy_id, price_per_g
+            FROM prices
+            WHERE product_id = ? AND category = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT 1
+        """, (product_id, category))
+        current = cursor.fetchone()
+
+        if (current and current[1] == pharmacy_id
+                and abs(current[2] - price_per_g) < PRICE_EPSILON):
+            cursor.execute(
+                "UPDATE prices SET last_seen = ? WHERE id = ?", (epoch, current[0])
+            )
+            return RESULT_HEARTBEAT
+
+    cursor.execute("""
+        INSERT INTO prices (product_id, pharmacy_id, price_per_g, category, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    """, (product_id, pharmacy_id, price_per_g, category, epoch))
+    return RESULT_INSERTED
+
+
+def compact_price_runs(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """Collapse consecutive identical prices into runs, returns (rows_before, rows_after)
+
+    Each run keeps its first row; `last_seen` becomes the latest time the
+    price was observed. The daily rollup already holds every sample and is
+    not modified. The rebuild bypasses the prices triggers, so latest_prices
+    is rebuilt from the compacted rows in the same transaction.
+    """
+    with immediate_transaction(conn):
+        rows_before = int(conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0])
+        _compact_prices(conn)
+        backfill_latest_prices(conn)
+        conn.execute("UPDATE data_generation SET generation = generation + 1 WHERE id = 1")
+        rows_after = int(conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0])
+    return rows_before, rows_after
+
+
+def _compact_prices(conn: sqlite3.Connection) -> None:
+    rebuild_table(conn, 'prices', """
+        SELECT id, product_id, pharmacy_id, price_per_g, category, timestamp,
+               CASE WHEN run_end > timestamp THEN run_end END
+        FROM (
+            SELECT *,
+                   MAX(COALESCE(last_seen, timestamp)) OVER (PARTITION BY product_id, category, run_no) AS run_end
+            FROM (
+                SELECT *, SUM(is_start) OVER (PARTITION BY product_id, category ORDER BY timestamp, id) AS run_no
+                FROM (
+                    SELECT *,
+                           CASE WHEN LAG(pharmacy_id) OVER w = pharmacy_id
+                                 AND ABS(LAG(price_per_g) OVER w - price_per_g) < 0.005
+                                THEN 0 ELSE 1 END AS is_start
+                    FROM prices_old
+                    WINDOW w AS (PARTITION BY product_id, category ORDER BY timestamp, id)
+                )
+            )
+        )
+        WHERE is_start = 1
+        ORDER BY id
+    """)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="WeedDB price storage maintenance")
+    parser.add_argument('--compact', action='store_true',
+                        help='Collapse repeated identical prices into runs (change-only storage)')
+    args = parser.parse_args()
+
+    if not args.compact:
+        parser.print_help()
+        return
+
+    conn = get_connection(DATABASE_PATH)
+    try:
+        before, after = compact_price_runs(conn)
+        print(f"✅ Compacted prices: {before} → {after} rows")
+        if get_storage_mode() != STORAGE_CHANGE_ONLY:
+            print("💡 Set WEEDDB_PRICE_STORAGE=change_only to keep storing runs")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Full-text product search for WeedDB.
+
+Queries the products_fts FTS5 index (name, variant, producer, effects,
+complaints), which triggers in data/schema.sql keep in sync with the
+products and producers tables.
+
+Features:
+- Prefix matching for autocomplete ("gorill" finds "Gorilla Glue")
+- Diacritic-insensitive matching ("creme" finds "Crème")
+- Ranking by bm25 (name matches weigh most), boosted by review count
+
+Usage:
+    from product_search import search_products, build_match_query
+
+    results = search_products(conn, "pink kush", limit=10)
+
+    # Restrict matching to one column, e.g. for SQL filters
+    match = build_match_query("kush", column="name")
+
+    # Command line
+    python3 scripts/product_search.py "pink kush"
+"""
+
+import argparse
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from database import DATABASE_PATH, get_connection
+
+# Constants
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# bm25 column weights: name, variant, producer, effects, complaints
+COLUMN_WEIGHTS = (10.0, 2.0, 5.0, 1.0, 1.0)
+
+# Reviews needed to reach half of the maximum ranking boost (up to 2x)
+REVIEW_BOOST_HALF = 100
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(term: str, column: Optional[str] = None) -> Optional[str]:
+    """Build an FTS5 MATCH expression with prefix search for every word
+
+    User input is reduced to word tokens and quoted, so FTS5 operators and
+    quotes in the search term cannot break the query. Returns None if the
+    term contains no searchable words.
+    """
+    tokens = TOKEN_PATTERN.findall(term or '')
+    if not tokens:
+        return None
+
+    query = ' '.join(f'"{token}"*' for token in tokens)
+    return f'{column} : ({query})' if column else query
+
+
+def search_products(conn: sqlite3.Connection, term: str,
+                    limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+    """Search products by name, variant, producer, effects and complaints"""
+    match = build_match_query(term)
+    if match is None:
+        return []
+
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    # bm25() is negative (lower = better), the review boost scales it further down
+    cursor = conn.execute(f"""
+        SELECT p.id, p.name, p.variant, pr.name, p.genetics, p.thc_percent,
+               p.rating, p.review_count,
+               bm25(products_fts, {weights})
+                   * (1 + COALESCE(p.review_count, 0) * 1.0
+                        / (COALESCE(p.review_count, 0) + {REVIEW_BOOST_HALF})) AS score
+        FROM products_fts
+        JOIN products p ON p.id = products_fts.rowid
+        LEFT JOIN producers pr ON p.producer_id = pr.id
+        WHERE products_fts MATCH ?
+        ORDER BY score
+        LIMIT ?
+    """, (match, max(1, min(limit, MAX_LIMIT))))
+
+    return [
+        {
+            "id": row[0],
+            "name": row[1],
+            "variant": row[2],
+            "producer": row[3],
+            "genetics": row[4],
+            "thc_percent": row[5],
+            "rating": row[6],
+            "review_count": row[7],
+            "score": round(-row[8], 4)
+        }
+        for row in cursor.fetchall()
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="WeedDB full-text product search")
+    parser.add_argument('term', help='Search term (prefix and diacritic-insensitive)')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help=f'Maximum number of results (default: {DEFAULT_LIMIT})')
+    args = parser.parse_args()
+
+    conn = get_connection(DATABASE_PATH)
+    try:
+        results = search_products(conn, args.term, args.limit)
+    finally:
+        conn.close()
+
+    if not results:
+        print(f"📭 No products found for '{args.term}'")
+        return
+
+    for result in results:
+        producer = f" ({result['producer']})" if result['producer'] else ""
+        print(f"🔍 {result['name']}{producer} – ID {result['id']}, score {result['score']}")
+
+
+if __name__ == '__main__':
+    main()
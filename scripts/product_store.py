@@ -0,0 +1,188 @@
+"""
+Product storage for WeedDB scripts.
+
+Single write path for scraped product details: products are upserted with
+change detection, and the rated "x/4" lists from a product page (effects,
+complaints, terpenes) are stored in the normalized junction tables, so the
+web API can filter with indexed joins instead of substring scans over text.
+
+Features:
+- INSERT ... ON CONFLICT(id) DO UPDATE of changed columns only, no write at
+  all for unchanged products (keeps created_at, indexes and prices intact)
+- Status marker in the script output for batch statistics (new/changed/unchanged)
+- Full attribute lists with strength 0-4 (not only the top three)
+- Bulk writes via executemany (master names + junction rows)
+- products.effects / products.complaints text columns stay filled for display
+
+Tables:
+- effects → effects / product_effects
+- complaints → therapeutic_uses / product_therapeutic_uses
+- terpenes → terpenes / product_terpenes
+
+Usage:
+    from product_store import upsert_product, parse_rated_section, store_attributes
+
+    status, changed = upsert_product(cursor, product_id, {'name': ..., 'url': ...})
+    entries = parse_rated_section(body_text, 'Effects')  # [('Relaxed', 4), ...]
+    store_attributes(cursor, product_id, 'effects', entries)
+"""
+
+import re
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Scraped product columns compared for change detection (schema order)
+PRODUCT_COLUMNS = (
+    'name', 'variant', 'genetics', 'thc_percent', 'cbd_percent', 'producer_id',
+    'rating', 'review_count', 'irradiation', 'country', 'effects', 'complaints', 'url',
+)
+
+# Results of upsert_product()
+RESULT_NEW = "new"
+RESULT_CHANGED = "changed"
+RESULT_UNCHANGED = "unchanged"
+
+# Printed by add_product.py, parsed by the batch scripts
+CHANGE_STATUS_PATTERN = re.compile(r'Product status:\s*(new|changed|unchanged)')
+
+# kind → (master table, junction table, junction foreign key)
+ATTRIBUTE_TABLES: Dict[str, Tuple[str, str, str]] = {
+    'effects': ('effects', 'product_effects', 'effect_id'),
+    'complaints': ('therapeutic_uses', 'product_therapeutic_uses', 'therapeutic_use_id'),
+    'terpenes': ('terpenes', 'product_terpenes', 'terpene_id'),
+}
+
+# Page section headings per kind, and all headings that end a section
+SECTION_HEADINGS = {
+    'effects': 'Effects',
+    'complaints': 'Complaints',
+    'terpenes': 'Terpenes',
+}
+SECTION_END_HEADINGS = ('Effects', 'Complaints', 'Terpenes', 'Recommended', 'Reviews')
+MAX_SECTION_LENGTH = 2000
+
+MAX_STRENGTH = 4
+
+RATED_ENTRY_PATTERN = re.compile(r'([^\n]+?)\s+(\d+)\s*/\s*(\d+)')
+
+AttributeEntry = Tuple[str, Optional[int]]
+
+
+def extract_section(body_text: str, heading: str) -> str:
+    """Get the text of a page section up to the next known heading"""
+    start = body_text.find(heading)
+    if start == -1:
+        return ''
+    start += len(heading)
+
+    end = min(len(body_text), start + MAX_SECTION_LENGTH)
+    for other in SECTION_END_HEADINGS:
+        position = body_text.find(other, start)
+        if position != -1:
+            end = min(end, position)
+    return body_text[start:end]
+
+
+def parse_rated_list(section: str) -> List[AttributeEntry]:
+    """Parse 'Name x/y' entries into (name, strength 0-4), keeping page order"""
+    entries: List[AttributeEntry] = []
+    seen = set()
+    for name, value, scale in RATED_ENTRY_PATTERN.findall(section):
+        name = name.strip(' \t-•:')
+        if not name or name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        strength = round(int(value) * MAX_STRENGTH / (int(scale) or MAX_STRENGTH))
+        entries.append((name, max(0, min(MAX_STRENGTH, strength))))
+    return entries
+
+
+def parse_rated_section(body_text: str, heading: str) -> List[AttributeEntry]:
+    """Parse the rated list below a page heading ('Effects', 'Complaints', 'Terpenes')"""
+    return parse_rated_list(extract_section(body_text, heading))
+
+
+def parse_text_list(value: Optional[str]) -> List[AttributeEntry]:
+    """Parse a comma-joined text column ('Relaxed, Happy') into entries without strength"""
+    names = [name.strip() for name in (value or '').split(',')]
+    return [(name, None) for name in dict.fromkeys(name for name in names if name)]
+
+
+def upsert_product(cursor: sqlite3.Cursor, product_id: int,
+                   values: Dict[str, Any]) -> Tuple[str, List[str]]:
+    """Insert or update a product, returns (RESULT_*, changed column names)
+
+    Only columns whose value differs are written (plus last_updated); an
+    unchanged product is not written at all.
+    """
+    columns = [column for column in PRODUCT_COLUMNS if column in values]
+    cursor.execute(
+        f"SELECT {', '.join(columns)} FROM products WHERE id = ?", (product_id,)
+    )
+    current = cursor.fetchone()
+
+    if current is None:
+        status, changed = RESULT_NEW, columns
+    else:
+        changed = [column for column, old in zip(columns, current) if old != values[column]]
+        if not changed:
+            return RESULT_UNCHANGED, []
+        status = RESULT_CHANGED
+
+    assignments = ', '.join(f"{column} = excluded.{column}" for column in changed)
+    cursor.execute(f"""
+        INSERT INTO products (id, {', '.join(columns)}, last_updated)
+        VALUES (?, {', '.join('?' for _ in columns)}, ?)
+        ON CONFLICT(id) DO UPDATE SET {assignments}, last_updated = excluded.last_updated
+    """, (product_id, *(values[column] for column in columns), datetime.now()))
+    return status, changed
+
+
+def parse_change_status(output: str) -> Optional[str]:
+    """Get the product status (new/changed/unchanged) from add_product.py output"""
+    match = CHANGE_STATUS_PATTERN.search(output or '')
+    return match.group(1) if match else None
+
+
+def _entry_key(entry: AttributeEntry) -> Tuple[str, int]:
+    return entry[0], -1 if entry[1] is None else entry[1]
+
+
+def store_attributes(cursor: sqlite3.Cursor, product_id: int, kind: str,
+                     entries: Sequence[AttributeEntry]) -> bool:
+    """Replace a product's attributes of one kind, returns False if they were unchanged"""
+    master, junction, foreign_key = ATTRIBUTE_TABLES[kind]
+    names = [name for name, _ in entries]
+
+    cursor.execute(f"""
+        SELECT m.name, j.strength FROM {junction} j
+        JOIN {master} m ON m.id = j.{foreign_key}
+        WHERE j.product_id = ?
+    """, (product_id,))
+    if sorted(cursor.fetchall(), key=_entry_key) == sorted(entries, key=_entry_key):
+        return False
+
+    cursor.executemany(
+        f"INSERT OR IGNORE INTO {master} (name) VALUES (?)", [(name,) for name in names]
+    )
+    ids: Dict[str, int] = {}
+    if names:
+        placeholders = ', '.join('?' for _ in names)
+        cursor.execute(f"SELECT name, id FROM {master} WHERE name IN ({placeholders})", names)
+        ids = dict(cursor.fetchall())
+
+    cursor.execute(f"DELETE FROM {junction} WHERE product_id = ?", (product_id,))
+    cursor.executemany(
+        f"INSERT OR IGNORE INTO {junction} (product_id, {foreign_key}, strength) VALUES (?, ?, ?)",
+        [(product_id, ids[name], strength) for name, strength in entries if name in ids]
+    )
+    return True
+
+
+def format_top_entries(entries: Sequence[AttributeEntry], count: int = 3) -> Optional[str]:
+    """Format the strongest entries as comma-joined text for the products table"""
+    if not entries:
+        return None
+    ranked = sorted(entries, key=lambda entry: -(entry[1] or 0))
+    return ', '.join(name for name, _ in ranked[:count])
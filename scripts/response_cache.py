@@ -0,0 +1,171 @@
+"""
+In-process response cache for the WeedDB web API, invalidated by data changes.
+
+Read endpoints (stats, product lists, product details, analytics) return the
+same data until the next scrape writes to the database. This cache keeps
+their responses in memory and drops everything as soon as SQLite reports a
+change via `PRAGMA data_version`, so repeated reads between scrapes are
+served without running any query.
+
+Features:
+- Invalidation through `PRAGMA data_version` on a dedicated read-only
+  connection (changes whenever any other connection/process commits)
+- Version check in a background task on a worker thread (default: once per
+  second), lookups never touch the database on the event loop
+- LRU bound on the number of cached responses
+- Hit/miss statistics
+- Data generation number (data_generation table) for ETags, re-read only
+  when data_version changed
+
+Usage:
+    from response_cache import ResponseCache
+
+    cache = ResponseCache(DATABASE_PATH)
+    cache.start_refresher()
+    stats = await cache.get_or_load("stats", lambda: pool.run(query_stats))
+    etag = f'"{cache.data_generation()}"'
+    await cache.stop_refresher()
+    cache.close()
+"""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar, Union, cast
+
+from database import DATABASE_PATH, get_connection
+
+# Constants
+DEFAULT_CHECK_INTERVAL = float(os.environ.get('WEEDDB_RESPONSE_CACHE_INTERVAL', '1.0'))
+DEFAULT_MAX_ENTRIES = 512
+
+T = TypeVar('T')
+
+
+class ResponseCache:
+    """LRU response cache cleared whenever the database changes"""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.check_interval = check_interval
+        self.max_entries = max_entries
+
+        # Only used for PRAGMA data_version; never writes, so every commit is "other"
+        self._conn = get_connection(db_path or DATABASE_PATH, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._data_version = self._read_data_version()
+        self._db_generation = self._read_db_generation()
+        self._refresher_task: Optional["asyncio.Task[None]"] = None
+        # Bumped on every invalidation, guards against caching responses loaded before it
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _read_data_version(self) -> int:
+        return int(self._conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def _read_db_generation(self) -> int:
+        row = self._conn.execute("SELECT generation FROM data_generation WHERE id = 1").fetchone()
+        return int(row[0]) if row else 0
+
+    def refresh(self) -> None:
+        """Clear the cache if the database changed (blocking, runs a query)"""
+        version = self._read_data_version()
+        if version == self._data_version:
+            return
+        db_generation = self._read_db_generation()
+
+        # Queries run outside the lock so get() on the event loop never waits for SQLite
+        with self._lock:
+            self._data_version = version
+            self._db_generation = db_generation
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def start_refresher(self) -> "asyncio.Task[None]":
+        """Run refresh() on a worker thread every check_interval seconds in the background"""
+        async def _refresher() -> None:
+            while True:
+                await asyncio.sleep(self.check_interval)
+                try:
+                    await asyncio.to_thread(self.refresh)
+                except Exception:
+                    pass  # database busy/locked, retried on the next interval
+
+        if self._refresher_task is None or self._refresher_task.done():
+            self._refresher_task = asyncio.create_task(_refresher())
+        return self._refresher_task
+
+    async def stop_refresher(self) -> None:
+        """Stop the background refresher"""
+        if self._refresher_task is None:
+            return
+        self._refresher_task.cancel()
+        try:
+            await self._refresher_task
+        except asyncio.CancelledError:
+            pass
+        self._refresher_task = None
+
+    def data_generation(self) -> int:
+        """Get the database's data generation (bumped by triggers on every data change)"""
+        return self._db_generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached response or None (in-memory only, see start_refresher)"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a response, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        """Get a cached response or await loader() and cache its result"""
+        cached = self.get(key)
+        if cached is not None:
+            return cast(T, cached)
+        generation = self._generation
+        value = await loader()
+        if value is not None and generation == self._generation:
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all cached responses"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "invalidations": self.invalidations,
+            "data_version": self._data_version,
+            "data_generation": self._db_generation
+        }
+
+    def close(self) -> None:
+        """Close the version-check connection"""
+        self._conn.close()
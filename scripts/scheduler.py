@@ -40,11 +40,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger('scheduler')
 
+# Price archive defaults (see price_archive.py)
+DEFAULT_ARCHIVE_HORIZON_DAYS = 365
+DEFAULT_ARCHIVE_GRANULARITY = "year"
+
 class TaskScheduler:
     """Scheduler for automated WeedDB tasks"""
 
-    def __init__(self):
+    def __init__(self, archive_horizon_days: int = DEFAULT_ARCHIVE_HORIZON_DAYS,
+                 archive_granularity: str = DEFAULT_ARCHIVE_GRANULARITY):
         self.logger = logger
+        self.archive_horizon_days = archive_horizon_days
+        self.archive_granularity = archive_granularity
 
     async def run_task(self, task_name: str, task_func: Callable, *args, **kwargs) -> bool:
         """Run a task with error handling and logging"""
@@ -98,6 +105,7 @@ class TaskScheduler:
 
         tasks = [
             self._cleanup_old_logs,
+            self._rotate_price_archives,
             self._optimize_database,
             self._cleanup_cache,
             self._generate_monthly_report
@@ -125,6 +133,32 @@ class TaskScheduler:
                 log_file.unlink()
                 self.logger.info(f"Deleted old log file: {log_file.name}")
 
+    async def _rotate_price_archives(self) -> None:
+        """Move old raw prices into archive databases (keeps WeedDB.db small before VACUUM)"""
+        db_path = PROJECT_ROOT / "data" / "WeedDB.db"
+        if not db_path.exists():
+            return
+
+        sys.path.insert(0, str(SCRIPT_DIR))
+        from database import get_connection
+        from price_archive import rotate_prices
+
+        def _rotate() -> Dict[str, int]:
+            conn = get_connection(db_path)
+            try:
+                return rotate_prices(conn, self.archive_horizon_days, self.archive_granularity)
+            finally:
+                conn.close()
+
+        loop = asyncio.get_event_loop()
+        moved = await loop.run_in_executor(None, _rotate)
+
+        total = sum(moved.values())
+        self.logger.info(
+            f"Archived {total} price rows older than {self.archive_horizon_days} days "
+            f"into {len(moved)} {self.archive_granularity} archive(s)"
+        )
+
     async def _optimize_database(self) -> None:
         """Optimize SQLite database"""
         db_path = PROJECT_ROOT / "data" / "WeedDB.db"
@@ -139,8 +173,16 @@ class TaskScheduler:
             self.logger.info("Database optimized")
 
     async def _cleanup_cache(self) -> None:
-        """Clean up expired cache entries"""
-        self.logger.info("Cache cleanup not implemented yet")
+        """Clean up expired cache entries and enforce the cache.db byte budgets"""
+        sys.path.insert(0, str(SCRIPT_DIR))
+        from cache_manager import get_cache_manager
+
+        cache = get_cache_manager()
+        result = await cache.enforce_budget()
+        self.logger.info(
+            f"Cache cleanup: {result['expired']} expired, {result['evicted']} evicted, "
+            f"{result['total_bytes'] / (1024 * 1024):.1f} MB in use"
+        )
 
     async def _generate_monthly_report(self) -> None:
         """Generate monthly statistics report"""
@@ -286,6 +328,10 @@ Cron Setup:
     parser.add_argument('task', nargs='?', help='Task to run (daily_update, weekly_overview, monthly_cleanup)')
     parser.add_argument('--create-cron-scripts', action='store_true',
                        help='Create cron-compatible shell scripts')
+    parser.add_argument('--archive-horizon-days', type=int, default=DEFAULT_ARCHIVE_HORIZON_DAYS,
+                       help=f'Archive raw prices older than N days during monthly_cleanup (default: {DEFAULT_ARCHIVE_HORIZON_DAYS})')
+    parser.add_argument('--archive-granularity', choices=['year', 'month'], default=DEFAULT_ARCHIVE_GRANULARITY,
+                       help='One archive database per year or month (default: year)')
 
     args = parser.parse_args()
 
@@ -298,7 +344,7 @@ Cron Setup:
         sys.exit(1)
 
     # Run the scheduler
-    scheduler = TaskScheduler()
+    scheduler = TaskScheduler(args.archive_horizon_days, args.archive_granularity)
 
     try:
         success = asyncio.run(scheduler.run_scheduled_task(args.task))
@@ -15,9 +15,10 @@ import sqlite3
 import sys
 import os
 import re
-from typing import List, Tuple, Optional, Dict, Any
-from datetime import datetime
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout, Page
+from typing import TYPE_CHECKING, List, Tuple, Optional, Dict, Any
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
 
 # Setup basic logging
 import logging
@@ -36,6 +37,10 @@ except ImportError:
     error_handler = None
     RetryConfig = None
 
+from database import get_connection
+from price_store import record_price
+from price_analytics import refresh_price_analytics
+
 BASE_URL = "https://shop.dransay.com"
 
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'WeedDB.db')
@@ -50,7 +55,7 @@ def construct_search_url(product_name: str, vendor_id: str) -> str:
     encoded_product_name = product_name.replace(' ', '%20')
     return f"{BASE_URL}/products?vendorId={vendor_id}&deliveryMethod=shipping&filters=%7B%22topProducersLowPrice%22:false%7D&search={encoded_product_name}"
 
-async def scrape_price_for_product(page: Page, product_name: str, vendor_id: str) -> Optional[Dict[str, Any]]:
+async def scrape_price_for_product(page: 'Page', product_name: str, vendor_id: str) -> Optional[Dict[str, Any]]:
     """
     Scrape only the price and pharmacy for a specific product and category.
     Returns minimal data needed for price update.
@@ -248,7 +253,7 @@ def get_all_products() -> List[Tuple[int, str, str]]:
 
 def update_product_price(product_id: int, pharmacy_name: str, price_per_g: float, category: str) -> bool:
     """Update price for a specific product"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
 
     try:
@@ -259,11 +264,8 @@ def update_product_price(product_id: int, pharmacy_name: str, price_per_g: float
         if pharmacy_result:
             pharmacy_id = pharmacy_result[0]
 
-            # Insert new price entry
-            cursor.execute("""
-                INSERT INTO prices (product_id, pharmacy_id, price_per_g, category, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            """, (product_id, pharmacy_id, price_per_g, category, datetime.now()))
+            # Insert new price entry (or bump last_seen in change-only mode)
+            record_price(cursor, product_id, pharmacy_id, price_per_g, category)
 
             conn.commit()
             return True
@@ -279,6 +281,9 @@ def update_product_price(product_id: int, pharmacy_name: str, price_per_g: float
 
 async def update_product_prices(product_id: int, product_name: str) -> bool:
     """Update prices for a single product by scraping both categories"""
+    # Imported here so DB-only code paths start without loading Playwright
+    from playwright.async_api import async_playwright
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page()
@@ -360,6 +365,15 @@ def main() -> None:
         for name in failed_products:
             print(f"   - {name}")
 
+    # Recompute the analytics summary once for the whole batch
+    if success_count:
+        conn = get_connection(DATABASE_PATH)
+        try:
+            refresh_price_analytics(conn)
+            print("📈 Price analytics refreshed")
+        finally:
+            conn.close()
+
     print("\n✨ Update complete!")
 
 if __name__ == '__main__':
@@ -0,0 +1,279 @@
+"""Tests for the two-tier cache (scripts/cache_manager.py)"""
+
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from cache_manager import CacheManager, MemoryCache
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    return tmp_path / "cache.db"
+
+
+# L1 (in-process LRU)
+
+def test_l1_hit_after_set(db_path: Path) -> None:
+    async def run() -> None:
+        cache = CacheManager(db_path)
+        await cache.set("product_search", "kush", {"ids": [1, 2]})
+        assert await cache.get("product_search", "kush") == {"ids": [1, 2]}
+        assert (cache.l1_hits, cache.l2_hits, cache.misses) == (1, 0, 0)
+
+    asyncio.run(run())
+
+
+def test_l2_hit_populates_l1(db_path: Path) -> None:
+    async def run() -> None:
+        await CacheManager(db_path).set("product_search", "kush", ["a"])
+
+        cache = CacheManager(db_path)  # empty L1, same cache.db
+        assert await cache.get("product_search", "kush") == ["a"]
+        assert await cache.get("product_search", "kush") == ["a"]
+        assert (cache.l1_hits, cache.l2_hits, cache.misses) == (1, 1, 0)
+
+    asyncio.run(run())
+
+
+def test_miss_and_delete(db_path: Path) -> None:
+    async def run() -> None:
+        cache = CacheManager(db_path)
+        assert await cache.get("product_search", "missing") is None
+        assert cache.misses == 1
+
+        await cache.set("product_search", "kush", ["a"])
+        assert await cache.delete("product_search", "kush") is True
+        assert cache.memory.get("product_search", "kush") is None
+        assert await cache.get("product_search", "kush") is None
+        assert cache.misses == 2
+
+    asyncio.run(run())
+
+
+def test_memory_cache_evicts_least_recently_used() -> None:
+    memory = MemoryCache(max_entries=2)
+    memory.set("t", "a", 1, None)
+    memory.set("t", "b", 2, None)
+    assert memory.get("t", "a") == 1  # "b" is now least recently used
+    memory.set("t", "c", 3, None)
+
+    assert memory.get("t", "b") is None
+    assert (memory.get("t", "a"), memory.get("t", "c")) == (1, 3)
+    assert len(memory) == 2
+
+
+def test_memory_cache_expiry_is_capped_by_max_ttl() -> None:
+    memory = MemoryCache(max_ttl=0.05)
+    memory.set("t", "a", 1, time.time() + 3600)
+    assert memory.get("t", "a") == 1
+    time.sleep(0.1)
+    assert memory.get("t", "a") is None
+
+    memory.set("t", "expired", 1, time.time() - 1)
+    assert memory.get("t", "expired") is None
+
+
+def test_clear_type_clears_l1(db_path: Path) -> None:
+    async def run() -> None:
+        cache = CacheManager(db_path)
+        await cache.set("product_search", "a", 1)
+        await cache.set("price_data", "b", 2)
+        assert await cache.clear_type("product_search") == 1
+        assert cache.memory.get("product_search", "a") is None
+        assert cache.memory.get("price_data", "b") == 2
+
+    asyncio.run(run())
+
+
+# Batched access statistics
+
+def _access_stats(db_path: Path, key: str) -> tuple:
+    with sqlite3.connect(db_path) as conn:
+        return tuple(conn.execute(
+            "SELECT access_count, last_accessed FROM cache WHERE key = ?", (key,)
+        ).fetchone())
+
+
+def test_hits_are_written_back_in_one_flush(db_path: Path) -> None:
+    async def run() -> None:
+        cache = CacheManager(db_path)
+        await cache.set("product_search", "kush", ["a"])
+        for _ in range(3):
+            await cache.get("product_search", "kush")
+
+        assert _access_stats(db_path, "kush") == (0, None)  # reads did not write
+        assert await cache.flush_access_stats() == 1
+        count, last_accessed = _access_stats(db_path, "kush")
+        assert count == 3 and last_accessed is not None
+        assert await cache.flush_access_stats() == 0  # nothing pending
+
+    asyncio.run(run())
+
+
+def test_flush_starts_once_enough_keys_are_pending(db_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("cache_manager.ACCESS_FLUSH_MAX_PENDING", 2)
+
+    async def run() -> None:
+        cache = CacheManager(db_path)
+        await cache.set("product_search", "a", 1)
+        await cache.set("product_search", "b", 2)
+        await cache.get("product_search", "a")
+        assert len(cache._pending_access) == 1  # below the threshold, nothing scheduled
+        await cache.get("product_search", "b")
+
+        assert cache._flush_task is not None
+        await cache._flush_task
+        assert _access_stats(db_path, "a")[0] == 1
+        assert _access_stats(db_path, "b")[0] == 1
+
+    asyncio.run(run())
+
+
+def test_close_writes_pending_stats(db_path: Path) -> None:
+    async def run() -> CacheManager:
+        cache = CacheManager(db_path)
+        await cache.set("product_search", "kush", ["a"])
+        await cache.get("product_search", "kush")
+        return cache
+
+    cache = asyncio.run(run())
+    cache.close()
+    assert _access_stats(db_path, "kush")[0] == 1
+
+
+# Byte budgets
+
+PAYLOAD = "x" * 98  # 100 bytes as JSON
+
+
+def _keys(db_path: Path, entry_type: str) -> set:
+    with sqlite3.connect(db_path) as conn:
+        return {row[0] for row in conn.execute("SELECT key FROM cache WHERE entry_type = ?", (entry_type,))}
+
+
+def test_type_budget_evicts_least_recently_used_of_that_type(db_path: Path) -> None:
+    async def run() -> None:
+        cache = CacheManager(db_path, type_budgets={"product_data": 250})
+        for key in ("old", "middle", "new"):
+            await cache.set("product_data", key, PAYLOAD)
+        await cache.set("price_data", "other", PAYLOAD)
+        await cache.get("product_data", "old")  # pending hit, flushed before evicting
+
+        result = await cache.enforce_budget()
+
+        assert result["evicted"] == 1
+        assert _keys(db_path, "product_data") == {"old", "new"}
+        assert _keys(db_path, "price_data") == {"other"}  # no budget for this type
+        assert result["total_bytes"] == 300
+
+    asyncio.run(run())
+
+
+def test_overall_budget_evicts_across_types(db_path: Path) -> None:
+    async def run() -> None:
+        cache = CacheManager(db_path, type_budgets={})
+        await cache.set("product_data", "a", PAYLOAD)
+        await cache.set("price_data", "b", PAYLOAD)
+        await cache.set("product_search", "c", PAYLOAD)
+        cache.max_bytes = 200  # after filling, so set() does not start an eviction itself
+
+        result = await cache.enforce_budget()
+
+        assert result == {"expired": 0, "evicted": 1, "total_bytes": 200}
+        assert _keys(db_path, "product_data") == set()
+        assert _keys(db_path, "price_data") == {"b"}
+        assert _keys(db_path, "product_search") == {"c"}
+
+    asyncio.run(run())
+
+
+def test_expired_entries_go_before_budget_eviction(db_path: Path) -> None:
+    async def run() -> None:
+        cache = CacheManager(db_path, type_budgets={"product_data": 200})
+        await cache.set("product_data", "kept", PAYLOAD)
+        await cache.set("product_data", "expiring", PAYLOAD, ttl_seconds=0.01)
+        await cache.set("product_data", "newest", PAYLOAD)
+        await asyncio.sleep(0.05)
+
+        result = await cache.enforce_budget()
+
+        assert (result["expired"], result["evicted"]) == (1, 0)
+        assert _keys(db_path, "product_data") == {"kept", "newest"}
+
+    asyncio.run(run())
+
+
+# get_or_compute: single-flight and stale-while-revalidate
+
+def test_concurrent_misses_share_one_compute(db_path: Path) -> None:
+    calls = []
+
+    async def loader() -> dict:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": len(calls)}
+
+    async def run() -> None:
+        cache = CacheManager(db_path)
+        results = await asyncio.gather(*(
+            cache.get_or_compute("product_search", "kush", loader, ttl_seconds=60) for _ in range(10)
+        ))
+        assert results == [{"value": 1}] * 10
+        assert len(calls) == 1
+        assert not cache._inflight
+
+        # Cached afterwards, also for a sync loader
+        assert await cache.get_or_compute("product_search", "kush", lambda: {"value": 2}) == {"value": 1}
+
+    asyncio.run(run())
+
+
+def test_none_results_are_not_cached(db_path: Path) -> None:
+    async def run() -> None:
+        cache = CacheManager(db_path)
+        assert await cache.get_or_compute("product_search", "missing", lambda: None) is None
+        assert await cache.get_or_compute("product_search", "missing", lambda: ["found"]) == ["found"]
+
+    asyncio.run(run())
+
+
+def test_stale_entries_are_served_while_one_refresh_runs(db_path: Path) -> None:
+    calls = []
+
+    async def loader() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return f"v{len(calls)}"
+
+    async def run() -> None:
+        cache = CacheManager(db_path)
+        options = {"ttl_seconds": 0.05, "stale_seconds": 60}
+        assert await cache.get_or_compute("product_search", "kush", loader, **options) == "v1"
+        await asyncio.sleep(0.1)  # past the TTL, inside the stale window
+
+        results = await asyncio.gather(*(
+            cache.get_or_compute("product_search", "kush", loader, **options) for _ in range(5)
+        ))
+        assert results == ["v1"] * 5  # served without waiting
+        assert len(calls) == 2  # one background refresh
+
+        await asyncio.gather(*cache._inflight.values())
+        assert await cache.get_or_compute("product_search", "kush", loader, **options) == "v2"
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_entries_past_the_stale_window_are_reloaded(db_path: Path) -> None:
+    async def run() -> None:
+        cache = CacheManager(db_path)
+        options = {"ttl_seconds": 0.02, "stale_seconds": 0.02}
+        assert await cache.get_or_compute("product_search", "kush", lambda: "v1", **options) == "v1"
+        await asyncio.sleep(0.1)
+        assert await cache.get_or_compute("product_search", "kush", lambda: "v2", **options) == "v2"
+
+    asyncio.run(run())
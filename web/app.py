@@ -17,21 +17,37 @@ Usage:
 """
 
 import asyncio
+import base64
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple, Type, Union, cast
 import json
 
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Request, Response, HTTPException, Body, Depends, Query
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-import uvicorn
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.utils import PlotlyJSONEncoder
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Optional fast JSON serializer (pip install orjson), falls back to the json module
+DefaultJSONResponse: Type[JSONResponse]
+try:
+    import orjson  # noqa: F401 (ORJSONResponse needs it at render time)
+    from fastapi.responses import ORJSONResponse
+    DefaultJSONResponse = ORJSONResponse
+except ImportError:
+    DefaultJSONResponse = JSONResponse
+
+# Optional brotli compression (pip install brotli-asgi), gzip is always available
+BrotliMiddleware: Optional[type]
+try:
+    import brotli_asgi  # type: ignore[import-not-found]
+    BrotliMiddleware = brotli_asgi.BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 # Import our existing modules
 try:
@@ -41,8 +57,16 @@ try:
     from logger import get_logger
     from error_handler import get_error_handler, RetryConfig
     from cache_manager import get_cache_manager
+    from database import DATABASE_PATH
+    from db_pool import ConnectionPool, DEFAULT_POOL_SIZE
+    from response_cache import ResponseCache
+    from product_search import build_match_query, search_products
+    from price_analytics import load_price_analytics
+    from batch_events import BatchEventBroker, BatchEventStore, format_sse
+    from job_manager import JobConflictError, JobManager
+    from downsample import DEFAULT_POINTS, METHODS, METHOD_LTTB, get_price_series
+    from data_export import DATASETS, FORMATS, GZIP_MEDIA_TYPE, MEDIA_TYPES, export_filename, stream_export
     import sqlite3
-    import subprocess
 
     logger = get_logger('web_app')
     error_handler = get_error_handler()
@@ -53,38 +77,133 @@ except ImportError as e:
     error_handler = None
     cache = None
 
-# Configuration
+# Configuration (DATABASE_PATH honours WEEDDB_DATABASE_PATH, pool size WEEDDB_DB_POOL_SIZE)
 PROJECT_ROOT = Path(__file__).parent.parent
-DATABASE_PATH = PROJECT_ROOT / "data" / "WeedDB.db"
 TEMPLATES_DIR = PROJECT_ROOT / "web" / "templates"
 STATIC_DIR = PROJECT_ROOT / "web" / "static"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Open the database connection pool and response cache on startup, close them on shutdown"""
+    app.state.db = ConnectionPool(DATABASE_PATH, size=DEFAULT_POOL_SIZE)
+    app.state.response_cache = ResponseCache(DATABASE_PATH)
+    # Checks PRAGMA data_version off the event loop, lookups stay in memory
+    app.state.response_cache.start_refresher()
+    app.state.batch_events = BatchEventBroker(BatchEventStore())
+    # Job status/progress changes are streamed to dashboards as batch events
+    app.state.jobs = JobManager(on_update=lambda event: app.state.batch_events.publish([event]))
+    # Keeps cache.db within its byte budgets
+    if cache is not None:
+        cache.start_janitor()
+    try:
+        yield
+    finally:
+        await app.state.jobs.shutdown()
+        await app.state.batch_events.close()
+        await app.state.response_cache.stop_refresher()
+        app.state.response_cache.close()
+        app.state.db.close()
+        if cache is not None:
+            await cache.stop_janitor()
+            cache.close()
+
 # FastAPI app
 app = FastAPI(
     title="WeedDB Web Interface",
     description="Modern web interface for cannabis product price tracking",
     version="0.1.2-alpha",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse
 )
 
+# Responses below this size are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.environ.get('WEEDDB_COMPRESSION_MIN_SIZE', '1024'))
+# Streams are never compressed by the middleware: SSE must not be buffered, exports gzip themselves
+UNCOMPRESSED_PATHS = ("/api/batch/events", "/api/export/")
+
+class SelectiveCompressionMiddleware:
+    """Brotli (if installed and accepted) or gzip compression, skipping streaming endpoints"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=6)
+        self.brotli = BrotliMiddleware(app, minimum_size=minimum_size) if BrotliMiddleware else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(UNCOMPRESSED_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        if self.brotli is not None and "br" in accept_encoding:
+            await self.brotli(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+app.add_middleware(SelectiveCompressionMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
 # Templates
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
-# Database connection helper
-def get_db_connection():
-    """Get database connection"""
-    return sqlite3.connect(DATABASE_PATH)
+# Database dependency: queries run as sync functions on the pool's worker threads
+def get_db(request: Request) -> ConnectionPool:
+    """Get the application's database connection pool"""
+    return cast(ConnectionPool, request.app.state.db)
+
+def get_response_cache(request: Request) -> ResponseCache:
+    """Get the response cache for read endpoints (cleared when the database changes)"""
+    return cast(ResponseCache, request.app.state.response_cache)
+
+def get_batch_events(request: Request) -> BatchEventBroker:
+    """Get the broker fanning out batch progress events to SSE clients"""
+    return cast(BatchEventBroker, request.app.state.batch_events)
+
+def get_jobs(request: Request) -> JobManager:
+    """Get the manager of web-triggered background jobs"""
+    return cast(JobManager, request.app.state.jobs)
+
+# Conditional GET for catalog endpoints: the ETag is the database's data generation,
+# so polling clients get a 304 without any query until the next scrape
+CATALOG_CACHE_CONTROL = f"public, max-age={int(os.environ.get('WEEDDB_CATALOG_MAX_AGE', '0'))}, must-revalidate"
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header against an ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _check_not_modified(request: Request, response: Response, cache: ResponseCache) -> Optional[Response]:
+    """Return a 304 response if the client's copy is current, else set ETag/Cache-Control"""
+    etag = f'"wdb-{cache.data_generation()}"'
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def _json_response(content: Any, response: Response) -> Response:
+    """Render JSON-ready content directly with the default response class
+
+    Skips FastAPI's jsonable_encoder pass over large payloads (products,
+    bulk details, price history); headers set on `response` (ETag) are kept.
+    """
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return DefaultJSONResponse(content, headers=headers)
 
 @app.get("/", response_class=HTMLResponse)
-async def dashboard(request: Request):
+async def dashboard(request: Request, db: ConnectionPool = Depends(get_db),
+                    cache: ResponseCache = Depends(get_response_cache)) -> Response:
     """Main dashboard page"""
     try:
         # Get basic stats
-        stats = await get_system_stats()
+        stats = await get_system_stats(db, cache)
 
         return templates.TemplateResponse(
             "dashboard.html",
@@ -98,128 +217,218 @@ async def dashboard(request: Request):
         logger.error(f"Dashboard error: {e}") if logger else print(f"Dashboard error: {e}")
         raise HTTPException(status_code=500, detail="Dashboard error")
 
+def _query_system_stats(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Collect system statistics (runs in the database thread pool)"""
+    cursor = conn.cursor()
+
+    # Basic product stats
+    cursor.execute("SELECT COUNT(*) FROM products")
+    product_count = cursor.fetchone()[0]
+
+    cursor.execute("SELECT COUNT(*) FROM producers")
+    producer_count = cursor.fetchone()[0]
+
+    cursor.execute("SELECT COUNT(*) FROM pharmacies")
+    pharmacy_count = cursor.fetchone()[0]
+
+    cursor.execute("SELECT COUNT(*) FROM prices")
+    price_count = cursor.fetchone()[0]
+
+    # Recent prices (runs in change-only storage count while still being seen)
+    cursor.execute("""
+        SELECT COUNT(*) FROM prices
+        WHERE timestamp > ?1 OR last_seen > ?1
+    """, (int((datetime.now() - timedelta(hours=24)).timestamp()),))
+    recent_prices = cursor.fetchone()[0]
+
+    # Latest update (includes heartbeats, read from the daily rollup)
+    cursor.execute("""
+        SELECT datetime(MAX(last_seen), 'unixepoch', 'localtime') FROM price_daily
+        WHERE day = (SELECT MAX(day) FROM price_daily)
+    """)
+    latest_update = cursor.fetchone()[0]
+
+    return {
+        "products": product_count,
+        "producers": producer_count,
+        "pharmacies": pharmacy_count,
+        "total_prices": price_count,
+        "recent_prices": recent_prices,
+        "latest_update": latest_update,
+        "database_size_mb": round(DATABASE_PATH.stat().st_size / (1024 * 1024), 2) if DATABASE_PATH.exists() else 0
+    }
+
 @app.get("/api/stats")
-async def get_system_stats():
+async def get_system_stats(db: ConnectionPool = Depends(get_db),
+                           cache: ResponseCache = Depends(get_response_cache)) -> Dict[str, Any]:
     """Get system statistics"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Basic product stats
-        cursor.execute("SELECT COUNT(*) FROM products")
-        product_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM producers")
-        producer_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM pharmacies")
-        pharmacy_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM prices")
-        price_count = cursor.fetchone()[0]
-
-        # Recent prices
-        cursor.execute("""
-            SELECT COUNT(*) FROM prices
-            WHERE timestamp > datetime('now', '-24 hours')
-        """)
-        recent_prices = cursor.fetchone()[0]
-
-        # Latest update
-        cursor.execute("SELECT MAX(timestamp) FROM prices")
-        latest_update = cursor.fetchone()[0]
-
-        conn.close()
-
-        return {
-            "products": product_count,
-            "producers": producer_count,
-            "pharmacies": pharmacy_count,
-            "total_prices": price_count,
-            "recent_prices": recent_prices,
-            "latest_update": latest_update,
-            "database_size_mb": round(DATABASE_PATH.stat().st_size / (1024 * 1024), 2) if DATABASE_PATH.exists() else 0
-        }
+        return await cache.get_or_load("stats", lambda: db.run(_query_system_stats))
 
     except Exception as e:
         logger.error(f"Stats error: {e}") if logger else print(f"Stats error: {e}")
         return {"error": str(e)}
 
+# Keyset pagination: sort key expressions match the idx_products_*_id indexes
+# (NULLs sort first, as before, via COALESCE(..., -1))
+PRODUCT_SORT_KEYS = {
+    "name": "p.name",
+    "rating": "COALESCE(p.rating, -1)",
+    "thc_percent": "COALESCE(p.thc_percent, -1)",
+    "review_count": "COALESCE(p.review_count, -1)"
+}
+
+def _encode_cursor(sort_by: str, sort_direction: str, sort_value: Any, product_id: int) -> str:
+    """Encode the position after a row as an opaque pagination cursor"""
+    payload = json.dumps([sort_by, sort_direction, sort_value, product_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode_cursor(cursor: str, sort_by: str, sort_direction: str) -> Tuple[Any, int]:
+    """Decode a pagination cursor into (sort value, product id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort_by, cursor_direction, sort_value, product_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode('ascii'))
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+    if (cursor_sort_by, cursor_direction) != (sort_by, sort_direction):
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return sort_value, int(product_id)
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input only matches literally (use with ESCAPE '\\')"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
 @app.get("/api/products")
 async def get_products(
+    request: Request,
+    response: Response,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     search: Optional[str] = None,
     genetics: Optional[str] = None,
     producer: Optional[str] = None,
     min_rating: Optional[float] = None,
+    effect: Optional[str] = None,
+    complaint: Optional[str] = None,
+    terpene: Optional[str] = None,
+    min_strength: Optional[int] = None,
     sort_by: str = "name",
-    sort_order: str = "asc"
-):
-    """Get products with advanced filtering, sorting and pagination"""
+    sort_order: str = "asc",
+    db: ConnectionPool = Depends(get_db),
+    cache: ResponseCache = Depends(get_response_cache)
+) -> Response:
+    """Get products with advanced filtering, sorting and pagination
+
+    Pages are addressed with `cursor` (keyset pagination, take `next_cursor`
+    from the previous page); `offset` is still accepted for the first pages.
+    The total count is only computed with include_total=true.
+    effect/complaint/terpene match attribute names by prefix (case-insensitive),
+    min_strength (0-4) applies to each of them.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        not_modified = _check_not_modified(request, response, cache)
+        if not_modified:
+            return not_modified
 
-        # Build query with filters
-        query = """
-            SELECT p.id, p.name, p.thc_percent, p.cbd_percent, p.genetics,
-                   pr.name as producer, p.rating, p.review_count
-            FROM products p
-            LEFT JOIN producers pr ON p.producer_id = pr.id
-            WHERE 1=1
-        """
-
-        params = []
+        limit = max(1, min(limit, 500))
+        where = []
+        params: List[Any] = []
 
         # Apply filters
-        if search:
-            query += " AND p.name LIKE ?"
-            params.append(f"%{search}%")
+        # Name/producer filters use the FTS5 index (prefix match) instead of LIKE scans
+        search_match = build_match_query(search, column="name") if search else None
+        if search_match:
+            where.append("p.id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)")
+            params.append(search_match)
 
         if genetics:
-            query += " AND p.genetics = ?"
+            where.append("p.genetics = ?")
             params.append(genetics)
 
-        if producer:
-            query += " AND pr.name LIKE ?"
-            params.append(f"%{producer}%")
+        producer_match = build_match_query(producer, column="producer") if producer else None
+        if producer_match:
+            where.append("p.id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)")
+            params.append(producer_match)
 
         if min_rating is not None:
-            query += " AND p.rating >= ?"
+            where.append("p.rating >= ?")
             params.append(min_rating)
 
-        # Validate sort parameters
-        allowed_sort_fields = {
-            "name": "p.name",
-            "rating": "p.rating",
-            "thc_percent": "p.thc_percent",
-            "review_count": "p.review_count"
-        }
+        # Attribute filters join the junction tables (idx_product_*_<attribute> indexes)
+        attribute_filters = [
+            (effect, "product_effects", "effect_id", "effects"),
+            (complaint, "product_therapeutic_uses", "therapeutic_use_id", "therapeutic_uses"),
+            (terpene, "product_terpenes", "terpene_id", "terpenes"),
+        ]
+        for value, junction, foreign_key, master in attribute_filters:
+            if not value:
+                continue
+            strength_condition = " AND j.strength >= ?" if min_strength is not None else ""
+            where.append(f"""p.id IN (
+                SELECT j.product_id FROM {junction} j
+                WHERE j.{foreign_key} IN (SELECT id FROM {master} WHERE name LIKE ? ESCAPE '\\'){strength_condition}
+            )""")
+            params.append(f"{_escape_like(value)}%")
+            if min_strength is not None:
+                params.append(min_strength)
 
-        if sort_by not in allowed_sort_fields:
+        # Validate sort parameters
+        if sort_by not in PRODUCT_SORT_KEYS:
             sort_by = "name"
 
-        sort_column = allowed_sort_fields[sort_by]
+        sort_key = PRODUCT_SORT_KEYS[sort_by]
         sort_direction = "DESC" if sort_order.lower() == "desc" else "ASC"
 
-        query += f" ORDER BY {sort_column} {sort_direction}"
-
-        # Get total count for pagination info
-        count_query = query.replace("SELECT p.id, p.name, p.thc_percent, p.cbd_percent, p.genetics,\n                   pr.name as producer, p.rating, p.review_count\n            FROM products p\n            LEFT JOIN producers pr ON p.producer_id = pr.id\n            WHERE 1=1", "SELECT COUNT(*) FROM products p LEFT JOIN producers pr ON p.producer_id = pr.id WHERE 1=1")
-        count_query = count_query.split(" ORDER BY")[0]  # Remove ORDER BY for count
-
-        cursor.execute(count_query, params)
-        total_count = cursor.fetchone()[0]
-
-        # Add pagination
-        query += " LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        filter_sql = " AND ".join(where) or "1=1"
+        count_query = f"SELECT COUNT(*) FROM products p WHERE {filter_sql}"
+
+        # Keyset condition: continue strictly after the cursor row, id breaks ties.
+        # Written as "key >= ? AND (...)" so SQLite seeks into the expression index.
+        page_where = list(where)
+        page_params = list(params)
+        if cursor:
+            sort_value, last_id = _decode_cursor(cursor, sort_by, sort_direction)
+            comparison = "<" if sort_direction == "DESC" else ">"
+            page_where.append(
+                f"{sort_key} {comparison}= ? AND ({sort_key} {comparison} ? OR p.id {comparison} ?)"
+            )
+            page_params.extend([sort_value, sort_value, last_id])
+            offset = 0
 
-        cursor.execute(query, params)
+        query = f"""
+            SELECT p.id, p.name, p.thc_percent, p.cbd_percent, p.genetics,
+                   pr.name as producer, p.rating, p.review_count, {sort_key} AS sort_value
+            FROM products p
+            LEFT JOIN producers pr ON p.producer_id = pr.id
+            WHERE {" AND ".join(page_where) or "1=1"}
+            ORDER BY {sort_key} {sort_direction}, p.id {sort_direction}
+            LIMIT ? OFFSET ?
+        """
+        # One extra row tells whether another page exists
+        page_params.extend([limit + 1, offset])
+
+        def fetch(conn: sqlite3.Connection) -> Tuple[Optional[int], List[Any]]:
+            db_cursor = conn.cursor()
+            total = None
+            if include_total:
+                db_cursor.execute(count_query, params)
+                total = db_cursor.fetchone()[0]
+            db_cursor.execute(query, page_params)
+            return total, db_cursor.fetchall()
+
+        cache_key = ("products", query, tuple(page_params), include_total)
+        total_count, rows = await cache.get_or_load(cache_key, lambda: db.run(fetch))
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         products = []
 
-        for row in cursor.fetchall():
+        for row in rows:
             products.append({
                 "id": row[0],
                 "name": row[1],
@@ -231,116 +440,236 @@ async def get_products(
                 "review_count": row[7]
             })
 
-        conn.close()
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = _encode_cursor(sort_by, sort_direction, rows[-1][8], rows[-1][0])
 
-        return {
+        return _json_response({
             "products": products,
             "pagination": {
                 "total": total_count,
                 "limit": limit,
                 "offset": offset,
-                "has_more": offset + limit < total_count
+                "has_more": has_more,
+                "next_cursor": next_cursor
             },
             "filters": {
                 "search": search,
                 "genetics": genetics,
                 "producer": producer,
-                "min_rating": min_rating
+                "min_rating": min_rating,
+                "effect": effect,
+                "complaint": complaint,
+                "terpene": terpene,
+                "min_strength": min_strength
             },
             "sorting": {
                 "sort_by": sort_by,
                 "sort_order": sort_order
             }
-        }
+        }, response)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Products error: {e}") if logger else print(f"Products error: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
-@app.get("/api/products/{product_id}")
-async def get_product_detail(product_id: int):
-    """Get detailed information about a specific product"""
+@app.get("/api/search")
+async def search(q: str, limit: int = 10, db: ConnectionPool = Depends(get_db)) -> Dict[str, Any]:
+    """Full-text product search for autocomplete (prefix, diacritic-insensitive, ranked)"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        results = await db.run(search_products, q, limit)
 
-        # Get product details
-        cursor.execute("""
-            SELECT p.id, p.name, p.variant, p.thc_percent, p.cbd_percent, p.genetics,
-                   pr.name as producer, p.rating, p.review_count, p.stock_level,
-                   p.irradiation, p.country, p.effects, p.complaints, p.url, p.last_updated
-            FROM products p
-            LEFT JOIN producers pr ON p.producer_id = pr.id
-            WHERE p.id = ?
-        """, (product_id,))
+        return {
+            "query": q,
+            "results": results,
+            "count": len(results)
+        }
 
-        row = cursor.fetchone()
-        if not row:
-            raise HTTPException(status_code=404, detail="Product not found")
+    except Exception as e:
+        logger.error(f"Search error: {e}") if logger else print(f"Search error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
 
-        product = {
-            "id": row[0],
-            "name": row[1],
-            "variant": row[2],
-            "thc_percent": row[3],
-            "cbd_percent": row[4],
-            "genetics": row[5],
-            "producer": row[6],
-            "rating": row[7],
-            "review_count": row[8],
-            "stock_level": row[9],
-            "irradiation": row[10],
-            "country": row[11],
-            "effects": row[12],
-            "complaints": row[13],
-            "url": row[14],
-            "last_updated": row[15]
+# Price history entries per product in detail responses, and ids per bulk request
+PRICE_HISTORY_LIMIT = 20
+MAX_BULK_PRODUCTS = 500
+
+def _query_product_details(conn: sqlite3.Connection, product_ids: List[int],
+                           history_limit: int = PRICE_HISTORY_LIMIT) -> Dict[int, Dict[str, Any]]:
+    """Load details, current prices and recent price history for many products
+
+    Runs three set-based queries regardless of the number of ids; unknown
+    ids are missing from the result.
+    """
+    ids_json = json.dumps(product_ids)
+    cursor = conn.cursor()
+
+    # Get product details
+    cursor.execute("""
+        SELECT p.id, p.name, p.variant, p.thc_percent, p.cbd_percent, p.genetics,
+               pr.name as producer, p.rating, p.review_count, p.stock_level,
+               p.irradiation, p.country, p.effects, p.complaints, p.url, p.last_updated
+        FROM products p
+        LEFT JOIN producers pr ON p.producer_id = pr.id
+        WHERE p.id IN (SELECT value FROM json_each(?))
+    """, (ids_json,))
+
+    details: Dict[int, Dict[str, Any]] = {}
+    for row in cursor.fetchall():
+        details[row[0]] = {
+            "product": {
+                "id": row[0],
+                "name": row[1],
+                "variant": row[2],
+                "thc_percent": row[3],
+                "cbd_percent": row[4],
+                "genetics": row[5],
+                "producer": row[6],
+                "rating": row[7],
+                "review_count": row[8],
+                "stock_level": row[9],
+                "irradiation": row[10],
+                "country": row[11],
+                "effects": row[12],
+                "complaints": row[13],
+                "url": row[14],
+                "last_updated": row[15]
+            },
+            "current_prices": {},
+            "price_history": []
         }
+    if not details:
+        return details
 
-        # Get price history
+    # Get price history (newest history_limit entries per product)
+    if history_limit > 0:
         cursor.execute("""
-            SELECT price_per_g, category, timestamp, pharmacy_id, ph.name as pharmacy_name
-            FROM prices pr
-            JOIN pharmacies ph ON pr.pharmacy_id = ph.id
-            WHERE pr.product_id = ?
-            ORDER BY timestamp DESC
-            LIMIT 20
-        """, (product_id,))
-
-        price_history = []
+            SELECT product_id, price_per_g, category, datetime(timestamp, 'unixepoch', 'localtime'),
+                   pharmacy_id, pharmacy_name, datetime(last_seen, 'unixepoch', 'localtime')
+            FROM (
+                SELECT pr.product_id, pr.price_per_g, pr.category, pr.timestamp, pr.last_seen,
+                       pr.pharmacy_id, ph.name as pharmacy_name,
+                       ROW_NUMBER() OVER (PARTITION BY pr.product_id ORDER BY pr.timestamp DESC) AS rn
+                FROM prices pr
+                JOIN pharmacies ph ON pr.pharmacy_id = ph.id
+                WHERE pr.product_id IN (SELECT value FROM json_each(?))
+            )
+            WHERE rn <= ?
+            ORDER BY product_id, rn
+        """, (ids_json, history_limit))
+
         for price_row in cursor.fetchall():
-            price_history.append({
-                "price_per_g": price_row[0],
-                "category": price_row[1],
-                "timestamp": price_row[2],
-                "pharmacy_id": price_row[3],
-                "pharmacy_name": price_row[4]
+            details[price_row[0]]["price_history"].append({
+                "price_per_g": price_row[1],
+                "category": price_row[2],
+                "timestamp": price_row[3],
+                "pharmacy_id": price_row[4],
+                "pharmacy_name": price_row[5],
+                "last_seen": price_row[6] or price_row[3]
             })
 
-        # Get current prices
-        cursor.execute("""
-            SELECT pr.price_per_g, pr.category, ph.name as pharmacy_name
-            FROM prices pr
-            JOIN pharmacies ph ON pr.pharmacy_id = ph.id
-            WHERE pr.product_id = ? AND pr.timestamp = (
-                SELECT MAX(timestamp) FROM prices WHERE product_id = ? AND category = pr.category
-            )
-        """, (product_id, product_id))
+    # Get current prices (maintained per product and category by triggers)
+    cursor.execute("""
+        SELECT lp.product_id, lp.price_per_g, lp.category, ph.name as pharmacy_name
+        FROM latest_prices lp
+        JOIN pharmacies ph ON lp.pharmacy_id = ph.id
+        WHERE lp.product_id IN (SELECT value FROM json_each(?))
+    """, (ids_json,))
+
+    for price_row in cursor.fetchall():
+        details[price_row[0]]["current_prices"][price_row[2]] = {
+            "price_per_g": price_row[1],
+            "pharmacy": price_row[3]
+        }
 
-        current_prices = {}
-        for price_row in cursor.fetchall():
-            current_prices[price_row[1]] = {
-                "price_per_g": price_row[0],
-                "pharmacy": price_row[2]
-            }
+    return details
 
-        conn.close()
+def _query_product_detail(conn: sqlite3.Connection, product_id: int) -> Optional[Dict[str, Any]]:
+    """Load product details and prices, None if the product does not exist"""
+    return _query_product_details(conn, [product_id]).get(product_id)
 
-        return {
-            "product": product,
-            "current_prices": current_prices,
-            "price_history": price_history
-        }
+def _parse_product_ids(ids: str) -> List[int]:
+    """Parse a comma-separated id list (duplicates removed, order kept)"""
+    try:
+        product_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not product_ids:
+        raise HTTPException(status_code=400, detail="No product ids given")
+    if len(product_ids) > MAX_BULK_PRODUCTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_PRODUCTS} ids per request")
+    return product_ids
+
+async def _bulk_product_details(request: Request, response: Response, product_ids: List[int],
+                                history_limit: int, db: ConnectionPool,
+                                cache: ResponseCache) -> Response:
+    not_modified = _check_not_modified(request, response, cache)
+    if not_modified:
+        return not_modified
+
+    details = await cache.get_or_load(
+        ("products_bulk", tuple(product_ids), history_limit),
+        lambda: db.run(_query_product_details, product_ids, history_limit)
+    )
+    return _json_response({
+        "products": [details[product_id] for product_id in product_ids if product_id in details],
+        "missing": [product_id for product_id in product_ids if product_id not in details],
+        "requested": len(product_ids)
+    }, response)
+
+# Bulk routes are declared before /api/products/{product_id} so "bulk" is not taken as an id
+@app.get("/api/products/bulk")
+async def get_products_bulk(request: Request, response: Response,
+                            ids: str = Query(..., description=f"Comma-separated product ids (max {MAX_BULK_PRODUCTS})"),
+                            history_limit: int = Query(PRICE_HISTORY_LIMIT, ge=0, le=100),
+                            db: ConnectionPool = Depends(get_db),
+                            cache: ResponseCache = Depends(get_response_cache)) -> Response:
+    """Get details, current prices and price history for many products at once"""
+    try:
+        return await _bulk_product_details(request, response, _parse_product_ids(ids),
+                                           history_limit, db, cache)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Bulk product detail error: {e}") if logger else print(f"Bulk product detail error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.post("/api/products/bulk")
+async def post_products_bulk(request: Request, response: Response,
+                             ids: List[int] = Body(..., embed=True),
+                             history_limit: int = Body(PRICE_HISTORY_LIMIT, embed=True, ge=0, le=100),
+                             db: ConnectionPool = Depends(get_db),
+                             cache: ResponseCache = Depends(get_response_cache)) -> Response:
+    """Same as GET /api/products/bulk, for id lists too long for a URL"""
+    try:
+        product_ids = _parse_product_ids(",".join(str(product_id) for product_id in ids))
+        return await _bulk_product_details(request, response, product_ids, history_limit, db, cache)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Bulk product detail error: {e}") if logger else print(f"Bulk product detail error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.get("/api/products/{product_id}")
+async def get_product_detail(product_id: int, request: Request, response: Response,
+                             db: ConnectionPool = Depends(get_db),
+                             cache: ResponseCache = Depends(get_response_cache)) -> Response:
+    """Get detailed information about a specific product"""
+    try:
+        not_modified = _check_not_modified(request, response, cache)
+        if not_modified:
+            return not_modified
+
+        detail = await cache.get_or_load(
+            ("product", product_id), lambda: db.run(_query_product_detail, product_id)
+        )
+        if detail is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+        return _json_response(detail, response)
 
     except HTTPException:
         raise
@@ -348,144 +677,241 @@ async def get_product_detail(product_id: int):
         logger.error(f"Product detail error: {e}") if logger else print(f"Product detail error: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
+# Products per downsampled history request
+MAX_HISTORY_PRODUCTS = 20
+
+@app.get("/api/prices/history")
+async def get_price_history(request: Request, response: Response,
+                            ids: str = Query(..., description=f"Comma-separated product ids (max {MAX_HISTORY_PRODUCTS})"),
+                            start: Optional[str] = Query(None, description="Start date YYYY-MM-DD (default: 90 days before end)"),
+                            end: Optional[str] = Query(None, description="End date YYYY-MM-DD (default: today)"),
+                            category: Optional[str] = Query(None, pattern="^(top|all)$"),
+                            points: int = Query(DEFAULT_POINTS, ge=10, le=5000, description="Target points per series"),
+                            method: str = Query(METHOD_LTTB, pattern=f"^({'|'.join(METHODS)})$"),
+                            db: ConnectionPool = Depends(get_db),
+                            cache: ResponseCache = Depends(get_response_cache)) -> Response:
+    """Get price series for a time range, downsampled server-side for charts"""
+    try:
+        product_ids = _parse_product_ids(ids)
+        if len(product_ids) > MAX_HISTORY_PRODUCTS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_HISTORY_PRODUCTS} ids per request")
+        for value in (start, end):
+            if value:
+                try:
+                    datetime.strptime(value, "%Y-%m-%d")
+                except ValueError:
+                    raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+
+        not_modified = _check_not_modified(request, response, cache)
+        if not_modified:
+            return not_modified
+
+        series = await cache.get_or_load(
+            ("price_history", tuple(product_ids), start, end, category, points, method),
+            lambda: db.run(get_price_series, product_ids, start, end, category, points, method)
+        )
+
+        return _json_response({
+            "series": [
+                {"product_id": product_id, "category": series_category, "points": line}
+                for (product_id, series_category), line in sorted(series.items())
+            ],
+            "method": method,
+            "points": points,
+            "timestamp_unit": "epoch_seconds"
+        }, response)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Price history error: {e}") if logger else print(f"Price history error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.get("/api/export/{dataset}")
+async def export_dataset(dataset: str,
+                         format: str = Query("ndjson", pattern=f"^({'|'.join(FORMATS)})$"),
+                         gzip: bool = Query(False, description="Compress the download with gzip"),
+                         product_id: Optional[int] = Query(None, description="price_history: only this product"),
+                         category: Optional[str] = Query(None, pattern="^(top|all)$"),
+                         start: Optional[str] = Query(None, description="price_history: start date YYYY-MM-DD"),
+                         end: Optional[str] = Query(None, description="price_history: end date YYYY-MM-DD"),
+                         include_archived: bool = Query(False, description="price_history: include archived prices")) -> StreamingResponse:
+    """Stream a whole dataset (products, current_prices, price_history) as NDJSON or CSV"""
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset, available: {', '.join(sorted(DATASETS))}")
+    for value in (start, end):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+
+    filters: Dict[str, Any] = {}
+    if dataset == "price_history":
+        filters = {"product_id": product_id, "category": category, "start": start, "end": end,
+                   "include_archived": include_archived}
+
+    # Sync generator: Starlette pulls each chunk on a worker thread, rows are fetched with fetchmany()
+    return StreamingResponse(
+        stream_export(dataset, format, compress=gzip, db_path=DATABASE_PATH, **filters),
+        media_type=GZIP_MEDIA_TYPE if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(dataset, format, gzip)}"'}
+    )
+
 @app.get("/api/analytics/prices")
-async def get_price_analytics():
+async def get_price_analytics(db: ConnectionPool = Depends(get_db),
+                              cache: ResponseCache = Depends(get_response_cache)) -> Dict[str, Any]:
     """Get price analytics and trends"""
     try:
-        conn = get_db_connection()
-
-        # Get price statistics
-        df = pd.read_sql_query("""
-            SELECT p.name, pr.price_per_g, pr.category, pr.timestamp,
-                   ph.name as pharmacy
-            FROM prices pr
-            JOIN products p ON pr.product_id = p.id
-            JOIN pharmacies ph ON pr.pharmacy_id = ph.id
-            ORDER BY pr.timestamp DESC
-            LIMIT 1000
-        """, conn)
-
-        conn.close()
-
-        if df.empty:
-            return {"error": "No price data available"}
-
-        # Basic analytics
-        analytics = {
-            "total_records": len(df),
-            "avg_price_top": round(df[df['category'] == 'top']['price_per_g'].mean(), 2),
-            "avg_price_all": round(df[df['category'] == 'all']['price_per_g'].mean(), 2),
-            "price_range": {
-                "min": round(df['price_per_g'].min(), 2),
-                "max": round(df['price_per_g'].max(), 2)
-            },
-            "top_expensive": df.nlargest(5, 'price_per_g')[['name', 'price_per_g', 'pharmacy']].values.tolist(),
-            "top_cheap": df.nsmallest(5, 'price_per_g')[['name', 'price_per_g', 'pharmacy']].values.tolist()
-        }
-
-        return analytics
+        return await cache.get_or_load("analytics", lambda: db.run(load_price_analytics))
 
     except Exception as e:
         logger.error(f"Analytics error: {e}") if logger else print(f"Analytics error: {e}")
         raise HTTPException(status_code=500, detail="Analytics error")
 
-@app.post("/api/batch/update")
-async def trigger_batch_update(background_tasks: BackgroundTasks):
-    """Trigger a batch price update"""
+@app.post("/api/batch/update", status_code=202)
+async def trigger_batch_update(jobs: JobManager = Depends(get_jobs)) -> Dict[str, Any]:
+    """Trigger a batch price update (one at a time, runs as a background job)"""
     try:
-        # Add background task
-        background_tasks.add_task(run_batch_update)
+        job = await jobs.start("update_prices")
+        logger.info(f"Started price update job {job.id}") if logger else None
 
-        return {"message": "Batch update started in background", "status": "running"}
+        return {"message": "Batch update started in background", **job.to_dict()}
 
+    except JobConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "job_id": e.job_id})
     except Exception as e:
         logger.error(f"Batch trigger error: {e}") if logger else print(f"Batch trigger error: {e}")
         raise HTTPException(status_code=500, detail="Batch trigger failed")
 
-# Global storage for batch status updates
-batch_status_updates = []
+# Idle interval of the SSE stream: checks for data changes and keeps the connection alive
+SSE_IDLE_INTERVAL = 5.0
 
 @app.post("/api/batch/status")
-async def receive_batch_status(status_data: Dict[str, Any]):
-    """Receive status updates from batch processing scripts"""
+async def receive_batch_status(status_data: Union[List[Dict[str, Any]], Dict[str, Any]] = Body(...),
+                               broker: BatchEventBroker = Depends(get_batch_events)) -> Dict[str, Any]:
+    """Receive status updates from batch processing scripts (one event or a list)"""
     try:
-        # Add timestamp if not present
-        if 'timestamp' not in status_data:
-            status_data['timestamp'] = datetime.now().isoformat()
+        events = await broker.publish(status_data if isinstance(status_data, list) else [status_data])
 
-        # Store status update (keep last 100 entries)
-        batch_status_updates.append(status_data)
-        if len(batch_status_updates) > 100:
-            batch_status_updates.pop(0)
+        logger.info(f"Received {len(events)} batch status update(s)") if logger else None
 
-        logger.info(f"Received batch status update for: {status_data.get('product_name', 'unknown')}") if logger else None
-
-        return {"status": "received", "message": "Status update stored"}
+        return {"status": "received", "count": len(events), "last_seq": events[-1]["seq"] if events else None}
 
     except Exception as e:
         logger.error(f"Status update error: {e}") if logger else print(f"Status update error: {e}")
         raise HTTPException(status_code=500, detail="Status update failed")
 
 @app.get("/api/batch/status")
-async def get_batch_status(limit: int = 20):
-    """Get recent batch processing status updates"""
+async def get_batch_status(limit: int = 20,
+                           since: Optional[int] = Query(None, ge=0, description="Only events after this sequence number"),
+                           broker: BatchEventBroker = Depends(get_batch_events)) -> Dict[str, Any]:
+    """Get recent batch processing status updates (shared by all workers)"""
     try:
-        # Return most recent status updates
-        recent_updates = batch_status_updates[-limit:] if batch_status_updates else []
+        if since is not None:
+            recent_updates = (await broker.since(since))[:limit]
+        else:
+            recent_updates = await broker.recent(limit)
+        stats = await asyncio.to_thread(broker.store.get_stats)
 
         return {
             "status_updates": recent_updates,
-            "total_updates": len(batch_status_updates),
-            "returned_count": len(recent_updates)
+            "total_updates": stats["total_events"],
+            "returned_count": len(recent_updates),
+            "last_seq": stats["last_seq"]
         }
 
     except Exception as e:
         logger.error(f"Get status error: {e}") if logger else print(f"Get status error: {e}")
         raise HTTPException(status_code=500, detail="Status retrieval failed")
 
-async def run_batch_update():
-    """Run batch update in background"""
+async def _batch_event_stream(request: Request, broker: BatchEventBroker, cache: ResponseCache,
+                              since: Optional[int]) -> AsyncIterator[str]:
+    """Yield SSE messages: missed events, then live batch events and data change notices"""
+    queue = await broker.subscribe()
+    last_sent = since or 0
     try:
-        if logger:
-            logger.info("Starting background batch update")
-
-        # Run the update script
-        scripts_dir = PROJECT_ROOT / "scripts"
-        result = subprocess.run(
-            [sys.executable, str(scripts_dir / "update_prices.py")],
-            capture_output=True,
-            text=True,
-            cwd=PROJECT_ROOT,
-            timeout=600  # 10 minutes
-        )
-
-        if logger:
-            if result.returncode == 0:
-                logger.info("Background batch update completed successfully")
+        yield f"retry: {int(SSE_IDLE_INTERVAL * 1000)}\n\n"
+        if since is not None:
+            for event in await broker.since(since):
+                last_sent = event["seq"]
+                yield format_sse(event)
+
+        generation = cache.data_generation()
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_IDLE_INTERVAL)
+                if event["seq"] > last_sent:  # may already have been part of the replay
+                    last_sent = event["seq"]
+                    yield format_sse(event)
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            if await request.is_disconnected():
+                break
+            current = cache.data_generation()
+            if current != generation:
+                generation = current
+                yield format_sse({"generation": current}, event="data", event_id=last_sent)
             else:
-                logger.error(f"Background batch update failed: {result.stderr}")
-
-    except subprocess.TimeoutExpired:
-        if logger:
-            logger.error("Background batch update timed out")
-    except Exception as e:
-        if logger:
-            logger.error(f"Background batch update error: {e}")
+                yield ": keepalive\n\n"
+    finally:
+        broker.unsubscribe(queue)
+
+@app.get("/api/batch/events")
+async def stream_batch_events(request: Request,
+                              since: Optional[int] = Query(None, ge=0, description="Replay buffered events after this sequence number"),
+                              broker: BatchEventBroker = Depends(get_batch_events),
+                              cache: ResponseCache = Depends(get_response_cache)) -> StreamingResponse:
+    """Server-Sent Events stream of batch progress ('batch') and database changes ('data')"""
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    return StreamingResponse(
+        _batch_event_stream(request, broker, cache, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/jobs")
+async def list_jobs(limit: int = Query(20, ge=1, le=100),
+                    jobs: JobManager = Depends(get_jobs)) -> Dict[str, Any]:
+    """List background jobs of all workers (newest first)"""
+    return {"jobs": [job.to_dict() for job in await jobs.list(limit)]}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, jobs: JobManager = Depends(get_jobs)) -> Dict[str, Any]:
+    """Get status, progress and the last output lines of a job"""
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(include_output=True)
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, jobs: JobManager = Depends(get_jobs)) -> Dict[str, Any]:
+    """Cancel a running job (waits until it stopped)"""
+    job = await jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 @app.get("/health")
-async def health_check():
+async def health_check(db: ConnectionPool = Depends(get_db),
+                       cache: ResponseCache = Depends(get_response_cache),
+                       broker: BatchEventBroker = Depends(get_batch_events)) -> Dict[str, Any]:
     """Health check endpoint"""
     try:
         # Check database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        conn.close()
+        await db.run(lambda conn: conn.execute("SELECT 1").fetchone())
 
         return {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "database": "connected",
+            "response_cache": cache.get_stats(),
+            "batch_events": await asyncio.to_thread(broker.get_stats),
             "version": "0.1.2-alpha"
         }
 
@@ -497,7 +923,9 @@ async def health_check():
         }
 
 if __name__ == "__main__":
-    # Development server
+    # Development server (uvicorn is only needed here, workers import the app directly)
+    import uvicorn
+
     uvicorn.run(
         "web.app:app",
         host="0.0.0.0",